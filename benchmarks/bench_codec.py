@@ -0,0 +1,130 @@
+#! /usr/bin/python3
+
+# bench_codec.py
+#
+# Project name: power nugget
+# Author: Hugo Juhel
+#
+# description:
+"""
+Benchmark a round trip (decode from the zip, encode back into a zip) of a large DataModelSchema-like member.
+The "stdlib" columns replay the former codec : json.loads / json.dumps over a fully decoded / encoded string.
+
+    python -m benchmarks.bench_codec --size-mb 50
+    python -m benchmarks.bench_codec --template path/to/template.pbit
+"""
+
+#############################################################################
+#                                 Packages                                  #
+#############################################################################
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+import zipfile
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from powernugget.dashboard import codec
+
+#############################################################################
+#                                  Script                                   #
+#############################################################################
+
+_MEMBER = "DataModelSchema"
+
+
+def synthetic_data_model(size_mb: float) -> Dict[str, Any]:
+    """
+    Build a DataModelSchema-like payload weighting roughly size_mb MB once encoded in UTF-16
+    """
+
+    def _table(i: int) -> Dict[str, Any]:
+        return {
+            "name": f"table_{i}",
+            "lineageTag": f"{i:08x}-0000-0000-0000-000000000000",
+            "columns": [{"name": f"column_{j}", "dataType": "string", "sourceColumn": f"column_{j}", "summarizeBy": "none"} for j in range(20)],
+            "measures": [{"name": f"measure_{j}", "expression": f"SUM('table_{i}'[column_{j}])", "formatString": "0.00"} for j in range(10)],
+            "partitions": [{"name": f"partition_{i}", "mode": "import", "source": {"type": "m", "expression": ["let", "    Source = x", "in", "    Source"]}}],
+        }
+
+    # A table weighs roughly 8 kB once encoded
+    n_tables = max(1, int(size_mb * 1024 / 8))
+    return {"name": "synthetic", "compatibilityLevel": 1550, "model": {"culture": "en-US", "tables": [_table(i) for i in range(n_tables)]}}
+
+
+def _stdlib_load(raw: bytes) -> Any:
+    return json.loads(raw.decode(codec.PBIT_ENCODING))
+
+
+def _stdlib_dump(payload: Any, dst: zipfile.ZipFile):
+    dst.writestr(_MEMBER, json.dumps(payload).encode(codec.PBIT_ENCODING))
+
+
+def _codec_dump(payload: Any, dst: zipfile.ZipFile):
+    with dst.open(_MEMBER, "w") as fdst:
+        codec.dump(payload, fdst)
+
+
+def _measure(fn: Callable[[], Any]) -> Dict[str, float]:
+    """
+    Time a function, then run it again under tracemalloc to measure it's peak of memory
+    """
+
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"s": elapsed, "peak_mb": peak / 2**20}
+
+
+def run(raw: bytes) -> Dict[str, Dict[str, float]]:
+    """
+    Time the decoding and the encoding of a member, with both codecs
+    """
+
+    results = {}
+    for name, load, dump in (("stdlib", _stdlib_load, _stdlib_dump), ("codec", codec.loads, _codec_dump)):
+        payload = load(raw)
+        results[f"{name} load"] = _measure(lambda: load(raw))
+
+        def _dump():
+            with zipfile.ZipFile(BytesIO(), "w", compression=zipfile.ZIP_DEFLATED) as dst:
+                dump(payload, dst)
+
+        results[f"{name} dump"] = _measure(_dump)
+
+    return results
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=float, default=20, help="The size of the synthetic member.")
+    parser.add_argument("--template", type=Path, default=None, help="Benchmark the DataModelSchema of an actual template instead.")
+    args = parser.parse_args(argv)
+
+    raw: Optional[bytes] = None
+    if args.template:
+        with zipfile.ZipFile(args.template) as template:
+            raw = template.read(_MEMBER)
+    else:
+        raw = json.dumps(synthetic_data_model(args.size_mb)).encode(codec.PBIT_ENCODING)
+
+    print(f"member size : {len(raw) / 2**20:.1f} MB, orjson : {'yes' if codec.orjson is not None else 'no'}")
+    print(f"{'step':>12} {'time (s)':>10} {'peak (MB)':>10}")
+    for step, r in run(raw).items():
+        print(f"{step:>12} {r['s']:>10.3f} {r['peak_mb']:>10.1f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,115 @@
+#! /usr/bin/python3
+
+# bench_context.py
+#
+# Project name: power nugget
+# Author: Hugo Juhel
+#
+# description:
+"""
+Benchmark the memory and the time spent building the rendering contexts, for inventories of 10 / 100 / 1000 dashboards.
+The "deepcopy" columns replay the copies the contexts used to cost : one copy of the vars per dashboard and one copy of the whole context per loop item.
+
+    python -m benchmarks.bench_context
+"""
+
+#############################################################################
+#                                 Packages                                  #
+#############################################################################
+
+import argparse
+import sys
+import time
+import tracemalloc
+from copy import deepcopy
+from types import MappingProxyType
+from typing import Any, Dict, List, Tuple
+
+from powernugget.descriptions.models import Tasks_list
+from powernugget.tasks_generator import TaskGenerator
+from powernugget.tasks_plan import TaskPlan
+
+#############################################################################
+#                                  Script                                   #
+#############################################################################
+
+_DASHBOARDS = (10, 100, 1000)
+
+
+def _tasks_list() -> Tasks_list:
+    return Tasks_list.of(
+        [
+            {
+                "name": "Remap {{ item }} on {{ dashboard_name }}",
+                "nugget": "powernugget.builtins.Debug",
+                "params": {"msg": "{{ vars['labels'][item] }}"},
+                "loop": "{{ dashboard_data['keys'] }}",
+            },
+            {
+                "name": "Print a debug message : {{ dashboard_name }}",
+                "nugget": "powernugget.builtins.Debug",
+                "params": {"msg": "Doing stuff on {{ dashboard_name }}"},
+            },
+        ]
+    )
+
+
+def _inventory(dashboards: int, vars_size: int, data_size: int) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+    """
+    Build a large vars file and an inventory whose entries carry a large data blob
+    """
+
+    vars_ = {"labels": {f"key_{i}": f"label {i}" for i in range(vars_size)}}
+    inventory = {
+        f"dashboard_{d}": {"keys": [f"key_{i}" for i in range(10)], "blob": [{"id": i, "value": "x" * 16} for i in range(data_size)]}
+        for d in range(dashboards)
+    }
+
+    return vars_, inventory
+
+
+def run(dashboards: int, vars_size: int, data_size: int, replay_deepcopy: bool) -> Dict[str, float]:
+    """
+    Render all the tasks of all the dashboards, and measure the peak of memory allocated while doing so
+    """
+
+    plan = TaskPlan(_tasks_list())
+    vars_, inventory = _inventory(dashboards, vars_size, data_size)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    for name, data in inventory.items():
+        magics = {"vars": MappingProxyType(vars_), "dashboard_name": name, "dashboard_data": MappingProxyType(data), "root_path": "."}
+        if replay_deepcopy:
+            magics = deepcopy({**magics, "vars": vars_, "dashboard_data": data})
+            for _ in data["keys"]:
+                deepcopy(magics)
+
+        for _ in TaskGenerator(plan, **magics):
+            pass
+
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"total_s": elapsed, "peak_mb": peak / 2**20}
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dashboards", type=int, nargs="+", default=_DASHBOARDS, help="The numbers of dashboards to render.")
+    parser.add_argument("--vars-size", type=int, default=1_000, help="The number of entries of the vars file.")
+    parser.add_argument("--data-size", type=int, default=100, help="The number of entries of each dashboard data blob.")
+    args = parser.parse_args(argv)
+
+    print(f"{'dashboards':>10} {'layered (s)':>12} {'peak (MB)':>10} {'deepcopy (s)':>13} {'peak (MB)':>10}")
+    for dashboards in args.dashboards:
+        layered = run(dashboards, args.vars_size, args.data_size, replay_deepcopy=False)
+        copied = run(dashboards, args.vars_size, args.data_size, replay_deepcopy=True)
+        print(f"{dashboards:>10} {layered['total_s']:>12.3f} {layered['peak_mb']:>10.1f} {copied['total_s']:>13.3f} {copied['peak_mb']:>10.1f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,86 @@
+#! /usr/bin/python3
+
+# bench_loader.py
+#
+# Project name: power nugget
+# Author: Hugo Juhel
+#
+# description:
+"""
+Benchmark the loading of a large inventory : parsing (pure python yaml, libyaml, json, msgpack), validation, and validated models cache.
+
+    python -m benchmarks.bench_loader --dashboards 10000
+"""
+
+#############################################################################
+#                                 Packages                                  #
+#############################################################################
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, List
+
+import yaml
+
+from benchmarks.synthetic import synthetic_inventory
+from powernugget.cache import DiskCache
+from powernugget.descriptions import _deserialize_yaml_as
+from powernugget.descriptions import yaml as loader
+from powernugget.descriptions.models import Inventory
+
+#############################################################################
+#                                  Script                                   #
+#############################################################################
+
+
+def _timed(fn: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dashboards", type=int, default=5000, help="The number of dashboards of the synthetic inventory.")
+    args = parser.parse_args(argv)
+
+    inventory = synthetic_inventory(args.dashboards)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        yaml_path, json_path = root / "inventory.yaml", root / "inventory.json"
+        yaml_path.write_text(yaml.safe_dump(inventory))
+        json_path.write_text(json.dumps(inventory))
+        raw = yaml_path.read_bytes()
+
+        print(f"inventory : {args.dashboards} dashboards, {len(raw) / 1e6:.1f} MB of yaml")
+        print(f"{'step':>26} {'time (s)':>10}")
+
+        timings = {
+            "parse (pure python yaml)": lambda: yaml.load(raw, Loader=yaml.SafeLoader),
+            "parse (libyaml)": lambda: yaml.load(raw, Loader=loader._loader()),
+            "parse (json)": lambda: loader._parse(json_path.read_bytes(), ".json"),
+        }
+        if loader.msgpack is not None:
+            msgpack_path = root / "inventory.msgpack"
+            msgpack_path.write_bytes(loader.msgpack.packb(inventory))
+            timings["parse (msgpack)"] = lambda: loader._parse(msgpack_path.read_bytes(), ".msgpack")
+
+        timings["validate"] = lambda: Inventory.of(inventory)
+
+        cache = DiskCache(root / "cache")
+        timings["load yaml (cache miss)"] = lambda: _deserialize_yaml_as(yaml_path, Inventory, cache)
+        timings["load yaml (cache hit)"] = lambda: _deserialize_yaml_as(yaml_path, Inventory, cache)
+
+        for name, fn in timings.items():
+            print(f"{name:>26} {_timed(fn):>10.3f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,111 @@
+#! /usr/bin/python3
+
+# bench_render.py
+#
+# Project name: power nugget
+# Author: Hugo Juhel
+#
+# description:
+"""
+Benchmark the tasks rendering : how the rendering time per task scales with the number of dashboards and loop items.
+
+    python -m benchmarks.bench_render
+    python -m benchmarks.bench_render --no-plan
+    python -m benchmarks.bench_render --no-plan --no-cache
+"""
+
+#############################################################################
+#                                 Packages                                  #
+#############################################################################
+
+import argparse
+import sys
+import time
+from typing import Any, Dict, List
+
+from powernugget import tasks_plan
+from powernugget.descriptions.models import Tasks_list
+from powernugget.tasks_generator import TaskGenerator
+from powernugget.tasks_plan import TaskPlan
+
+#############################################################################
+#                                  Script                                   #
+#############################################################################
+
+_DASHBOARDS = (10, 100, 1000)
+_LOOP_ITEMS = (1, 10, 50)
+
+
+def _tasks_list() -> Tasks_list:
+    """
+    A tasks list mixing a looping task, a templated task and a constant task
+    """
+
+    return Tasks_list.of(
+        [
+            {
+                "name": "Remap {{ item['from'] }} on {{ dashboard_name }}",
+                "nugget": "powernugget.builtins.Debug",
+                "params": {"msg": "Replacing {{ item['from'] }} with {{ item['to'] }}"},
+                "loop": "{{ dashboard_data['remapping'] }}",
+                "when": "dashboard_name != 'excluded'",
+            },
+            {
+                "name": "Print a debug message : {{ dashboard_name }}",
+                "nugget": "powernugget.builtins.Debug",
+                "params": {"msg": "Doing stuff on {{ dashboard_name }}"},
+            },
+            {
+                "name": "Print a constant message",
+                "nugget": "powernugget.builtins.Debug",
+                "params": {"msg": "Nothing to render here"},
+            },
+        ]
+    )
+
+
+def _dashboard_data(loop_items: int) -> Dict[str, Any]:
+    return {"remapping": [{"from": f"color_{i}", "to": f"new_color_{i}"} for i in range(loop_items)]}
+
+
+def run(dashboards: int, loop_items: int, compile_plan: bool = True) -> Dict[str, Any]:
+    """
+    Render the tasks list for `dashboards` dashboards, the looping task being expanded in `loop_items` tasks.
+    As the Nuggetizer does, the tasks list is compiled once into a plan, unless `compile_plan` is False.
+    """
+
+    tasks_list = _tasks_list() if not compile_plan else TaskPlan(_tasks_list())
+    dashboard_data = _dashboard_data(loop_items)
+
+    n_tasks = 0
+    start = time.perf_counter()
+    for i in range(dashboards):
+        for _ in TaskGenerator(tasks_list, dashboard_name=f"dashboard_{i}", dashboard_data=dashboard_data, vars={}):
+            n_tasks += 1
+    elapsed = time.perf_counter() - start
+
+    return {"dashboards": dashboards, "loop_items": loop_items, "tasks": n_tasks, "total_s": elapsed, "per_task_us": elapsed / n_tasks * 1e6}
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dashboards", type=int, nargs="+", default=_DASHBOARDS, help="The numbers of dashboards to render.")
+    parser.add_argument("--loop-items", type=int, nargs="+", default=_LOOP_ITEMS, help="The numbers of items of the looping task.")
+    parser.add_argument("--no-plan", action="store_true", help="Compile the tasks list for every dashboard.")
+    parser.add_argument("--no-cache", action="store_true", help="Compile every template from scratch, as a baseline.")
+    args = parser.parse_args(argv)
+
+    if args.no_cache:
+        tasks_plan._compile_template = tasks_plan._compile_template.__wrapped__  # type: ignore
+
+    print(f"{'dashboards':>10} {'loop items':>10} {'tasks':>8} {'total (s)':>10} {'per task (us)':>14}")
+    for dashboards in args.dashboards:
+        for loop_items in args.loop_items:
+            r = run(dashboards, loop_items, compile_plan=not args.no_plan)
+            print(f"{r['dashboards']:>10} {r['loop_items']:>10} {r['tasks']:>8} {r['total_s']:>10.3f} {r['per_task_us']:>14.1f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
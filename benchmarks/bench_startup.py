@@ -0,0 +1,96 @@
+#! /usr/bin/python3
+
+# bench_startup.py
+#
+# Project name: power nugget
+# Author: Hugo Juhel
+#
+# description:
+"""
+Benchmark the startup time of the command line interface : the time spent by each command on top of a bare interpreter startup.
+Exit with an error if a command exceeds it's budget. The budgets account for the work of the command : `list-nuggets` scans the nuggets
+sources, and `validate` parses and validates the project's files.
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --budget-ms 50 --repeat 20
+"""
+
+#############################################################################
+#                                 Packages                                  #
+#############################################################################
+
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import List, Sequence
+
+#############################################################################
+#                                  Script                                   #
+#############################################################################
+
+_PROJECT = str(Path(__file__).parent.parent / "tests" / "test_repo")
+
+# The commands, with their budget in milliseconds
+_COMMANDS = {
+    "--help": (["-m", "powernugget", "--help"], 100.0),
+    "list-nuggets": (["-m", "powernugget", "list-nuggets", _PROJECT], 150.0),
+    "validate": (["-m", "powernugget", "validate", _PROJECT], 300.0),
+}
+
+# The modules the fast commands must not import
+HEAVY_MODULES = ("jinja2", "powernugget.nuggetizer", "powernugget.builtins", "powernugget.dashboard")
+
+
+def _best_ms(args: Sequence[str], repeat: int) -> float:
+    """
+    The best wall time of a python process, in milliseconds : the machine's load can only slow a run down
+    """
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - start) * 1e3)
+
+    return min(timings)
+
+
+def imported_modules(args: Sequence[str]) -> List[str]:
+    """
+    The top-level and powernugget modules imported by a python process
+    """
+
+    process = subprocess.run([sys.executable, "-X", "importtime", *args], check=True, capture_output=True, text=True)
+    return [line.rsplit("|", 1)[-1].strip() for line in process.stderr.splitlines() if line.startswith("import time:")]
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=10, help="The number of runs per command.")
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=None,
+        help="The maximum time any command can take on top of the interpreter startup. Defaults to the per command budgets.",
+    )
+    args = parser.parse_args(argv)
+
+    baseline = _best_ms(["-c", "pass"], args.repeat)
+    print(f"{'command':>14} {'total (ms)':>11} {'overhead (ms)':>14} {'budget (ms)':>12}  heavy modules")
+    print(f"{'python':>14} {baseline:>11.1f} {0:>14.1f} {'-':>12}")
+
+    over_budget = False
+    for name, (command, budget) in _COMMANDS.items():
+        budget = args.budget_ms if args.budget_ms is not None else budget
+        total = _best_ms(command, args.repeat)
+        heavy = sorted(set(imported_modules(command)) & set(HEAVY_MODULES))
+        over_budget |= total - baseline > budget
+        print(f"{name:>14} {total:>11.1f} {total - baseline:>14.1f} {budget:>12.0f}  {', '.join(heavy) or '-'}")
+
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,182 @@
+#! /usr/bin/python3
+
+# bench_suite.py
+#
+# Project name: power nugget
+# Author: Hugo Juhel
+#
+# description:
+"""
+A regression suite : time the opening of the template, the rendering of the tasks and a whole run, and measure their peak memory, on
+synthetic projects of several sizes. Each case is run in a fresh process, for it's peak RSS to be it's own.
+
+The results are compared to baselines : the suite exits with an error if a case is slower, or uses more memory, than it's baseline by more
+than the thresholds. The baselines are machine specific, they have to be recorded on the machine the suite is run on.
+
+    python -m benchmarks.bench_suite --save-baseline
+    python -m benchmarks.bench_suite --sizes small medium --time-threshold 0.2
+"""
+
+#############################################################################
+#                                 Packages                                  #
+#############################################################################
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks.synthetic import TemplateSpec, synthetic_project
+
+#############################################################################
+#                                  Script                                   #
+#############################################################################
+
+_BASELINES = Path(__file__).parent / "baselines.json"
+
+# The size of the projects : the template, the number of dashboards and the number of items of the looping task
+SIZES: Dict[str, Tuple[TemplateSpec, int, int]] = {
+    "small": (TemplateSpec(), 10, 5),
+    "medium": (TemplateSpec(pages=20, visuals=30, tables=50, measures=20, images=20, data_model_mb=10), 1000, 10),
+    "large": (TemplateSpec(pages=50, visuals=50, tables=200, measures=50, images=50, data_model_mb=50), 10000, 20),
+}
+
+Result = Dict[str, float]
+
+
+def _open(project: Path):
+    from powernugget.dashboard.pbit import PowerBIOpener
+
+    with PowerBIOpener(project / "dashboard_template.pbit"):
+        pass
+
+
+def _render(project: Path):
+    from powernugget.nuggetizer import Nuggetizer
+    from powernugget.tasks_generator import TaskGenerator
+
+    nuggetizer = Nuggetizer(path=project)
+    inventory, plan, vars_ = nuggetizer._compile()
+    for name, data in inventory:
+        for _ in TaskGenerator(plan, **nuggetizer._magics(vars_, name, data)):
+            pass
+
+
+def _execute(project: Path):
+    from powernugget.nuggetizer import Nuggetizer
+
+    Nuggetizer(path=project).execute()
+
+
+CASES: Dict[str, Callable[[Path], None]] = {"open": _open, "render": _render, "execute": _execute}
+
+
+def _peak_rss_mb() -> float:
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10  # Bytes on macOS, kilobytes elsewhere
+
+
+def run_case(case: str, project: Path) -> Result:
+    """
+    Run a case in the current process
+    """
+
+    start = time.perf_counter()
+    CASES[case](project)
+    return {"seconds": time.perf_counter() - start, "peak_rss_mb": _peak_rss_mb()}
+
+
+def measure(case: str, project: Path, repeat: int) -> Result:
+    """
+    Run a case `repeat` times, each time in a fresh process : the median time and the highest peak RSS
+    """
+
+    results = []
+    for _ in range(repeat):
+        process = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_suite", "--run-case", case, "--project", str(project)],
+            check=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        )
+        results.append(json.loads(process.stdout.splitlines()[-1]))
+
+    return {
+        "seconds": statistics.median(result["seconds"] for result in results),
+        "peak_rss_mb": max(result["peak_rss_mb"] for result in results),
+    }
+
+
+def compare(results: Dict[str, Result], baselines: Dict[str, Result], thresholds: Result) -> List[str]:
+    """
+    The regressions : the metrics exceeding their baseline by more than their threshold (a fraction of the baseline)
+    """
+
+    regressions = []
+    for key, result in results.items():
+        for metric, threshold in thresholds.items():
+            baseline = baselines.get(key, {}).get(metric)
+            if baseline is not None and result[metric] > baseline * (1 + threshold):
+                regressions.append(f"{key} {metric} : {result[metric]:.3f} > {baseline:.3f} (+{threshold:.0%})")
+
+    return regressions
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=["small", "medium"], help="The sizes of the projects.")
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES), help="The cases to run.")
+    parser.add_argument("--repeat", type=int, default=3, help="The number of runs per case.")
+    parser.add_argument("--baseline", type=Path, default=_BASELINES, help="The baselines file.")
+    parser.add_argument("--save-baseline", action="store_true", help="Record the results as the new baselines.")
+    parser.add_argument("--time-threshold", type=float, default=0.25, help="The tolerated slowdown, as a fraction of the baseline.")
+    parser.add_argument("--rss-threshold", type=float, default=0.10, help="The tolerated memory increase, as a fraction of the baseline.")
+    parser.add_argument("--run-case", choices=list(CASES), help=argparse.SUPPRESS)
+    parser.add_argument("--project", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    # Executed in the child process
+    if args.run_case:
+        print(json.dumps(run_case(args.run_case, args.project)))
+        return 0
+
+    results: Dict[str, Result] = {}
+    print(f"{'case':>18} {'time (s)':>10} {'peak RSS (MB)':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            spec, dashboards, loop_items = SIZES[size]
+            project = synthetic_project(Path(tmp) / size, spec, dashboards, loop_items)
+            for case in args.cases:
+                key = f"{case}[{size}]"
+                results[key] = measure(case, project, args.repeat)
+                print(f"{key:>18} {results[key]['seconds']:>10.3f} {results[key]['peak_rss_mb']:>14.1f}")
+
+    if args.save_baseline:
+        baselines = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+        args.baseline.write_text(json.dumps({**baselines, **results}, indent=2, sort_keys=True) + "\n")
+        print(f"Baselines written to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"No baselines found at {args.baseline} : record them with --save-baseline")
+        return 0
+
+    regressions = compare(
+        results, json.loads(args.baseline.read_text()), {"seconds": args.time_threshold, "peak_rss_mb": args.rss_threshold}
+    )
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,262 @@
+#! /usr/bin/python3
+
+# synthetic.py
+#
+# Project name: power nugget
+# Author: Hugo Juhel
+#
+# description:
+"""
+Generate synthetic projects of a configurable size : a .pbit template (pages, visuals, tables, measures, images and data model size),
+an inventory of dashboards and a tasks list with loops.
+
+    python -m benchmarks.synthetic ./project --dashboards 1000 --pages 20 --visuals 30 --data-model-mb 20
+"""
+
+#############################################################################
+#                                 Packages                                  #
+#############################################################################
+
+import argparse
+import json
+import struct
+import sys
+import zipfile
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List
+
+import yaml
+
+from powernugget.dashboard.codec import PBIT_ENCODING
+
+#############################################################################
+#                                  Script                                   #
+#############################################################################
+
+_REGISTERED_RESOURCES = "Report/StaticResources/RegisteredResources"
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="utf-8"?><Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="json" ContentType="" /><Override PartName="/Version" ContentType="" />'
+    '<Override PartName="/DataModelSchema" ContentType="" /><Override PartName="/Report/Layout" ContentType="" /></Types>'
+)
+
+_TASKS = [
+    {
+        "name": "Log the color remapping : {{ dashboard_name }}",
+        "nugget": "powernugget.builtins.Debug",
+        "params": {"msg": "Replacing {{ item['from'] }} with {{ item['to'] }}"},
+        "loop": "{{ dashboard_data['color_remapping'].values() | list }}",
+    },
+    {
+        "name": "Replace the images : {{ dashboard_name }}",
+        "nugget": "powernugget.builtins.ReplaceImage",
+        "params": {"source_name": "{{ item }}", "target_path": "{{ root_path }}/assets/logo.png"},
+        "loop": "{{ vars['images'] }}",
+        "when": "dashboard_data['school'] != ''",
+    },
+    {
+        "name": "Log the school : {{ dashboard_name }}",
+        "nugget": "powernugget.builtins.Debug",
+        "params": {"msg": "Rendered the dashboard of {{ dashboard_data['school'] }}"},
+    },
+]
+
+
+@dataclass(frozen=True)
+class TemplateSpec:
+    """
+    The size of a synthetic template
+    """
+
+    pages: int = 5
+    visuals: int = 10  # Per page
+    tables: int = 10
+    measures: int = 10  # Per table
+    images: int = 5
+    data_model_mb: float = 1.0  # The size of the decoded data model, padding included
+
+
+def png(width: int = 1, height: int = 1) -> bytes:
+    """
+    A valid, blank, PNG image
+    """
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    pixels = zlib.compress(b"".join(b"\x00" + b"\xff\xff\xff" * width for _ in range(height)))
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", pixels) + chunk(b"IEND", b"")
+
+
+def image_names(spec: TemplateSpec) -> List[str]:
+    return [f"image_{i}.png" for i in range(spec.images)]
+
+
+def _visual(page: int, visual: int) -> Dict[str, Any]:
+    position = {"x": 20.0 * (visual % 10), "y": 20.0 * (visual // 10), "z": visual, "width": 200.0, "height": 100.0}
+    config = {
+        "name": f"visual_{page}_{visual}",
+        "layouts": [{"id": 0, "position": {**position, "tabOrder": visual}}],
+        "singleVisual": {
+            "visualType": "card",
+            "projections": {"Values": [{"queryRef": f"table_{visual % 10}.measure_{visual % 10}"}]},
+            "vcObjects": {"title": [{"properties": {"text": {"expr": {"Literal": {"Value": f"'Visual {page}.{visual}'"}}}}}]},
+        },
+    }
+    return {**position, "config": json.dumps(config), "filters": "[]"}
+
+
+def layout(spec: TemplateSpec) -> Dict[str, Any]:
+    return {
+        "id": 0,
+        "filters": "[]",
+        "resourcePackages": [
+            {
+                "resourcePackage": {
+                    "name": "RegisteredResources",
+                    "type": 1,
+                    "items": [{"type": 100, "path": name, "name": name} for name in image_names(spec)],
+                    "disabled": False,
+                }
+            }
+        ],
+        "sections": [
+            {
+                "name": f"section_{page}",
+                "displayName": f"Page {page}",
+                "filters": "[]",
+                "ordinal": page,
+                "visualContainers": [_visual(page, visual) for visual in range(spec.visuals)],
+                "config": "{}",
+                "displayOption": 1,
+                "width": 1280.0,
+                "height": 720.0,
+            }
+            for page in range(spec.pages)
+        ],
+        "config": json.dumps({"version": "5.37", "themeCollection": {}}),
+        "layoutOptimization": 0,
+    }
+
+
+def data_model(spec: TemplateSpec) -> Dict[str, Any]:
+    tables = [
+        {
+            "name": f"table_{table}",
+            "columns": [{"name": f"column_{column}", "dataType": "string", "sourceColumn": f"column_{column}"} for column in range(5)],
+            "measures": [
+                {"name": f"measure_{measure}", "expression": f"SUM('table_{table}'[column_{measure % 5}])"}
+                for measure in range(spec.measures)
+            ],
+            "annotations": [],
+        }
+        for table in range(spec.tables)
+    ]
+    model = {"name": "synthetic", "compatibilityLevel": 1550, "model": {"culture": "en-US", "tables": tables, "relationships": []}}
+
+    # Pad the tables' annotations up to the requested size
+    missing = int(spec.data_model_mb * 1e6) - len(json.dumps(model))
+    if missing > 0 and tables:
+        padding = "x" * (missing // len(tables))
+        for table in tables:
+            table["annotations"].append({"name": "Padding", "value": padding})
+
+    return model
+
+
+def synthetic_template(path: Path, spec: TemplateSpec) -> Path:
+    """
+    Write a .pbit template of the given size
+    """
+
+    def encode(payload: Any) -> bytes:
+        return json.dumps(payload).encode(PBIT_ENCODING)
+
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("Version", "1.25".encode(PBIT_ENCODING))
+        archive.writestr("[Content_Types].xml", "\ufeff" + _CONTENT_TYPES)
+        archive.writestr("DataModelSchema", encode(data_model(spec)))
+        archive.writestr("Report/Layout", encode(layout(spec)))
+        archive.writestr("Settings", encode({"Version": 3}))
+        archive.writestr("Metadata", encode({"Version": 5}))
+        image = png(64, 64)
+        for name in image_names(spec):
+            archive.writestr(f"{_REGISTERED_RESOURCES}/{name}", image)
+
+    return path
+
+
+def synthetic_inventory(dashboards: int, loop_items: int = 5) -> Dict[str, Any]:
+    """
+    An inventory of `dashboards` dashboards, each with a few nested entries, the color remapping having `loop_items` entries
+    """
+
+    return {
+        "dashboards": {
+            f"dashboard_{i}": {
+                "school": f"School number {i}",
+                "logo": f"logos/{i}.png",
+                "color_remapping": {f"color_{j}": {"from": f"#{j:06x}", "to": f"#{i + j:06x}"} for j in range(loop_items)},
+                "filters": [{"table": "students", "column": "school_id", "values": [i, i + 1, i + 2]}],
+            }
+            for i in range(dashboards)
+        }
+    }
+
+
+def synthetic_tasks() -> List[Dict[str, Any]]:
+    """
+    A tasks list with loops : over the inventory's color remapping, and over the template's images
+    """
+
+    return [dict(task) for task in _TASKS]
+
+
+def synthetic_project(root: Path, spec: TemplateSpec, dashboards: int, loop_items: int = 5) -> Path:
+    """
+    Write a project : a template of the given size, an inventory of `dashboards` dashboards, the tasks and the vars
+    """
+
+    root.mkdir(parents=True, exist_ok=True)
+    (root / "assets").mkdir(exist_ok=True)
+    (root / "assets" / "logo.png").write_bytes(png(32, 32))
+
+    synthetic_template(root / "dashboard_template.pbit", spec)
+    (root / "inventory.yaml").write_text(yaml.safe_dump(synthetic_inventory(dashboards, loop_items)))
+    (root / "tasks.yaml").write_text(yaml.safe_dump(synthetic_tasks(), sort_keys=False))
+    (root / "vars.yaml").write_text(yaml.safe_dump({"images": image_names(spec)}))
+
+    return root
+
+
+def main(argv: List[str]) -> int:
+    defaults = TemplateSpec()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("root", type=Path, help="The folder to write the project to.")
+    parser.add_argument("--dashboards", type=int, default=10, help="The number of dashboards of the inventory.")
+    parser.add_argument("--loop-items", type=int, default=5, help="The number of items looped over by the color remapping task.")
+    for field in ("pages", "visuals", "tables", "measures", "images"):
+        parser.add_argument(f"--{field}", type=int, default=getattr(defaults, field))
+    parser.add_argument("--data-model-mb", type=float, default=defaults.data_model_mb)
+    args = parser.parse_args(argv)
+
+    spec = TemplateSpec(
+        pages=args.pages,
+        visuals=args.visuals,
+        tables=args.tables,
+        measures=args.measures,
+        images=args.images,
+        data_model_mb=args.data_model_mb,
+    )
+    synthetic_project(args.root, spec, args.dashboards, args.loop_items)
+    print(f"Project written to {args.root}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1 +1,16 @@
-from .nuggetizer import Nuggetizer
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .nuggetizer import Nuggetizer
+
+__all__ = ["Nuggetizer"]
+
+
+def __getattr__(name):
+    # The Nuggetizer pulls in pydantic, yaml and the builtins nuggets : it's only imported on first access, to keep the CLI startup fast
+    if name == "Nuggetizer":
+        from .nuggetizer import Nuggetizer
+
+        return Nuggetizer
+
+    raise AttributeError(f"module 'powernugget' has no attribute '{name}'")
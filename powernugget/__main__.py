@@ -0,0 +1,3 @@
+from powernugget.cli import main
+
+main()
@@ -1,2 +1,3 @@
 from .debug import Debug
 from .replace_image import ReplaceImage
+from .replace_images import ReplaceImages
@@ -14,7 +14,7 @@ The Debug nugget echo a message to the standard output
 #                                 Packages                                  #
 #############################################################################
 
-from powernugget.builtins.nugget import Nugget
+from powernugget.builtins.nugget import Footprint, Nugget
 from powernugget.dashboard import Dashboard
 from powernugget.logger import MixinLogable
 
@@ -34,6 +34,9 @@ class Debug(Nugget, MixinLogable):
         super().__init__(logger_name=Debug.nugget_name, dashboard=dashboard)
         self._msg = msg
 
+    def footprint(self) -> Footprint:
+        return Footprint()
+
     def run(self):
         """
         Print the message
@@ -0,0 +1,153 @@
+#! /usr/bin/python3
+
+# images.py
+#
+# Project name: power nugget
+# Author: Hugo Juhel
+#
+# description:
+"""
+Helpers shared by the images nuggets : a content-addressed store of the source images, and the sniffing of the images' format.
+The store is process-wide : an image replaced in many dashboards is only read once per process, as long as it's among the most recently used
+images fitting in the store's budget.
+"""
+
+#############################################################################
+#                                 Packages                                  #
+#############################################################################
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+#############################################################################
+#                                  Script                                   #
+#############################################################################
+
+# The number of leading bytes needed to sniff an image format
+SNIFF_SIZE = 16
+
+# The default budget of the store : the least recently used images are evicted beyond it
+STORE_MAX_BYTES = 64 * 2**20
+
+# Magic numbers of the image formats PowerBI accepts as static resources
+_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"\xff\xd8\xff", "jpeg"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+    (b"BM", "bmp"),
+    (b"\x00\x00\x01\x00", "ico"),
+    (b"II*\x00", "tiff"),
+    (b"MM\x00*", "tiff"),
+)
+
+
+def sniff_format(head: bytes) -> Optional[str]:
+    """
+    Guess the format of an image from it's first bytes. Return None for an unknown format.
+    """
+
+    for signature, format_ in _SIGNATURES:
+        if head.startswith(signature):
+            return format_
+
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+
+    if head.lstrip()[:5] in (b"<?xml", b"<svg ", b"<svg>"):
+        return "svg"
+
+    return None
+
+
+@dataclass(frozen=True)
+class Blob:
+    """
+    The content of a source image
+    """
+
+    digest: str
+    content: bytes
+
+    @property
+    def format(self) -> Optional[str]:
+        return sniff_format(self.content[:SNIFF_SIZE])
+
+
+class BlobStore:
+    """
+    A content-addressed store of the source files.
+    Files are identified by their path, size and modification time, and their contents deduplicated by hash.
+    The store is bounded : once the contents exceed `max_bytes`, the least recently used ones are evicted.
+    """
+
+    def __init__(self, max_bytes: int = STORE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._digests: Dict[Tuple[str, int, int], str] = {}
+        self._keys: Dict[str, Set[Tuple[str, int, int]]] = {}
+        self._blobs: "OrderedDict[str, Blob]" = OrderedDict()
+        self.size = 0
+        self.bytes_read = 0
+        self.bytes_reused = 0
+
+    def get(self, path: Path) -> Tuple[Blob, bool]:
+        """
+        Retrieve the content of a file, reading it only if it's not in the store.
+        Return the blob, and whether it was served from the store.
+        """
+
+        stat = os.stat(path)
+        key = (str(path), stat.st_size, stat.st_mtime_ns)
+
+        with self._lock:
+            digest = self._digests.get(key)
+            if digest is not None:
+                blob = self._blobs[digest]
+                self._blobs.move_to_end(digest)
+                self.bytes_reused += len(blob.content)
+                return blob, True
+
+        content = Path(path).read_bytes()
+        digest = hashlib.sha256(content).hexdigest()
+
+        with self._lock:
+            self.bytes_read += len(content)
+            blob = self._blobs.get(digest) or Blob(digest=digest, content=content)
+            if len(content) <= self.max_bytes:
+                if digest not in self._blobs:
+                    self._blobs[digest] = blob
+                    self.size += len(content)
+                self._blobs.move_to_end(digest)
+                self._digests[key] = digest
+                self._keys.setdefault(digest, set()).add(key)
+                self._evict()
+
+        return blob, False
+
+    def _evict(self):
+        """
+        Evict the least recently used contents, until the store fits in it's budget
+        """
+
+        while self.size > self.max_bytes:
+            digest, blob = self._blobs.popitem(last=False)
+            self.size -= len(blob.content)
+            for key in self._keys.pop(digest, ()):
+                del self._digests[key]
+
+    def clear(self):
+        with self._lock:
+            self._digests.clear()
+            self._keys.clear()
+            self._blobs.clear()
+            self.size = self.bytes_read = self.bytes_reused = 0
+
+
+# The store shared by the nuggets of the process
+STORE = BlobStore()
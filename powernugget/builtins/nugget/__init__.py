@@ -1,2 +1,3 @@
-from .models import NuggetExecutionStatus, NuggetResult
+from .models import Deferred, NuggetExecutionStatus, NuggetResult
+from .footprint import Footprint
 from .nugget import Nugget
@@ -0,0 +1,69 @@
+#! /usr/bin/python3
+
+# footprint.py
+#
+# Project name: power nugget
+# Author: Hugo Juhel
+#
+# description:
+"""
+The parts of the dashboard a nugget reads and writes.
+Parts are "/" separated paths, a part covering all it's sub-parts :
+
+    layout/pages/<page name>
+    data_model/tables/<table name>
+    members/<member name>           (ie : members/Report/StaticResources/RegisteredResources/logo.png)
+    *                               (the whole dashboard)
+
+Two nuggets whose footprints do not conflict can be executed concurrently against the same dashboard.
+"""
+
+#############################################################################
+#                                 Packages                                  #
+#############################################################################
+
+from dataclasses import dataclass
+from typing import FrozenSet, Iterable
+
+#############################################################################
+#                                  Script                                   #
+#############################################################################
+
+EVERYTHING = "*"
+
+
+def _overlaps(a: str, b: str) -> bool:
+    """
+    Check if two parts overlap : if they are the same, or if one covers the other
+    """
+
+    if a == EVERYTHING or b == EVERYTHING or a == b:
+        return True
+    return a.startswith(b + "/") or b.startswith(a + "/")
+
+
+def _any_overlaps(parts: Iterable[str], others: Iterable[str]) -> bool:
+    return any(_overlaps(a, b) for a in parts for b in others)
+
+
+@dataclass(frozen=True)
+class Footprint:
+    """
+    The parts of the dashboard a nugget reads and writes
+    """
+
+    reads: FrozenSet[str] = frozenset()
+    writes: FrozenSet[str] = frozenset()
+
+    def conflicts(self, other: "Footprint") -> bool:
+        """
+        Check if two nuggets must be executed in order : if one writes a part the other one reads or writes
+        """
+
+        return (
+            _any_overlaps(self.writes, other.writes) or _any_overlaps(self.writes, other.reads) or _any_overlaps(self.reads, other.writes)
+        )
+
+
+# The footprint of a nugget that does not declare it's own : it conflicts with any other nugget
+WHOLE_DASHBOARD = Footprint(reads=frozenset({EVERYTHING}), writes=frozenset({EVERYTHING}))
@@ -15,10 +15,14 @@ Nugget execution'S result wrappers
 #############################################################################
 
 
-from typing import Optional, Any
+import threading
+from dataclasses import field
+from typing import Dict, Optional, Any, Callable
 from enum import Enum
 from pydantic.dataclasses import dataclass
 
+from powernugget.timings import Timing
+
 #############################################################################
 #                                  Script                                   #
 #############################################################################
@@ -32,6 +36,62 @@ class NuggetExecutionStatus(Enum):
     SUCCESS = 1
     FAILED = 2
     PASSED = 3
+    UP_TO_DATE = 4
+
+
+class Deferred:
+    """
+    A nugget output evaluated lazily.
+    A nugget can return a Deferred output : it's only evaluated if a later task refers to it (through `register`), and released once the
+    last task refering to it has been rendered.
+    """
+
+    def __init__(self, fn: Callable[[], Any]):
+        self._fn = fn
+        self._lock = threading.Lock()
+        self._evaluated = False
+        self._value: Any = None
+
+    @property
+    def evaluated(self) -> bool:
+        return self._evaluated
+
+    @property
+    def value(self) -> Any:
+        """
+        Evaluate the output, once
+        """
+
+        if not self._evaluated:
+            with self._lock:
+                if not self._evaluated:
+                    self._value = self._fn()
+                    self._evaluated = True
+
+        return self._value
+
+    def release(self):
+        """
+        Drop the evaluated output : it would be evaluated again if accessed
+        """
+
+        with self._lock:
+            self._value = None
+            self._evaluated = False
+
+    def __getstate__(self):
+        """
+        A deferred output crossing a process boundary (ie : in the summary) is shipped as is : it's callable must be picklable
+        """
+
+        return {"_fn": self._fn, "_evaluated": self._evaluated, "_value": self._value}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"Deferred({self._value!r})" if self._evaluated else "Deferred(<not evaluated>)"
 
 
 @dataclass
@@ -42,3 +102,6 @@ class NuggetResult:
 
     status: NuggetExecutionStatus
     result: Optional[Any] = None  # type: ignore
+    # The name of the rendered task, and the time spent in each of it's phases (see `powernugget.timings`)
+    name: Optional[str] = None
+    timings: Dict[str, Timing] = field(default_factory=dict)
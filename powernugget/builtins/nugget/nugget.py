@@ -15,9 +15,13 @@ The Nugget interface that must be implemented by any nugget
 #############################################################################
 
 
+import asyncio
+import contextvars
 from abc import ABCMeta, abstractmethod, abstractproperty
-from typing import Any
+from pathlib import Path
+from typing import Any, List
 
+from powernugget.builtins.nugget.footprint import WHOLE_DASHBOARD, Footprint
 from powernugget.dashboard import Dashboard
 
 #############################################################################
@@ -57,3 +61,27 @@ class Nugget(metaclass=ABCMeta):
         """
 
         raise NotImplementedError("Must be implemented by the derived Nugget")
+
+    async def arun(self) -> Any:
+        """
+        Run the nugget asynchronously. Used by the "asyncio" backend.
+        By default, the synchronous `run` is offloaded to the event loop's executor : the nuggets waiting on I/O schould override it.
+        """
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, contextvars.copy_context().run, self.run)
+
+    def footprint(self) -> Footprint:
+        """
+        The parts of the dashboard the nugget reads and writes (see `powernugget.builtins.nugget.footprint`).
+        Nuggets with non-conflicting footprints can be executed concurrently. Defaults to the whole dashboard.
+        """
+
+        return WHOLE_DASHBOARD
+
+    def inputs(self) -> List[Path]:
+        """
+        The files read by the nugget. They are tracked by the build manifest, so that a dashboard is rebuilt whenever one of them changes.
+        """
+
+        return []
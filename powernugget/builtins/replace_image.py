@@ -15,8 +15,9 @@ The ChangeImage nugget replace a image in the dashboard
 #############################################################################
 
 from pathlib import Path
-from shutil import copyfile
-from powernugget.builtins.nugget import Nugget
+from typing import List
+from powernugget.builtins.images import STORE
+from powernugget.builtins.nugget import Footprint, Nugget
 from powernugget.dashboard import Dashboard
 from powernugget.logger import MixinLogable
 
@@ -24,6 +25,8 @@ from powernugget.logger import MixinLogable
 #                                  Script                                   #
 #############################################################################
 
+_REGISTERED_RESOURCES = "Report/StaticResources/RegisteredResources"
+
 
 class ReplaceImage(Nugget, MixinLogable):
     """
@@ -46,18 +49,26 @@ class ReplaceImage(Nugget, MixinLogable):
         self._source_name = source_name
         self._target_path = target_path
 
+    def footprint(self) -> Footprint:
+        return Footprint(writes=frozenset({f"members/{_REGISTERED_RESOURCES}/{self._source_name}"}))
+
+    def inputs(self) -> List[Path]:
+        return [Path(self._target_path).resolve().absolute()]
+
     def run(self):
         """
         Replace the image
         """
 
         # Build the two paths
-        destination_path = self._dashboard.path / "Report" / "StaticResources" / "RegisteredResources" / self._source_name
-        if not destination_path.exists:
-            raise ValueError(f'The source image "{destination_path}" does not exist in the dashboard template')
+        destination_member = f"{_REGISTERED_RESOURCES}/{self._source_name}"
+        if not self._dashboard.has_member(destination_member):
+            raise ValueError(f'The source image "{destination_member}" does not exist in the dashboard template')
 
         target_path = Path(self._target_path).resolve().absolute()
-        if not target_path.exists:
-            raise ValueError(f'The target image "{target_path}" does not exist in the dashboard template')
+        if not target_path.exists():
+            raise ValueError(f'The target image "{target_path}" does not exist')
 
-        copyfile(target_path, destination_path)
+        # The image is read once per process, and inserted into the dashboard's archive when it's written
+        blob, _ = STORE.get(target_path)
+        self._dashboard.replace_member(destination_member, blob.content)
@@ -0,0 +1,94 @@
+#! /usr/bin/python3
+
+# replace_images.py
+#
+# Project name: power nugget
+# Author: Hugo Juhel
+#
+# description:
+"""
+The ReplaceImages nugget replace several images of the dashboard at once
+"""
+
+#############################################################################
+#                                 Packages                                  #
+#############################################################################
+
+from pathlib import Path
+from typing import Any, Dict, List
+from powernugget.builtins.images import SNIFF_SIZE, STORE, sniff_format
+from powernugget.builtins.nugget import Footprint, Nugget
+from powernugget.builtins.replace_image import _REGISTERED_RESOURCES
+from powernugget.dashboard import Dashboard
+from powernugget.logger import MixinLogable
+
+#############################################################################
+#                                  Script                                   #
+#############################################################################
+
+
+class ReplaceImages(Nugget, MixinLogable):
+    """
+    The ReplaceImages nugget replace several images in the dashboard.
+    Each source image is read once per process, whatever the number of dashboards it's used in.
+    """
+
+    nugget_name: str = "replace_images"
+
+    def __init__(self, *, dashboard: Dashboard, images: Dict[str, str], allow_format_change: bool = False):
+        """
+        Replace the images identified by the keys of `images` with the images located at the matching paths
+
+        Args:
+            dashboard (Dashboard): The dashboard object to apply the nugget to
+            images (Dict[str, str]): The source names, as defined in the template, mapped to the paths to the new ressources.
+            allow_format_change (bool, optional): Allow to replace an image by an image of an other format. Defaults to False.
+        """
+
+        super().__init__(logger_name=ReplaceImages.nugget_name, dashboard=dashboard)
+        self._images = images
+        self._allow_format_change = allow_format_change
+
+    def footprint(self) -> Footprint:
+        return Footprint(writes=frozenset(f"members/{_REGISTERED_RESOURCES}/{source_name}" for source_name in self._images))
+
+    def inputs(self) -> List[Path]:
+        return [Path(target_path).resolve().absolute() for target_path in self._images.values()]
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Replace the images, and report the number of bytes read from the disk and the number of bytes reused from previous reads
+        """
+
+        # Check every image before replacing any
+        replacements = {}
+        for source_name, target_path in self._images.items():
+            destination_member = f"{_REGISTERED_RESOURCES}/{source_name}"
+            if not self._dashboard.has_member(destination_member):
+                raise ValueError(f'The source image "{destination_member}" does not exist in the dashboard template')
+
+            target_path = Path(target_path).resolve().absolute()
+            if not target_path.exists():
+                raise ValueError(f'The target image "{target_path}" does not exist')
+
+            replacements[destination_member] = STORE.get(target_path)
+
+        report = {"replaced": len(replacements), "bytes_read": 0, "bytes_saved": 0}
+        for destination_member, (blob, reused) in replacements.items():
+            if not self._allow_format_change:
+                with self._dashboard.open_member(destination_member) as fsrc:
+                    source_format = sniff_format(fsrc.read(SNIFF_SIZE))
+                if source_format != blob.format:
+                    raise ValueError(
+                        f'The image "{destination_member}" is a {source_format or "unknown"} image, '
+                        f'it can\'t be replaced by a {blob.format or "unknown"} image. Set `allow_format_change` to force the replacement.'
+                    )
+
+            report["bytes_saved" if reused else "bytes_read"] += len(blob.content)
+
+        # The images are inserted into the dashboard's archive when it's written
+        for destination_member, (blob, _) in replacements.items():
+            self._dashboard.replace_member(destination_member, blob.content)
+
+        self.debug(f"Replaced {report['replaced']} images : {report['bytes_read']} bytes read, {report['bytes_saved']} bytes reused")
+        return report
@@ -0,0 +1,171 @@
+#! /usr/bin/python3
+
+# cache.py
+#
+# Project name: power nugget
+# Author: Hugo Juhel
+#
+# description:
+"""
+A size-bounded, on-disk cache of pickled values, shared accross runs.
+Entries are addressed by key (ie : the hash of the content they were derived from), and the least recently used ones are evicted
+once the cache exceeds it's size.
+"""
+
+#############################################################################
+#                                 Packages                                  #
+#############################################################################
+
+import hashlib
+import os
+import pickle
+import sys
+from pathlib import Path
+from typing import Any, List, Optional, Tuple, Union
+
+from powernugget.__version__ import version
+from powernugget.logger import get_module_logger
+
+#############################################################################
+#                                  Script                                   #
+#############################################################################
+
+DEFAULT_CACHE_SIZE = 512 * 1024 * 1024
+_HASH_BUFFER_SIZE = 1024 * 1024
+_SUFFIX = ".pickle"
+
+# The entries are only valid for the powernugget and python versions that wrote them
+_NAMESPACE = f"powernugget-{version}-py{sys.version_info[0]}.{sys.version_info[1]}"
+
+_LOGGER = get_module_logger("Cache")
+
+
+def file_digest(path: Path) -> str:
+    """
+    Hash the content of a file
+    """
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_BUFFER_SIZE), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """
+    An on-disk cache of pickled values. Writes are atomic, so the cache can be shared by concurrent runs.
+    The cache is a best effort : an unreadable entry is a miss, and a failed write is only logged.
+    """
+
+    def __init__(self, directory: Union[str, Path], max_size: int = DEFAULT_CACHE_SIZE):
+        """
+        Args:
+            directory (Union[str, Path]): The folder holding the entries. Created if needed.
+            max_size (int, optional): The size, in bytes, over which the least recently used entries are evicted. Defaults to 512 MB.
+        """
+
+        self.directory = Path(directory) / _NAMESPACE
+        self.max_size = max_size
+
+    def _path(self, key: str) -> Path:
+        return self.directory / (key + _SUFFIX)
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Retrieve an entry, or None if the key is not cached
+        """
+
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            _LOGGER.warning(f"Ignoring the corrupted cache entry '{path}'")
+            self.invalidate(key)
+            return None
+
+        # Mark the entry as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        return value
+
+    def put(self, key: str, value: Any):
+        """
+        Store an entry, then evict the least recently used entries if the cache grew over it's size
+        """
+
+        path = self._path(key)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except Exception as error:
+            _LOGGER.warning(f"Failed to write the cache entry '{path}' : {error}")
+            tmp.unlink(missing_ok=True)
+            return
+
+        self._evict()
+
+    def invalidate(self, key: str):
+        """
+        Drop an entry
+        """
+
+        self._path(key).unlink(missing_ok=True)
+
+    def clear(self):
+        """
+        Drop all the entries
+        """
+
+        for _, _, path in self._entries():
+            path.unlink(missing_ok=True)
+
+    def size(self) -> int:
+        """
+        The size, in bytes, of the entries
+        """
+
+        return sum(size for _, size, _ in self._entries())
+
+    def _entries(self) -> List[Tuple[float, int, Path]]:
+        """
+        List the entries as (last access, size, path)
+        """
+
+        entries = []
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name.endswith(_SUFFIX):
+                        try:
+                            stat = entry.stat()
+                        except OSError:
+                            continue
+                        entries.append((stat.st_mtime, stat.st_size, Path(entry.path)))
+        except FileNotFoundError:
+            pass
+
+        return entries
+
+    def _evict(self):
+        """
+        Evict the least recently used entries, until the cache fits in it's size
+        """
+
+        entries = sorted(self._entries())
+        size = sum(size for _, size, _ in entries)
+        for _, entry_size, path in entries:
+            if size <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            size -= entry_size
@@ -0,0 +1,254 @@
+#! /usr/bin/python3
+
+# cli.py
+#
+# Project name: power nugget
+# Author: Hugo Juhel
+#
+# description:
+"""
+The powernugget command line interface.
+
+The heavy dependencies (pydantic, yaml, jinja and the nuggets themselves) are only imported by the commands actually needing them :
+`--help` and `list-nuggets` don't import any of them, `validate` does not render any template nor import any nugget, and `plan` never opens the template.
+"""
+
+#############################################################################
+#                                 Packages                                  #
+#############################################################################
+
+import sys
+from pathlib import Path
+
+import click
+
+#############################################################################
+#                                  Script                                   #
+#############################################################################
+
+_BACKENDS = ("process", "thread", "asyncio")
+
+_PROJECT = click.argument("path", type=click.Path(exists=True, file_okay=False), default=".")
+
+
+class _Errors(click.Group):
+    """
+    Display the powernugget errors as plain messages rather than tracebacks
+    """
+
+    def invoke(self, ctx):
+        from powernugget.errors import ErrorPrototype
+
+        try:
+            return super().invoke(ctx)
+        except ErrorPrototype as error:
+            raise click.ClickException(str(error)) from error
+
+
+@click.group(cls=_Errors)
+def cli():
+    """
+    Programatical customization of PowerBI dashboards
+    """
+
+
+@cli.command()
+@_PROJECT
+@click.option("--workers", type=int, default=None, help="Render the dashboards concurrently, with a pool of WORKERS workers.")
+@click.option(
+    "--backend", type=click.Choice(_BACKENDS), default="process", show_default=True, help="The kind of pool used with --workers."
+)
+@click.option("--task-workers", type=int, default=None, help="Execute the independent tasks of a dashboard concurrently.")
+@click.option("--incremental", is_flag=True, help="Only render the dashboards whose inputs changed since the last build.")
+@click.option(
+    "--cache-dir", type=click.Path(file_okay=False), default=None, help="A folder where the parsed templates are cached accross runs."
+)
+@click.option(
+    "--report",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Write the run's timings to this file : a Prometheus textfile if it ends with .prom, json otherwise.",
+)
+@click.option(
+    "--trace",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Write the spans of the run to this file, in the Chrome trace-event format (to be loaded in Perfetto).",
+)
+@click.option(
+    "--results",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Write the results of each dashboard to this JSON lines file, as soon as the dashboard is rendered.",
+)
+@click.option("--shard", default=None, help="Only render the i-th of N stable partitions of the inventory, given as 'i/N'.")
+@click.option(
+    "--shard-weights",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="Balance the shards according to the dashboards' timings of a previous run, read from it's json report.",
+)
+def run(path, workers, backend, task_workers, incremental, cache_dir, report, trace, results, shard, shard_weights):
+    """
+    Render the dashboards of the project located at PATH
+    """
+
+    from powernugget.builtins.nugget import NuggetExecutionStatus
+    from powernugget.nuggetizer import Nuggetizer
+    from powernugget.sinks import JsonLinesSink, ResultSink
+
+    class Echo(ResultSink):
+        """
+        Print the statuses of each dashboard as soon as it's rendered, the results being forwarded to the results file (if any)
+        """
+
+        def __init__(self):
+            self.failed = 0
+            self._target = JsonLinesSink(results) if results else None
+
+        def write(self, dashboard_name, dashboard_results):
+            statuses = [result.status for result in dashboard_results]
+            self.failed += statuses.count(NuggetExecutionStatus.FAILED)
+            counts = ", ".join(f"{status.name.lower()}={statuses.count(status)}" for status in NuggetExecutionStatus if status in statuses)
+            click.echo(f"{dashboard_name}: {counts or 'no task'}")
+            if self._target is not None:
+                self._target.write(dashboard_name, dashboard_results)
+
+        def close(self):
+            if self._target is not None:
+                self._target.close()
+
+    echo = Echo()
+    nuggetizer = Nuggetizer(path=path, cache_dir=cache_dir)
+    nuggetizer.execute(
+        workers=workers,
+        backend=backend,
+        incremental=incremental,
+        task_workers=task_workers,
+        report=report,
+        trace=trace,
+        sink=echo,
+        shard=shard,
+        shard_weights=shard_weights,
+    )
+
+    if echo.failed:
+        sys.exit(1)
+
+
+@cli.command()
+@_PROJECT
+@click.option(
+    "--cache-dir", type=click.Path(file_okay=False), default=None, help="A folder where the validated files are cached accross runs."
+)
+def validate(path, cache_dir):
+    """
+    Check the inventory, the tasks and the nuggets of the project located at PATH, without rendering anything
+    """
+
+    from powernugget.cache import DiskCache
+    from powernugget.descriptions import _default_inventory, _deserialize_yaml, _deserialize_yaml_as, inventory_source
+    from powernugget.descriptions.models import Tasks_list
+    from powernugget.registry import NuggetRegistry
+    from powernugget.tasks_plan import constant_nuggets
+
+    path = Path(path)
+    cache = DiskCache(cache_dir) if cache_dir else None
+    dashboards = sum(1 for _ in inventory_source(_default_inventory(path), cache))
+    tasks_list: Tasks_list = _deserialize_yaml_as(path / "tasks.yaml", Tasks_list, cache)  # type: ignore
+    if (path / "vars.yaml").exists():
+        _deserialize_yaml(path / "vars.yaml")
+
+    # The nuggets are checked by name : none of them is imported
+    NuggetRegistry.of_project(path).validate(constant_nuggets(tasks_list), load=False)
+
+    click.echo(f"OK : {dashboards} dashboards, {len(tasks_list.tasks)} tasks")
+
+
+@cli.command()
+@_PROJECT
+@click.option("--dashboard", "dashboards", multiple=True, help="Only plan this dashboard. Can be repeated.")
+@click.option("--output", type=click.File("w"), default="-", help="Write the plan to this file. Defaults to the standard output.")
+def plan(path, dashboards, output):
+    """
+    Render the tasks of the project located at PATH as JSON, without executing them nor opening the template
+    """
+
+    import json
+
+    from powernugget.nuggetizer import Nuggetizer
+
+    tasks = Nuggetizer(path=path).plan(dashboards or None)
+    json.dump(tasks, output, indent=2, ensure_ascii=False, default=str)
+    output.write("\n")
+
+
+@cli.command()
+@_PROJECT
+@click.option("--shards", type=click.IntRange(min=1), required=True, help="The number of shards of the run : N, for shards run as 'i/N'.")
+@click.option(
+    "--report",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Write the merged timings report to this file : a Prometheus textfile if it ends with .prom, json otherwise. "
+    "Defaults to PATH/powernugget-report.json.",
+)
+def merge(path, shards, report):
+    """
+    Merge the build manifests and the timings reports written by the shards of a run (see `run --shard`) into the folder located at PATH
+    """
+
+    from powernugget.sharding import merge as merge_shards
+
+    merged = merge_shards(Path(path), shards, Path(report) if report else None)
+    click.echo(f"Merged the shards : {len(merged.dashboards)} dashboards rendered in {merged.wall or 0.0:.1f}s")
+
+
+@cli.command(name="list-nuggets")
+@_PROJECT
+def list_nuggets(path):
+    """
+    List the nuggets available to the project located at PATH : builtins, custom and installed ones
+    """
+
+    from powernugget.registry import NuggetRegistry
+
+    for name, location in sorted(NuggetRegistry.of_project(Path(path)).names().items()):
+        click.echo(f"{name:<24} {location}")
+
+
+@cli.command(name="inspect-template")
+@click.argument("template", type=click.Path(exists=True, dir_okay=False))
+def inspect_template(template):
+    """
+    Describe the members, the tables and the pages of a .pbit TEMPLATE
+    """
+
+    from powernugget.dashboard import codec
+    from powernugget.dashboard.archive import TemplateArchive
+    from powernugget.dashboard.pbit import _DATA_MODEL, _LAYOUT
+
+    archive = TemplateArchive(Path(template))
+
+    click.echo("Members :")
+    for name in archive:
+        info = archive.info(name)
+        click.echo(f"  {info.file_size:>12} {info.compress_size:>12}  {name}")
+
+    data_model = codec.loads(archive.read(_DATA_MODEL))
+    click.echo("Tables :")
+    for table in data_model.get("model", {}).get("tables", []):
+        click.echo(f"  {table['name']}")
+
+    layout = codec.loads(archive.read(_LAYOUT))
+    click.echo("Pages :")
+    for section in layout.get("sections", []):
+        click.echo(f"  {section.get('displayName', section.get('name'))} ({len(section.get('visualContainers', []))} visuals)")
+
+
+def main():
+    cli(prog_name="powernugget")
+
+
+if __name__ == "__main__":
+    main()
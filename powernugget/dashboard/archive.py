@@ -0,0 +1,257 @@
+#! /usr/bin/python3
+
+# archive.py
+#
+# Project name: power nugget
+# Author: Hugo Juhel
+#
+# description:
+"""
+Zip level primitives to build the dashboards straight from the template archive.
+Unchanged members are stream-copied, still compressed, from the template : only the modified members are (re)compressed.
+Members are never extracted : they are read on demand, through handles streaming from the archive, or through memory-mapped views
+for the members stored without compression.
+"""
+
+#############################################################################
+#                                 Packages                                  #
+#############################################################################
+
+import mmap
+import os
+import shutil
+import struct
+import threading
+import time
+import zipfile
+from copy import copy
+from pathlib import Path
+from typing import BinaryIO, Callable, Collection, Dict, Iterator, List, Mapping, Optional, Union
+
+#############################################################################
+#                                  Script                                   #
+#############################################################################
+
+# A member's new content : either the raw bytes, the path to a file to be streamed into the archive, or a writer streaming the content itself
+Writer = Callable[[BinaryIO], None]
+Content = Union[bytes, Path, Writer]
+
+_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+_LOCAL_HEADER_SIGNATURE = b"PK\003\004"
+_DATA_DESCRIPTOR_FLAG = 0x08
+_COPY_BUFFER_SIZE = 1024 * 1024
+
+
+class TemplateArchive:
+    """
+    A read-only view over the template archive : the members' index is parsed once, the content is read on demand.
+    Only holds the path and the index, so it can be shipped to worker processes : the memory map is created lazily, per process, and released by
+    `close`.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with zipfile.ZipFile(self.path) as archive:
+            self._infos: Dict[str, zipfile.ZipInfo] = {info.filename: info for info in archive.infolist()}
+
+        self._offsets: Dict[str, int] = {}
+        self._mmap: Optional[mmap.mmap] = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        return {"path": self.path, "_infos": self._infos}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._offsets = {}
+        self._mmap = None
+        self._lock = threading.Lock()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._infos
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._infos)
+
+    def info(self, name: str) -> zipfile.ZipInfo:
+        return self._infos[name]
+
+    def open(self, name: str) -> BinaryIO:
+        """
+        Open a lazy handle over a member : the member is decompressed on the fly, as it's read.
+        The central directory is not parsed again : the handle is positioned from the index.
+        """
+
+        info = self._infos[name]
+        fsrc = open(self.path, "rb")
+        try:
+            fsrc.seek(self._member_offset(fsrc, name))
+            return zipfile.ZipExtFile(fsrc, "r", info, close_fileobj=True)  # type: ignore
+        except BaseException:
+            fsrc.close()
+            raise
+
+    def view(self, name: str) -> memoryview:
+        """
+        Retrieve the content of a member as a read-only buffer.
+        A member stored without compression (as the images usually are) is a zero-copy view over the memory-mapped archive.
+        """
+
+        info = self._infos[name]
+        if info.compress_type != zipfile.ZIP_STORED or info.file_size == 0:
+            return memoryview(self.read(name))
+
+        with self._lock:
+            if self._mmap is None:
+                with open(self.path, "rb") as fsrc:
+                    self._mmap = mmap.mmap(fsrc.fileno(), 0, access=mmap.ACCESS_READ)
+            offset = self._member_offset(self._mmap, name)  # type: ignore
+
+        return memoryview(self._mmap)[offset : offset + info.file_size]
+
+    def close(self):
+        """
+        Release the memory map of the archive, if any : the archive is not locked anymore (on Windows).
+        The map can't be unmapped while views over it are alive : it is then unmapped once the last view is released.
+        """
+
+        with self._lock:
+            mapped, self._mmap = self._mmap, None
+
+        if mapped is not None:
+            try:
+                mapped.close()
+            except BufferError:
+                pass
+
+    def read(self, name: str) -> bytes:
+        """
+        Read and decompress a member
+        """
+
+        with self.open(name) as fsrc:
+            return fsrc.read()
+
+    def _member_offset(self, fsrc: BinaryIO, name: str) -> int:
+        """
+        Locate the data of a member, memoized
+        """
+
+        try:
+            return self._offsets[name]
+        except KeyError:
+            pass
+
+        offset = self._offsets[name] = self._data_offset(fsrc, self._infos[name])
+        return offset
+
+    def _data_offset(self, fsrc: BinaryIO, info: zipfile.ZipInfo) -> int:
+        """
+        Locate the compressed data of a member, right after it's local header
+        """
+
+        fsrc.seek(info.header_offset)
+        header = _LOCAL_HEADER.unpack(fsrc.read(_LOCAL_HEADER.size))
+        if header[0] != _LOCAL_HEADER_SIGNATURE:
+            raise zipfile.BadZipFile(f"Bad local header for member '{info.filename}'")
+
+        file_name_length, extra_length = header[-2:]
+        return info.header_offset + _LOCAL_HEADER.size + file_name_length + extra_length
+
+    def copy_raw(self, fsrc: BinaryIO, name: str, dst: zipfile.ZipFile):
+        """
+        Copy a member into dst without decompressing and recompressing it.
+
+        Args:
+            fsrc (BinaryIO): An opened binary handle over the template archive
+            name (str): The name of the member to copy
+            dst (zipfile.ZipFile): The archive to copy the member to
+        """
+
+        info = self._infos[name]
+        offset = self._member_offset(fsrc, name)
+
+        # The sizes and the CRC are known upfront : the copied member does not need a data descriptor
+        zinfo = copy(info)
+        zinfo.flag_bits &= ~_DATA_DESCRIPTOR_FLAG
+        zinfo.header_offset = dst.fp.tell()  # type: ignore
+        zip64 = zinfo.file_size > zipfile.ZIP64_LIMIT or zinfo.compress_size > zipfile.ZIP64_LIMIT
+
+        dst._writecheck(zinfo)  # type: ignore
+        dst.fp.write(zinfo.FileHeader(zip64))  # type: ignore
+
+        fsrc.seek(offset)
+        remaining = zinfo.compress_size
+        while remaining:
+            chunk = fsrc.read(min(remaining, _COPY_BUFFER_SIZE))
+            if not chunk:
+                raise zipfile.BadZipFile(f"Truncated member '{name}'")
+            dst.fp.write(chunk)  # type: ignore
+            remaining -= len(chunk)
+
+        # Register the member, as ZipFile.write would do
+        dst.start_dir = dst.fp.tell()  # type: ignore
+        dst.filelist.append(zinfo)
+        dst.NameToInfo[zinfo.filename] = zinfo
+        dst._didModify = True  # type: ignore
+
+
+def _write_member(dst: zipfile.ZipFile, zinfo: zipfile.ZipInfo, content: Content):
+    """
+    Compress a new content into dst
+    """
+
+    if isinstance(content, (bytes, bytearray, memoryview)):
+        dst.writestr(zinfo, content)
+        return
+
+    if callable(content):
+        with dst.open(zinfo, "w") as fdst:
+            content(fdst)
+        return
+
+    with open(content, "rb") as fsrc, dst.open(zinfo, "w", force_zip64=os.path.getsize(content) > zipfile.ZIP64_LIMIT) as fdst:
+        shutil.copyfileobj(fsrc, fdst, _COPY_BUFFER_SIZE)
+
+
+def write_archive(template: TemplateArchive, trg: Path, replaced: Mapping[str, Content], excluded: Collection[str] = ()):
+    """
+    Build a new archive from the template : the replaced members are compressed, the others are copied as is.
+    The archive is written aside and moved to trg once complete.
+
+    Args:
+        template (TemplateArchive): The template archive
+        trg (Path): The path of the archive to write
+        replaced (Mapping[str, Content]): The content of the members to replace or to add
+        excluded (Collection[str], optional): The template members to drop
+    """
+
+    tmp = trg.with_name(trg.name + ".tmp")
+    added: List[str] = [name for name in replaced if name not in template]
+
+    try:
+        with open(template.path, "rb") as fsrc, zipfile.ZipFile(tmp, "w") as dst:
+            for name in template:
+                if name in excluded:
+                    continue
+
+                if name not in replaced:
+                    template.copy_raw(fsrc, name, dst)
+                    continue
+
+                # A replaced member keeps it's template's metadata
+                info = template.info(name)
+                zinfo = zipfile.ZipInfo(name, date_time=info.date_time)
+                zinfo.compress_type = info.compress_type
+                zinfo.external_attr = info.external_attr
+                _write_member(dst, zinfo, replaced[name])
+
+            for name in added:
+                zinfo = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+                zinfo.compress_type = zipfile.ZIP_DEFLATED
+                _write_member(dst, zinfo, replaced[name])
+
+        os.replace(tmp, trg)
+    finally:
+        if tmp.exists():
+            os.remove(tmp)
@@ -0,0 +1,120 @@
+#! /usr/bin/python3
+
+# codec.py
+#
+# Project name: power nugget
+# Author: Hugo Juhel
+#
+# description:
+"""
+The UTF-16-LE json codec of the PBIT members (DataModelSchema and Report/Layout).
+Decoding relies on orjson when it's installed, and falls back to the standard library.
+Encoding is incremental : the payload is written to the stream by chunks, without building the whole json string.
+"""
+
+#############################################################################
+#                                 Packages                                  #
+#############################################################################
+
+import json
+from typing import Any, BinaryIO, Iterator, List
+
+try:
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover
+    orjson = None
+
+#############################################################################
+#                                  Script                                   #
+#############################################################################
+
+PBIT_ENCODING = "utf-16-le"
+_BOM = "\ufeff"
+
+# Containers deeper than this level are encoded in one shot, by the C encoder of the standard library
+_STREAMING_DEPTH = 3
+
+# The encoded chunks are buffered up to this number of characters before being written
+_CHUNK_SIZE = 1024 * 1024
+
+# Encode the leaves exactly as json.dumps, with it's default options, would
+_encode = json.JSONEncoder().encode
+
+
+def loads(raw: bytes) -> Any:
+    """
+    Decode a json member from it's raw bytes
+    """
+
+    text = raw.decode(PBIT_ENCODING)
+    if text.startswith(_BOM):
+        text = text[1:]
+
+    # orjson is stricter than the standard library (ie : on integers over 64 bits) : it falls back on it
+    if orjson is not None:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            pass
+
+    return json.loads(text)
+
+
+def _encode_key(key: Any) -> str:
+    """
+    Encode a dict key, coercing the non-string keys as json.dumps does
+    """
+
+    if isinstance(key, str):
+        return _encode(key)
+    if isinstance(key, bool) or key is None:
+        return _encode(_encode(key))
+    return _encode(_encode(key) if isinstance(key, (int, float)) else str(key))
+
+
+def _iterencode(payload: Any, depth: int) -> Iterator[str]:
+    """
+    Encode the payload as a stream of json fragments.
+    The first levels of containers are walked, so that each fragment stays small, while the deeper ones are encoded by the C encoder.
+    """
+
+    if depth <= 0 or not isinstance(payload, (dict, list)) or not payload:
+        yield _encode(payload)
+        return
+
+    if isinstance(payload, dict):
+        yield "{"
+        for i, (key, value) in enumerate(payload.items()):
+            if i:
+                yield ", "
+            yield _encode_key(key)
+            yield ": "
+            yield from _iterencode(value, depth - 1)
+        yield "}"
+        return
+
+    yield "["
+    for i, value in enumerate(payload):
+        if i:
+            yield ", "
+        yield from _iterencode(value, depth - 1)
+    yield "]"
+
+
+def dump(payload: Any, fdst: BinaryIO):
+    """
+    Encode a payload into a binary stream (ie : a zip member opened for writing), chunk by chunk
+    """
+
+    buffer: List[str] = []
+    size = 0
+    for fragment in _iterencode(payload, _STREAMING_DEPTH):
+        buffer.append(fragment)
+        size += len(fragment)
+        if size >= _CHUNK_SIZE:
+            fdst.write("".join(buffer).encode(PBIT_ENCODING))
+            buffer, size = [], 0
+
+    if buffer:
+        fdst.write("".join(buffer).encode(PBIT_ENCODING))
+
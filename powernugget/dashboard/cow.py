@@ -0,0 +1,245 @@
+#! /usr/bin/python3
+
+# cow.py
+#
+# Project name: power nugget
+# Author: Hugo Juhel
+#
+# description:
+"""
+Copy-on-write views over the parsed template.
+The template's data model and layout are parsed once and shared by every dashboard. Each dashboard gets a view, shallow copying
+only the containers a nugget actually reads. Untouched subtrees are shared with the template, even once serialized.
+The views can be shared by nuggets running concurrently : the creation of the nested views is serialized.
+"""
+
+#############################################################################
+#                                 Packages                                  #
+#############################################################################
+
+import threading
+from collections.abc import ItemsView, ValuesView
+from typing import Any, Dict, Iterator, List, Union
+
+#############################################################################
+#                                  Script                                   #
+#############################################################################
+
+# Guards the wrapping of the nested containers, so that concurrent nuggets share the same nested views
+_LOCK = threading.Lock()
+
+
+class _Cow:
+    """
+    Base class of the copy-on-write views.
+
+    The views are genuine dicts and lists : they hold a shallow copy of their base, so that they can be used wherever a dict or a list is expected.
+    The nested containers are shared with the base, until they are read : they are then wrapped into views, stored in place of them.
+    A view is only considered mutated if it doesn't unwrap to the very items of it's base.
+    """
+
+    __slots__ = ()
+
+    _base: Union[Dict, List]
+
+    def _wrapped(self, key, value) -> Any:
+        """
+        Wrap a nested container read from the view, storing the nested view in place of it
+        """
+
+        if isinstance(value, _Cow) or not isinstance(value, (dict, list)):
+            return value
+
+        with _LOCK:
+            # The container might have been wrapped, or replaced, by an other thread
+            current = self._raw(key)
+            if current is value:
+                current = wrap(value)
+                self._store(key, current)
+
+        return current
+
+    def _raw(self, key) -> Any:
+        raise NotImplementedError
+
+    def _store(self, key, value):
+        raise NotImplementedError
+
+    @property
+    def dirty(self) -> bool:
+        """
+        Whether the view, or any of it's nested views, has been mutated
+        """
+
+        return self.unwrap() is not self._base
+
+    def unwrap(self) -> Union[Dict, List]:
+        """
+        Return the plain containers represented by the view. Untouched subtrees are returned as is, shared with the base.
+        """
+
+        raise NotImplementedError
+
+    def __reduce__(self):
+        return wrap, (self.unwrap(),)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.unwrap()!r})"
+
+
+class CowDict(_Cow, dict):
+    """
+    A copy-on-write view over a dict
+    """
+
+    __slots__ = ("_base",)
+
+    def __init__(self, base: Dict):
+        super().__init__(base)
+        self._base = base
+
+    def _raw(self, key) -> Any:
+        return dict.__getitem__(self, key)
+
+    def _store(self, key, value):
+        dict.__setitem__(self, key, value)
+
+    def unwrap(self) -> Dict:
+        out = {key: unwrap(value) for key, value in dict.items(self)}
+        base = self._base
+        if len(out) == len(base) and all(key is other and out[key] is base[other] for key, other in zip(out, base)):
+            return base
+        return out
+
+    def __getitem__(self, key) -> Any:
+        return self._wrapped(key, dict.__getitem__(self, key))
+
+    # Overriding the iterator prevents the interpreter from reading the raw items (ie: when unpacking the view)
+    def __iter__(self) -> Iterator:
+        return dict.__iter__(self)
+
+    def get(self, key, default=None) -> Any:
+        return self[key] if key in self else default
+
+    def setdefault(self, key, default=None) -> Any:
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def pop(self, key, *default) -> Any:
+        return wrap(dict.pop(self, key, *default))
+
+    def popitem(self) -> tuple:
+        key, value = dict.popitem(self)
+        return key, wrap(value)
+
+    def values(self) -> ValuesView:  # type: ignore
+        return ValuesView(self)
+
+    def items(self) -> ItemsView:  # type: ignore
+        return ItemsView(self)
+
+    def copy(self) -> Dict:
+        return dict(self.items())
+
+    def __or__(self, other) -> Dict:
+        if not isinstance(other, dict):
+            return NotImplemented
+        out = self.copy()
+        out.update(other)
+        return out
+
+    def __ror__(self, other) -> Dict:
+        if not isinstance(other, dict):
+            return NotImplemented
+        out = dict(other)
+        out.update(self.items())
+        return out
+
+
+class CowList(_Cow, list):
+    """
+    A copy-on-write view over a list
+    """
+
+    __slots__ = ("_base",)
+
+    def __init__(self, base: List):
+        super().__init__(base)
+        self._base = base
+
+    def _raw(self, key) -> Any:
+        return list.__getitem__(self, key)
+
+    def _store(self, key, value):
+        list.__setitem__(self, key, value)
+
+    def unwrap(self) -> List:
+        out = [unwrap(value) for value in list.__iter__(self)]
+        base = self._base
+        if len(out) == len(base) and all(value is other for value, other in zip(out, base)):
+            return base
+        return out
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        index = range(len(self))[index]
+        return self._wrapped(index, list.__getitem__(self, index))
+
+    def __iter__(self) -> Iterator:
+        index = 0
+        while index < len(self):
+            yield self[index]
+            index += 1
+
+    def __reversed__(self) -> Iterator:
+        for index in reversed(range(len(self))):
+            yield self[index]
+
+    def pop(self, index: int = -1) -> Any:
+        return wrap(list.pop(self, index))
+
+    def copy(self) -> List:
+        return list(self)
+
+    def __add__(self, other) -> List:
+        if not isinstance(other, list):
+            return NotImplemented
+        out = self.copy()
+        out.extend(other)
+        return out
+
+    def __radd__(self, other) -> List:
+        if not isinstance(other, list):
+            return NotImplemented
+        out = list(other)
+        out.extend(self)
+        return out
+
+    def __mul__(self, count: int) -> List:
+        return self.copy() * count
+
+    __rmul__ = __mul__
+
+
+def wrap(value: Any) -> Any:
+    """
+    Wrap a container into a copy-on-write view. Other values, and views, are returned as is.
+    """
+
+    if isinstance(value, _Cow):
+        return value
+    if isinstance(value, dict):
+        return CowDict(value)
+    if isinstance(value, list):
+        return CowList(value)
+    return value
+
+
+def unwrap(value: Any) -> Any:
+    """
+    Return the plain containers represented by a (possibly) copy-on-write value
+    """
+
+    return value.unwrap() if isinstance(value, _Cow) else value
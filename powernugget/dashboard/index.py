@@ -0,0 +1,183 @@
+#! /usr/bin/python3
+
+# index.py
+#
+# Project name: power nugget
+# Author: Hugo Juhel
+#
+# description:
+"""
+An index over the template's layout and data model : pages, visuals, tables, measures and columns are mapped to their location.
+The index is built once per template, and shared by all the dashboards.
+
+Selectors chain `kind:pattern` segments with "/", each segment being looked up among the children of the previous one's matches.
+Patterns are shell-style wildcards (fnmatch), exact names are looked up in O(1) :
+
+    page:Overview/visual:*
+    table:Sales/measure:*Revenue*
+    column:Date
+"""
+
+#############################################################################
+#                                 Packages                                  #
+#############################################################################
+
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+from typing import Any, DefaultDict, Iterable, List, Mapping, Optional, Tuple
+
+from powernugget.dashboard.layout import _decode
+
+#############################################################################
+#                                  Script                                   #
+#############################################################################
+
+KINDS = ("page", "visual", "table", "measure", "column")
+_WILDCARDS = ("*", "?", "[")
+
+# The parent kind of each kind
+_PARENTS = {"visual": "page", "measure": "table", "column": "table"}
+
+
+@dataclass(frozen=True)
+class Location:
+    """
+    The location of an object in the template : the member it belongs to and the path to it.
+    """
+
+    kind: str
+    name: str
+    root: str  # "layout" or "data_model"
+    path: Tuple[Any, ...]
+    parent: Optional["Location"] = None
+
+    @property
+    def key(self) -> Tuple[str, Tuple[Any, ...]]:
+        return self.root, self.path
+
+
+def _visual_title(config: Mapping[str, Any]) -> Optional[str]:
+    """
+    Extract the title of a visual from it's decoded config
+    """
+
+    try:
+        value = config["singleVisual"]["vcObjects"]["title"][0]["properties"]["text"]["expr"]["Literal"]["Value"]
+    except (KeyError, IndexError, TypeError):
+        return None
+
+    return value[1:-1] if isinstance(value, str) and len(value) > 1 and value[0] == value[-1] == "'" else value
+
+
+class DashboardIndex:
+    """
+    Map the names of the template's objects to their locations. Built lazily, on the first query.
+    """
+
+    def __init__(self, data_model: Mapping[str, Any], layout: Mapping[str, Any]):
+        self._data_model = data_model
+        self._layout = layout
+        self._lock = threading.Lock()
+        self._built = False
+
+        # kind -> name -> locations, and (parent location key, kind) -> name -> locations
+        self._by_kind: DefaultDict[str, DefaultDict[str, List[Location]]] = defaultdict(lambda: defaultdict(list))
+        self._by_parent: DefaultDict[Tuple, DefaultDict[str, List[Location]]] = defaultdict(lambda: defaultdict(list))
+
+    def __getstate__(self):
+        return {"_data_model": self._data_model, "_layout": self._layout}
+
+    def __setstate__(self, state):
+        self.__init__(state["_data_model"], state["_layout"])
+
+    def _add(self, location: Location, *names: Optional[str]):
+        for name in dict.fromkeys(n for n in names if n):
+            self._by_kind[location.kind][name].append(location)
+            if location.parent is not None:
+                self._by_parent[(location.parent.key, location.kind)][name].append(location)
+
+    def _build(self):
+        """
+        Walk the layout and the data model once
+        """
+
+        if self._built:
+            return
+
+        with self._lock:
+            if self._built:
+                return
+
+            for i, section in enumerate(self._layout.get("sections", [])):
+                page = Location("page", section.get("displayName") or section["name"], "layout", ("sections", i))
+                self._add(page, section["name"], section.get("displayName"))
+
+                for j, container in enumerate(section.get("visualContainers", [])):
+                    config = _decode(container["config"]) if isinstance(container.get("config"), str) else {}
+                    name = config.get("name") if isinstance(config, dict) else None
+                    title = _visual_title(config)
+                    visual = Location("visual", title or name or str(j), "layout", ("sections", i, "visualContainers", j), page)
+                    self._add(visual, name, title)
+
+            for i, table_ in enumerate(self._data_model.get("model", {}).get("tables", [])):
+                table = Location("table", table_["name"], "data_model", ("model", "tables", i))
+                self._add(table, table_["name"])
+
+                for kind, field in (("measure", "measures"), ("column", "columns")):
+                    for j, item in enumerate(table_.get(field, [])):
+                        self._add(Location(kind, item["name"], "data_model", ("model", "tables", i, field, j), table), item["name"])
+
+            self._built = True
+
+    def _match(self, candidates: Mapping[str, List[Location]], pattern: str) -> List[Location]:
+        if not any(wildcard in pattern for wildcard in _WILDCARDS):
+            return list(candidates.get(pattern, ()))
+        return [location for name, locations in candidates.items() if fnmatchcase(name, pattern) for location in locations]
+
+    def lookup(self, kind: str, name: str) -> List[Location]:
+        """
+        Retrieve the locations of the objects of a kind matching a name (or a pattern)
+        """
+
+        if kind not in KINDS:
+            raise ValueError(f"Unknown kind '{kind}'. Expected one of : {', '.join(KINDS)}")
+
+        self._build()
+        return _unique(self._match(self._by_kind[kind], name))
+
+    def select(self, selector: str) -> List[Location]:
+        """
+        Retrieve the locations of the objects matching a selector (ie : "table:Sales/measure:*Revenue*")
+        """
+
+        matches: Optional[List[Location]] = None
+        for segment in selector.strip("/").split("/"):
+            kind, _, pattern = segment.partition(":")
+            kind, pattern = kind.strip(), pattern.strip() or "*"
+
+            if matches is None:
+                matches = self.lookup(kind, pattern)
+                continue
+
+            if not matches:
+                return []
+
+            if _PARENTS.get(kind) not in {location.kind for location in matches}:
+                raise ValueError(f"Invalid selector '{selector}' : a '{kind}' can't be the child of the previous segment")
+
+            self._build()
+            matches = _unique(
+                location for parent in matches for location in self._match(self._by_parent.get((parent.key, kind), {}), pattern)
+            )
+
+        return matches or []
+
+
+def _unique(locations: Iterable[Location]) -> List[Location]:
+    """
+    Deduplicate the locations (an object can be indexed by several names), keeping the template order
+    """
+
+    return sorted({location.key: location for location in locations}.values(), key=lambda location: location.key)
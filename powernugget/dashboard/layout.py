@@ -0,0 +1,188 @@
+#! /usr/bin/python3
+
+# layout.py
+#
+# Project name: power nugget
+# Author: Hugo Juhel
+#
+# description:
+"""
+Lazy accessors over the report's pages and visuals.
+In the Report/Layout member, the pages' and visuals' `config`, `filters`, `query` and `dataTransforms` are json documents embedded as strings.
+The accessors only decode them on first access, and only re-encode the documents that were modified.
+"""
+
+#############################################################################
+#                                 Packages                                  #
+#############################################################################
+
+import json
+from functools import lru_cache
+from typing import Any, Dict, List, MutableMapping, Optional, Set
+
+from powernugget.dashboard.cow import _Cow, unwrap, wrap
+
+#############################################################################
+#                                  Script                                   #
+#############################################################################
+
+_EMBEDDED_CACHE_SIZE = 8192
+
+
+@lru_cache(maxsize=_EMBEDDED_CACHE_SIZE)
+def _decode(raw: str) -> Any:
+    """
+    Decode an embedded json document.
+    The decoded documents are cached by source and shared by the dashboards : they are only exposed through copy-on-write views.
+    """
+
+    return json.loads(raw)
+
+
+def _encode(document: Any) -> str:
+    """
+    Encode an embedded json document, the way PowerBI does
+    """
+
+    return json.dumps(document, separators=(",", ":"), ensure_ascii=False)
+
+
+class _Embedded:
+    """
+    A layout object holding embedded json documents
+    """
+
+    # The fields holding an embedded json document
+    EMBEDDED_FIELDS = ("config", "filters", "query", "dataTransforms")
+
+    def __init__(self, container: MutableMapping[str, Any]):
+        self.container = container
+        self._decoded: Dict[str, Any] = {}
+        self._dirty: Set[str] = set()
+
+    def __getitem__(self, field: str) -> Any:
+        """
+        Retrieve an embedded document, decoding it on first access. The returned document can be updated in place.
+        """
+
+        try:
+            return self._decoded[field]
+        except KeyError:
+            pass
+
+        if field not in self.EMBEDDED_FIELDS:
+            raise KeyError(field)
+
+        raw = self.container.get(field)
+        document = self._decoded[field] = wrap(_decode(raw)) if isinstance(raw, str) else None
+        return document
+
+    def __setitem__(self, field: str, document: Any):
+        """
+        Replace an embedded document
+        """
+
+        if field not in self.EMBEDDED_FIELDS:
+            raise KeyError(field)
+
+        self._decoded[field] = document
+        self._dirty.add(field)
+
+    def get(self, field: str, default: Any = None) -> Any:
+        document = self[field]
+        return default if document is None else document
+
+    def mark_dirty(self, field: Optional[str] = None):
+        """
+        Flag a document (or all the decoded documents) to be re-encoded, ie : after having mutated a document held outside the accessor
+        """
+
+        self._dirty.update((field,) if field else self._decoded)
+
+    def _dirty_fields(self) -> List[str]:
+        return [field for field, document in self._decoded.items() if field in self._dirty or (isinstance(document, _Cow) and document.dirty)]
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._dirty_fields())
+
+    def flush(self):
+        """
+        Re-encode the modified documents into the layout
+        """
+
+        for field in self._dirty_fields():
+            document = unwrap(self._decoded[field])
+            if document is None:
+                self.container.pop(field, None)
+            else:
+                self.container[field] = _encode(document)
+
+        self._dirty.clear()
+
+
+class Visual(_Embedded):
+    """
+    A visual container of a page
+    """
+
+    @property
+    def config(self) -> Any:
+        return self["config"]
+
+    @property
+    def filters(self) -> Any:
+        return self["filters"]
+
+    @property
+    def query(self) -> Any:
+        return self["query"]
+
+    @property
+    def name(self) -> Optional[str]:
+        """
+        The visual's identifier
+        """
+
+        return (self.config or {}).get("name")
+
+    @property
+    def visual_type(self) -> Optional[str]:
+        return ((self.config or {}).get("singleVisual") or {}).get("visualType")
+
+
+class Page(_Embedded):
+    """
+    A page (a section) of the report
+    """
+
+    def __init__(self, container: MutableMapping[str, Any]):
+        super().__init__(container)
+        self._visuals: Optional[List[Visual]] = None
+
+    @property
+    def config(self) -> Any:
+        return self["config"]
+
+    @property
+    def filters(self) -> Any:
+        return self["filters"]
+
+    @property
+    def name(self) -> str:
+        return self.container["name"]
+
+    @property
+    def display_name(self) -> str:
+        return self.container.get("displayName", self.name)
+
+    @property
+    def visuals(self) -> List[Visual]:
+        if self._visuals is None:
+            self._visuals = [Visual(container) for container in self.container.get("visualContainers", [])]
+        return self._visuals
+
+    def flush(self):
+        super().flush()
+        for visual in self._visuals or ():
+            visual.flush()
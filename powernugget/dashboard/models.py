@@ -14,37 +14,221 @@ A dashboard representation
 #                                 Packages                                  #
 #############################################################################
 
-from pathlib import Path
-from dataclasses import dataclass
-from typing import Dict, Any
-import json
 import shutil
+import tempfile
+import threading
+import weakref
+from io import BytesIO
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import BinaryIO, Collection, Dict, Any, Iterator, List, MutableMapping, Optional, Tuple, Union
+
+from powernugget.dashboard.archive import Content, TemplateArchive
+from powernugget.dashboard.cow import unwrap
+from powernugget.dashboard.index import DashboardIndex, Location
+from powernugget.dashboard.layout import Page, Visual
+from powernugget.timings import Timings
 
 #############################################################################
 #                                  Script                                   #
 #############################################################################
 
-_DATA_MODEL = "DataModelSchema"
-_LAYOUT = "Report/Layout"
-_PBIT_ENCODING = "UTF-16 LE"
-
-
-def _dump_json(trg, payload: Dict[str, Any]) -> None:
-    """
-    Load a json file and return the content as a dictionary
-    """
 
-    with open(trg, "rw", encoding=_PBIT_ENCODING) as f:
-        f.truncate()
-        json.dump(payload, f)
+def _stat(path: Path) -> Tuple[int, int]:
+    stat = path.stat()
+    return stat.st_size, stat.st_mtime_ns
 
 
 @dataclass
 class Dashboard:
     """
-    The Dashboard representation
+    The Dashboard representation.
+    The data model and the layout are usually copy-on-write views (see `powernugget.dashboard.cow`) over the template shared by every dashboard.
+    The other members of the template are read from the template archive, and only the replaced ones are written to the rendered dashboard.
+
+    `path` is the folder holding the dashboard's members. A dashboard built straight from the template archive has none : the members are only
+    unpacked to a temporary folder if a nugget accesses `path`, and the files modified there are written back to the rendered dashboard.
+    Prefer the `open_member` / `replace_member` API, which does not unpack anything.
     """
 
-    path: Path
-    data_model: Dict[str, Any]
-    layout: Dict[str, Any]
+    path: Optional[Path] = field(repr=False, compare=False)
+    data_model: MutableMapping[str, Any]
+    layout: MutableMapping[str, Any]
+    template: Optional[TemplateArchive] = None
+    replaced_members: Dict[str, Content] = field(default_factory=dict)
+    target_path: Optional[Path] = None
+    index: Optional[DashboardIndex] = field(default=None, repr=False, compare=False)
+    timings: Timings = field(default_factory=dict, repr=False, compare=False)
+    _pages: Optional[List[Page]] = field(default=None, init=False, repr=False, compare=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False, compare=False)
+    _unpacked: Optional[weakref.finalize] = field(default=None, init=False, repr=False, compare=False)
+    _unpacked_stats: Dict[str, Tuple[int, int]] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # Without a folder, the members are unpacked on the first access to `path` (see `__getattr__`)
+        if self.path is None:
+            del self.path
+
+    def __getattr__(self, name: str) -> Any:
+        if name != "path":
+            raise AttributeError(name)
+
+        with self._lock:
+            if "path" not in self.__dict__:
+                self.path = self._unpack()
+        return self.path
+
+    def _unpack(self) -> Path:
+        """
+        Unpack the members to a temporary folder, removed once the dashboard is written (or garbage collected)
+        """
+
+        folder = Path(tempfile.mkdtemp(prefix="powernugget-"))
+        self._unpacked = weakref.finalize(self, shutil.rmtree, folder, ignore_errors=True)
+
+        for name in dict.fromkeys([*(self.template or ()), *self.replaced_members]):
+            target = folder / name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            with self.open_member(name) as fsrc, open(target, "wb") as fdst:
+                shutil.copyfileobj(fsrc, fdst)
+            self._unpacked_stats[name] = _stat(target)
+
+        return folder
+
+    def fold(self, ignored: Collection[str] = ()) -> List[str]:
+        """
+        Replace the members whose files were modified, or added, in the unpacked folder (if any), and list the members whose files were deleted.
+        The `ignored` members are rendered from the dashboard's payloads, whatever their files.
+        """
+
+        if self._unpacked is None:
+            return []
+
+        folder: Path = self.path  # type: ignore
+        files = {path.relative_to(folder).as_posix(): path for path in folder.rglob("*") if path.is_file()}
+        for name, path in files.items():
+            if name not in ignored and self._unpacked_stats.get(name) != _stat(path):
+                self.replaced_members[name] = path
+
+        deleted = [name for name in self._unpacked_stats if name not in files and name not in ignored]
+        for name in deleted:
+            self.replaced_members.pop(name, None)
+
+        return deleted
+
+    def release(self):
+        """
+        Remove the unpacked folder, if any
+        """
+
+        if self._unpacked is not None:
+            self._unpacked()
+
+    @property
+    def pages(self) -> List[Page]:
+        """
+        The report's pages. Their embedded json documents (config, filters...) are decoded on first access.
+        """
+
+        if self._pages is None:
+            with self._lock:
+                if self._pages is None:
+                    self._pages = [Page(section) for section in self.layout.get("sections", [])]
+        return self._pages
+
+    def visuals(self) -> Iterator[Visual]:
+        """
+        Iterate over the visuals of every page
+        """
+
+        for page in self.pages:
+            yield from page.visuals
+
+    def _get_index(self) -> DashboardIndex:
+        """
+        The index is usually built once per template and shared. A standalone dashboard indexes itself.
+        """
+
+        if self.index is None:
+            self.index = DashboardIndex(unwrap(self.data_model), unwrap(self.layout))
+        return self.index
+
+    def resolve(self, location: Location) -> Any:
+        """
+        Retrieve the object at a location of the template : a Page, a Visual, or the data model's node of a table, a measure or a column.
+        Locations are template positions : they are not valid anymore once tables, pages or visuals have been added or removed.
+        """
+
+        if location.kind == "page":
+            return self.pages[location.path[1]]
+        if location.kind == "visual":
+            return self.pages[location.path[1]].visuals[location.path[3]]
+
+        node: Any = self.layout if location.root == "layout" else self.data_model
+        for key in location.path:
+            node = node[key]
+        return node
+
+    def lookup(self, kind: str, name: str) -> List[Any]:
+        """
+        Retrieve the objects of a kind ("page", "visual", "table", "measure" or "column") by name (ie : a page's display name, a visual's id or title)
+        """
+
+        return [self.resolve(location) for location in self._get_index().lookup(kind, name)]
+
+    def select(self, selector: str) -> List[Any]:
+        """
+        Retrieve the objects matching a selector (ie : "table:Sales/measure:*Revenue*"). See `powernugget.dashboard.index`.
+        """
+
+        return [self.resolve(location) for location in self._get_index().select(selector)]
+
+    def flush(self):
+        """
+        Re-encode the modified embedded json documents into the layout. Called before the dashboard is written.
+        """
+
+        for page in self._pages or ():
+            page.flush()
+
+    def has_member(self, name: str) -> bool:
+        """
+        Check if the dashboard has a member (ie : "Report/StaticResources/RegisteredResources/logo.png")
+        """
+
+        return name in self.replaced_members or (self.template is not None and name in self.template)
+
+    def open_member(self, name: str) -> BinaryIO:
+        """
+        Open a lazy handle over the content of a member, from it's replacement if any or from the template
+        """
+
+        content = self.replaced_members.get(name)
+        if content is None:
+            if self.template is None or name not in self.template:
+                raise KeyError(name)
+            return self.template.open(name)
+
+        if isinstance(content, Path):
+            return open(content, "rb")
+        if callable(content):
+            buffer = BytesIO()
+            content(buffer)
+            buffer.seek(0)
+            return buffer
+        return BytesIO(content)
+
+    def read_member(self, name: str) -> bytes:
+        """
+        Read the content of a member, from it's replacement if any or from the template
+        """
+
+        with self.open_member(name) as fsrc:
+            return fsrc.read()
+
+    def replace_member(self, name: str, content: Union[Content, str]):
+        """
+        Replace (or add) a member. The content is either the raw bytes, the path of a file or a writer callable, only consumed when the dashboard is written.
+        """
+
+        self.replaced_members[name] = Path(content) if isinstance(content, str) else content
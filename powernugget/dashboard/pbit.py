@@ -15,16 +15,19 @@ A PowerBI Opener : to open and load the data from a powerbi template, implemente
 #                                 Packages                                  #
 #############################################################################
 
-import os
-from typing import Dict, Any, Callable, Tuple
+import zipfile
+from functools import partial
+from typing import BinaryIO, Dict, Any, Callable, Optional, Tuple
 from pathlib import Path
-from tempfile import TemporaryDirectory
-import shutil
-from copy import deepcopy
-import json
 
+from powernugget.cache import DiskCache, file_digest
 from powernugget.errors import Errors
 from powernugget.dashboard import Dashboard
+from powernugget.dashboard import codec
+from powernugget.dashboard.archive import TemplateArchive, write_archive
+from powernugget.dashboard.cow import CowDict, unwrap
+from powernugget.dashboard.index import DashboardIndex
+from powernugget.timings import ARCHIVE, SERIALIZE, TEMPLATE_OPEN, Timings, timed
 
 #############################################################################
 #                                  Script                                   #
@@ -32,26 +35,88 @@ from powernugget.dashboard import Dashboard
 
 _DATA_MODEL = "DataModelSchema"
 _LAYOUT = "Report/Layout"
-_PBIT_ENCODING = "utf-16-le"
+_SECURITY_BINDINGS = "SecurityBindings"
 _XML_ENCODING = "utf-8"
 
 
-def _load_json(src) -> Dict[str, Any]:
+def _target_path(destination_basepath: Path, dashboard_name: str) -> Path:
+    return destination_basepath / (dashboard_name + ".pbit")
+
+
+def _timed_dump(timings: Timings, payload: Any, fdst: BinaryIO):
     """
-    Load a json file and return the content as a dictionary
+    Encode a payload into an archive's member, recording the time spent as serialization
     """
 
-    with open(src, "r", encoding=_PBIT_ENCODING) as f:
-        return json.load(f)
+    with timed(timings, SERIALIZE):
+        codec.dump(payload, fdst)
 
 
-def _dump_json(trg, payload: Dict[str, Any]) -> None:
+class DashboardFactory:
     """
-    Save a payload as a json file
+    Generate updatable copies of the template.
+    The factory only holds the template's index and parsed payloads, so it can be shipped to worker processes.
     """
 
-    with open(trg, "w", encoding=_PBIT_ENCODING) as f:
-        json.dump(payload, f)
+    def __init__(self, *, template: TemplateArchive, destination_basepath: Path, data: Dict[str, Any], layout: Dict[str, Any]):
+        self._template = template
+        self._destination_basepath = destination_basepath
+        self._data = data
+        self._layout = layout
+        self._index = DashboardIndex(data, layout)
+
+    def __call__(self, dashboard_name: str) -> Tuple[Dashboard, Callable]:
+        """
+        Create a Dahsboard to be updated
+        """
+
+        target_path = _target_path(self._destination_basepath, dashboard_name)
+
+        # Create a dashboard with copy-on-write views over the template's data and layout
+        dashboard = Dashboard(
+            path=None,
+            data_model=CowDict(self._data),
+            layout=CowDict(self._layout),
+            template=self._template,
+            target_path=target_path,
+            index=self._index,
+        )
+
+        # Create a closure to be called for closing the dashboard.
+        # The time spent encoding the payloads and writing the archive is recorded in the dashboard's timings
+        def close():
+            timings = dashboard.timings
+            with timed(timings, SERIALIZE):
+                dashboard.flush()
+
+            # The members modified by the nuggets accessing the unpacked folder, if any, are written back
+            deleted = dashboard.fold(ignored=(_DATA_MODEL, _LAYOUT))
+
+            # Only the modified members are written : the others are copied from the template
+            replaced = dict(dashboard.replaced_members)
+            for name, payload, template in ((_DATA_MODEL, dashboard.data_model, self._data), (_LAYOUT, dashboard.layout, self._layout)):
+                payload = unwrap(payload)
+                if payload is not template:
+                    replaced[name] = partial(_timed_dump, timings, payload)
+
+            # The payloads are encoded while the archive is written : their encoding is not accounted as archiving
+            serialized = timings[SERIALIZE]
+            archived: Timings = {}
+            try:
+                with timed(archived, ARCHIVE):
+                    write_archive(self._template, target_path, replaced, excluded=(_SECURITY_BINDINGS, *deleted))
+            finally:
+                dashboard.release()
+            timings[ARCHIVE] = archived[ARCHIVE] - (timings[SERIALIZE] - serialized)
+
+        return dashboard, close
+
+    def close(self):
+        """
+        Release the template archive's resources held by the process
+        """
+
+        self._template.close()
 
 
 class PowerBIOpener:
@@ -59,9 +124,13 @@ class PowerBIOpener:
     A context manager to open a PowerBI dashboard
     """
 
-    def __init__(self, path: Path):
+    def __init__(self, path: Path, cache: Optional[DiskCache] = None):
         """
-        Unzip the Dashboard into a tempfile
+        Open the Dashboard template
+
+        Args:
+            path (Path): The path to the .pbit template
+            cache (DiskCache, optional): A cache of the parsed data model and layout, keyed by the template's content. Defaults to no cache.
         """
 
         extension = path.suffix
@@ -70,65 +139,62 @@ class PowerBIOpener:
 
         self._src_template_path = path
         self._destination_basepath = path.parent
-        self._src_path: Path
+        self._cache = cache
+        self._factory: Optional[DashboardFactory] = None
+        self.timings: Timings = {}
 
-    def __enter__(self):
+    def target_path(self, dashboard_name: str) -> Path:
         """
-        Deserialize the dashboard into a temp folder
+        The path the dashboard will be written to
         """
 
-        # All transformations schould happen in the temp folder
-        self._temp_dir = TemporaryDirectory()
-
-        # Unzip the dashboard into the temp folder
-        self._unzipped_template_path = Path(str(self._temp_dir.name)) / "src"
-        try:
-            shutil.unpack_archive(self._src_template_path, self._unzipped_template_path, format="zip")
-        except shutil.ReadError:
-            raise Errors.E041(path=self._src_template_path)  # type: ignore
-        except BaseException as error:
-            raise Errors.E041(path=self._src_template_path) from error  # type: ignore
-
-        # Remove the SecurityBinding file
-        os.remove(self._unzipped_template_path / "SecurityBindings")
+        return _target_path(self._destination_basepath, dashboard_name)
 
-        # Load the dashboard data, to be reused accross iteration
-        data = _load_json(self._unzipped_template_path / _DATA_MODEL)
-        layout = _load_json(self._unzipped_template_path / _LAYOUT)
-
-        # Create a closure to be called to regenerate a new dashboard
-        def _(dashboard_name: str) -> Tuple[Dashboard, Callable]:
-            """
-            Create a Dahsboard to be updated
-            """
+    def __enter__(self) -> DashboardFactory:
+        """
+        Index the template and parse it's data model and layout. The time spent is recorded in the opener's timings.
+        """
 
-            # The unpacked dashboard for this iteration is kept inside the top level temp dir to be GC / cleanup at the same time
-            tmp_dashboard_path = Path(self._temp_dir.name) / dashboard_name
+        with timed(self.timings, TEMPLATE_OPEN):
+            try:
+                template = TemplateArchive(self._src_template_path)
+            except (OSError, zipfile.BadZipFile) as error:
+                raise Errors.E042(path=self._src_template_path) from error  # type: ignore
 
-            # Copy the source dashboard into the temp folder
-            shutil.copytree(self._unzipped_template_path, tmp_dashboard_path)
+            # Load the dashboard data, to be reused accross iteration
+            data, layout = self._load(template)
 
-            # Create a dashboard with the data and layout
-            dashboard = Dashboard(path=tmp_dashboard_path, data_model=deepcopy(data), layout=deepcopy(layout))
+            # Return a factory to be called to regenerate a new dashboard
+            self._factory = DashboardFactory(template=template, destination_basepath=self._destination_basepath, data=data, layout=layout)
+            return self._factory
 
-            # Create a closure to be called for closing the dashboard
-            def close():
-                # Save the dashboard data
-                _dump_json(tmp_dashboard_path / _DATA_MODEL, dashboard.data_model)
-                _dump_json(tmp_dashboard_path / _LAYOUT, dashboard.layout)
+    def _load(self, template: TemplateArchive) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Parse the data model and the layout of the template, or retrieve them from the cache if the template was already parsed
+        """
 
-                # Zip the archive to the target path
-                out = Path(shutil.make_archive(str(self._destination_basepath / dashboard_name), "zip", tmp_dashboard_path))
+        key = None
+        if self._cache is not None:
+            key = "template-" + file_digest(self._src_template_path)
+            cached = self._cache.get(key)
+            if cached is not None:
+                return cached
 
-                # Replace the zip extension with the pbit extension
-                os.rename(out, out.parent / (out.stem + ".pbit"))
+        try:
+            payloads = codec.loads(template.read(_DATA_MODEL)), codec.loads(template.read(_LAYOUT))
+        except BaseException as error:
+            raise Errors.E041(path=self._src_template_path) from error  # type: ignore
 
-            return dashboard, close
+        if key is not None:
+            self._cache.put(key, payloads)  # type: ignore
 
-        return _
+        return payloads
 
     def __exit__(self, exc_type, exc_value, traceback):
-        self._temp_dir.cleanup()
+        if self._factory is not None:
+            self._factory.close()
+            self._factory = None
+
         if exc_type:
             return False
 
@@ -1,2 +1,3 @@
-from .yaml import _deserialize_yaml_as, _deserialize_yaml
+from .yaml import _deserialize_yaml_as, _deserialize_yaml, _default_inventory
 from .pyproject import _get_pyproject, _get_path_to_target
+from .sources import InventorySource, inventory_source
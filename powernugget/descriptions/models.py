@@ -15,10 +15,9 @@ Configurations related models
 #############################################################################
 
 from typing import Optional, Dict, Any, List, Union
-from pydantic import Field, BaseModel, Extra
+from pydantic import BaseModel, Extra
 from pydantic.dataclasses import dataclass
 
-
 #############################################################################
 #                                  Script                                   #
 #############################################################################
@@ -30,7 +29,7 @@ class Pyproject:
     Pyproject model configurations definition
     """
 
-    custom_nuggets_repo: Optional[str]
+    custom_nuggets_repo: Optional[str] = None
 
 
 # Pydantic.dataclasses does not support the extra config class, so we need to use a BaseModel instead
@@ -58,8 +57,9 @@ class Task:
     loop: Optional[str] = None
     loop_key: Optional[str] = "item"
     when: Optional[Union[bool, str]] = None
-    register_out: Optional[str] = Field(None, alias="register")
+    register_out: Optional[str] = None
     # Register is actually a reserved keyword. I alias it to register_out to keep the code consistent with Ansible
+    # Pydantic's dataclasses ignore the fields aliases : the alias is resolved by Tasks_list.of
     on_error: Optional[str] = "raise"
 
 
@@ -73,4 +73,14 @@ class Tasks_list:
 
     @staticmethod
     def of(raw_str):
-        return Tasks_list(tasks=raw_str)
+        return Tasks_list(tasks=[_alias_register(task) for task in raw_str])
+
+
+def _alias_register(task: Any) -> Any:
+    """
+    Map the `register` key of a raw task to the `register_out` field
+    """
+
+    if isinstance(task, dict) and "register" in task:
+        return {("register_out" if key == "register" else key): value for key, value in task.items()}
+    return task
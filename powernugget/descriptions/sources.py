@@ -0,0 +1,222 @@
+#! /usr/bin/python3
+
+# sources.py
+#
+# Project name: power nugget
+# Author: Hugo Juhel
+#
+# description:
+"""
+Inventory sources : the dashboards of an inventory, yielded lazily as (dashboard_name, dashboard_data) pairs.
+
+A yaml, json or msgpack inventory is loaded and validated at once. The other sources are streamed, one dashboard at a time, so that an
+inventory of any size can be rendered with a bounded memory :
+    * a JSON lines file : one object per line, the dashboard's name being held by the `name` key ;
+    * a CSV file : one row per dashboard, the dashboard's name being held by the `name` column ;
+    * a SQLite database : one row of the `dashboards` table per dashboard, the dashboard's name being held by the `name` column ;
+    * a directory of yaml (or json) files : one file per dashboard, named after the dashboard.
+
+The columns of a CSV file or a SQLite table are flat : a `data` column holding a JSON object, if any, is merged into the dashboard's data.
+"""
+
+#############################################################################
+#                                 Packages                                  #
+#############################################################################
+
+import csv
+import json
+import sqlite3
+from abc import ABCMeta, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from powernugget.cache import DiskCache
+from powernugget.descriptions.models import Inventory
+from powernugget.descriptions.yaml import _deserialize_yaml, _deserialize_yaml_as
+from powernugget.errors import Errors
+
+#############################################################################
+#                                  Script                                   #
+#############################################################################
+
+Entry = Tuple[str, Dict[str, Any]]
+
+_NAME = "name"
+_DATA = "data"
+_SQLITE_SUFFIXES = (".sqlite", ".sqlite3", ".db")
+_FILE_SUFFIXES = (".yaml", ".yml", ".json")
+
+
+class InventorySource(metaclass=ABCMeta):
+    """
+    A source of dashboards. Iterating over the source yields the (dashboard_name, dashboard_data) pairs, in the source's order.
+    A source can be iterated several times.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    @abstractmethod
+    def __iter__(self) -> Iterator[Entry]:
+        """
+        Yield the dashboards of the source
+        """
+
+        raise NotImplementedError("Must be implemented by the derived InventorySource")
+
+    def _entry(self, name: Any, data: Any, location: Any) -> Entry:
+        """
+        Check an entry of the source
+        """
+
+        if not isinstance(name, str) or not name or not isinstance(data, dict):
+            raise Errors.E023(source=self.path, location=location)  # type: ignore
+
+        return name, data
+
+
+class FileInventory(InventorySource):
+    """
+    A yaml, json or msgpack inventory : the whole file is loaded and validated at once
+    """
+
+    def __init__(self, path: Path, cache: Optional[DiskCache] = None):
+        super().__init__(path)
+        self._cache = cache
+
+    def __iter__(self) -> Iterator[Entry]:
+        inventory: Inventory = _deserialize_yaml_as(self.path, Inventory, self._cache)  # type: ignore
+        return iter(inventory.dashboards.items())
+
+
+class JsonLinesInventory(InventorySource):
+    """
+    A JSON lines inventory : one dashboard per line
+    """
+
+    def __iter__(self) -> Iterator[Entry]:
+        try:
+            f = open(self.path, "r", encoding="utf-8")
+        except OSError as error:
+            raise Errors.E020(path=str(self.path)) from error  # type: ignore
+
+        with f:
+            for number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+
+                try:
+                    data = json.loads(line)
+                except ValueError as error:
+                    raise Errors.E023(source=self.path, location=f"line {number}") from error  # type: ignore
+
+                name = data.pop(_NAME, None) if isinstance(data, dict) else None
+                yield self._entry(name, data, f"line {number}")
+
+
+def _flat(row: Dict[str, Any]) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Split a flat row into the dashboard's name and data, the JSON object of the `data` column being merged into the data
+    """
+
+    data = dict(row)
+    name = data.pop(_NAME, None)
+    extra = data.pop(_DATA, None)
+    if extra:
+        extra = json.loads(extra)
+        if not isinstance(extra, dict):
+            raise ValueError(f"The `{_DATA}` column must hold a JSON object")
+        data.update(extra)
+
+    return name, data
+
+
+class CsvInventory(InventorySource):
+    """
+    A CSV inventory : one dashboard per row
+    """
+
+    def __iter__(self) -> Iterator[Entry]:
+        try:
+            f = open(self.path, "r", encoding="utf-8", newline="")
+        except OSError as error:
+            raise Errors.E020(path=str(self.path)) from error  # type: ignore
+
+        with f:
+            for number, row in enumerate(csv.DictReader(f), start=2):
+                try:
+                    name, data = _flat(row)
+                except ValueError as error:
+                    raise Errors.E023(source=self.path, location=f"line {number}") from error  # type: ignore
+
+                yield self._entry(name, data, f"line {number}")
+
+
+class SqliteInventory(InventorySource):
+    """
+    A SQLite inventory : one dashboard per row of a table
+    """
+
+    def __init__(self, path: Path, table: str = "dashboards"):
+        super().__init__(path)
+        self._table = table
+
+    def __iter__(self) -> Iterator[Entry]:
+        if not self.path.is_file():
+            raise Errors.E020(path=str(self.path))  # type: ignore
+
+        connection = sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True)
+        connection.row_factory = sqlite3.Row
+        try:
+            try:
+                rows = connection.execute(f'SELECT * FROM "{self._table}" ORDER BY rowid')
+            except sqlite3.Error as error:
+                raise Errors.E020(path=str(self.path)) from error  # type: ignore
+
+            # The rows are fetched lazily by the cursor
+            for number, row in enumerate(rows, start=1):
+                try:
+                    name, data = _flat({key: row[key] for key in row.keys()})
+                except ValueError as error:
+                    raise Errors.E023(source=self.path, location=f"row {number}") from error  # type: ignore
+
+                yield self._entry(name, data, f"row {number}")
+        finally:
+            connection.close()
+
+
+class DirectoryInventory(InventorySource):
+    """
+    A directory of yaml (or json) files : one dashboard per file, named after the file. The files are read in their names order.
+    """
+
+    def __iter__(self) -> Iterator[Entry]:
+        if not self.path.is_dir():
+            raise Errors.E020(path=str(self.path))  # type: ignore
+
+        for path in sorted(self.path.iterdir()):
+            if path.suffix.lower() in _FILE_SUFFIXES and path.is_file():
+                yield self._entry(path.stem, _deserialize_yaml(path), path.name)
+
+
+def inventory_source(path: Path, cache: Optional[DiskCache] = None) -> InventorySource:
+    """
+    Pick the source of an inventory from it's path : a directory, or a file according to it's suffix
+    """
+
+    path = Path(path)
+    suffix = path.suffix.lower()
+
+    if path.is_dir():
+        return DirectoryInventory(path)
+
+    if suffix == ".jsonl":
+        return JsonLinesInventory(path)
+
+    if suffix == ".csv":
+        return CsvInventory(path)
+
+    if suffix in _SQLITE_SUFFIXES:
+        return SqliteInventory(path)
+
+    return FileInventory(path, cache)
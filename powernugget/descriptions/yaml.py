@@ -7,19 +7,29 @@
 #
 # description:
 """
-Primitive for yaml deserialization against PowerNugget's models
+Primitive for yaml deserialization against PowerNugget's models.
+
+The yaml files are parsed by libyaml when it's available. JSON (and msgpack, if installed) files are accepted as faster alternatives, the format
+being picked from the file's suffix. The validated models can be cached on disk, keyed by the content of the file.
 """
 
 #############################################################################
 #                                 Packages                                  #
 #############################################################################
 
+import json
+from functools import lru_cache
 from pathlib import Path
-import yaml
-from typing import Union, Dict, Any
+from typing import Optional, Union, Dict, Any
 
 from pydantic import ValidationError
 
+try:
+    import msgpack  # type: ignore
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+from powernugget.cache import DiskCache, file_digest
 from powernugget.descriptions.models import Inventory, Tasks_list
 from powernugget.errors import Errors
 
@@ -29,44 +39,113 @@ from powernugget.errors import Errors
 
 Models = Union[Inventory, Tasks_list]
 
+# The inventory can be generated in a faster to parse format than yaml, or streamed (see `powernugget.descriptions.sources`) : the first existing
+# one is picked
+_INVENTORY_FILE_NAMES = (
+    "inventory.yaml",
+    "inventory.json",
+    "inventory.msgpack",
+    "inventory.jsonl",
+    "inventory.csv",
+    "inventory.sqlite",
+    "inventory",
+)
+
+
+def _default_inventory(base_path: Path) -> Path:
+    """
+    The inventory of a project : the first existing one among the supported formats, yaml being the default
+    """
+
+    for name in _INVENTORY_FILE_NAMES:
+        if (base_path / name).exists():
+            return base_path / name
+
+    return base_path / _INVENTORY_FILE_NAMES[0]
+
+
+@lru_cache(maxsize=None)
+def _loader() -> type:
+    """
+    The yaml loader. Yaml is only imported when a file is actually parsed, as the validated models are usually read from the cache.
+    """
+
+    import yaml
+
+    # The C loader is an order of magnitude faster than the pure python one
+    return getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def _parse(raw: bytes, suffix: str) -> Any:
+    """
+    Parse the content of a file according to it's format
+    """
+
+    if suffix == ".json":
+        return json.loads(raw)
+
+    if suffix == ".msgpack":
+        if msgpack is None:
+            raise ImportError("msgpack must be installed to load .msgpack files")
+        return msgpack.unpackb(raw)
+
+    import yaml
+
+    return yaml.load(raw, Loader=_loader())
+
 
 def _deserialize_yaml(path: Path) -> Dict[str, Any]:
     """
-    Load, render and parse a template into a dictionary.
+    Load and parse a yaml (or json, or msgpack) file into a dictionary.
     Args:
-        path (Path): the path to the ressource to render.
+        path (Path): the path to the ressource to parse.
     """
 
     # Load the raw template
     try:
-        with open(path) as f:
+        with open(path, "rb") as f:
             raw_template = f.read()
     except BaseException as error:
         raise Errors.E020(path=str(path)) from error  # type: ignore
 
-    # Parse the raw_template as yaml
+    # Parse the raw_template
     try:
-        parsed = yaml.safe_load(raw_template)
+        parsed = _parse(raw_template, Path(path).suffix.lower())
     except BaseException as error:
         raise Errors.E021() from error  # type: ignore
 
     return parsed
 
 
-def _deserialize_yaml_as(path: Path, model: Models) -> Models:
+def _deserialize_yaml_as(path: Path, model: Models, cache: Optional[DiskCache] = None) -> Models:
     """
-    Load, render and parse a template into a model.
+    Load, parse and validate a file into a model.
     Args:
-        path (Path): the path to the ressource to render.
+        path (Path): the path to the ressource to parse.
         model (Models): the model to unmarshall.
+        cache (DiskCache, optional): A cache of the validated models, keyed by the content of the file. Defaults to no cache.
     """
 
+    key = None
+    if cache is not None:
+        try:
+            key = f"model-{model.__name__}-{file_digest(path)}"  # type: ignore
+        except OSError as error:
+            raise Errors.E020(path=str(path)) from error  # type: ignore
+
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
     parsed = _deserialize_yaml(path)
 
     # Unmarshal the template
     try:
         parsed_model = model.of(parsed)  # type: ignore
     except (TypeError, ValidationError) as error:
-        raise Errors.E022(definition=parsed, model=type(Model)) from error  # type: ignore
+        raise Errors.E022(definition=parsed, model=model.__name__) from error  # type: ignore
+
+    if key is not None:
+        cache.put(key, parsed_model)  # type: ignore
 
     return parsed_model
@@ -18,6 +18,7 @@ Centralize errors for the powernugget package
 # System packages
 import sys
 import warnings
+from typing import Optional
 
 # Project related packages
 from .logger import get_module_logger
@@ -84,6 +85,41 @@ class ErrorPrototype(Exception):
     def __init__(self, **kwargs):
 
         super().__init__(self.msg.format(**kwargs))
+        self._kwargs = kwargs
+
+    def __reduce__(self):
+        """
+        Errors classes are generated on the fly by the factory : rebuild them by code when unpickled (ie: raised from a worker process).
+        The cause is carried along with it's formatted traceback, as tracebacks can't be pickled.
+        """
+
+        cause = self.__cause__
+        if cause is None:
+            return _rebuild_error, (type(self).__name__, self._kwargs)
+
+        import pickle
+        import traceback
+
+        formatted = "".join(traceback.format_exception(type(cause), cause, cause.__traceback__))
+        try:
+            pickle.dumps(cause)
+        except Exception:
+            cause = None
+
+        return _rebuild_error, (type(self).__name__, self._kwargs, cause, formatted)
+
+
+class RemoteTraceback(Exception):
+    """
+    The formatted traceback of an error raised in an other process
+    """
+
+    def __init__(self, formatted: str):
+        super().__init__(formatted)
+        self.formatted = formatted
+
+    def __str__(self):
+        return self.formatted
 
 
 class WarningPrototype(UserWarning):
@@ -112,16 +148,29 @@ class Errors(metaclass=ExceptionFactory):  # type: ignore
     E020 = "templating : failed to load the template at '{path}'."
     E021 = "templating : the loaded yaml is not valid."
     E022 = "templating : the following definition is not a valid '{model}' : \n{definition}."
+    E023 = "templating : the inventory '{source}' has an invalid dashboard at {location}. A dashboard must have a name and a mapping of data."
 
     # Nuggetizer related errors
     E030 = "nuggetizer: failed to import the '{fqn}'. Does the nugget exist in the builtins env ?"
     E031 = "nuggetizer: failed to execute the '{nugget_name}' nugget for dashboard : {dashboard}."
+    E032 = "nuggetizer: unsupported execution backend '{backend}'. Expected one of : {expected}."
+    E033 = "nuggetizer: the number of workers must be a strictly positive integer. Got '{workers}'."
+    E034 = "nuggetizer: the concurrent execution of the tasks is not supported by the asyncio backend."
+    E035 = "nuggetizer: '{fqn}' is not a nugget. Nuggets must derive from the `Nugget` class."
+    E036 = "nuggetizer: the tasks list refers to unknown nuggets : {names}."
+    E037 = "nuggetizer: the inventory has no dashboard named : {names}."
+    E038 = "nuggetizer: the inventory has several dashboards named '{name}'."
 
     # Dashboard content errors
     E040 = "powerOpener : the dashboard template schould be a '.pbit' file. Got '{extension}'"
-    E041 = "powerOpener : failed to unpack the template '{path}' into a temporary folder."
+    E041 = "powerOpener : failed to load the data model and the layout of the template '{path}'."
     E042 = "powerOpener : the template '{path}' does not seems to exist, or is not a valid zip file."
 
+    # Sharding related errors
+    E050 = "sharding : invalid shard '{shard}'. Expected 'i/N', with 1 <= i <= N."
+    E051 = "sharding : failed to read the dashboards' timings from the report '{path}'. A json timings report is expected."
+    E052 = "sharding : can't merge the shards written to '{path}'. Missing shards : {missing}."
+
 
 class Warnings(UserWarning):
 
@@ -131,6 +180,24 @@ class Warnings(UserWarning):
     W010 = "bar"
 
 
+def _rebuild_error(code: str, kwargs, cause: Optional[BaseException] = None, formatted: Optional[str] = None) -> ErrorPrototype:
+    """
+    Rebuild an error from it's code and formatting arguments, chaining it to it's cause. The remote traceback is chained to the cause,
+    or directly to the error if the cause could not be pickled.
+    """
+
+    error = getattr(Errors, code)(**kwargs)
+    if formatted is not None:
+        remote = RemoteTraceback(formatted)
+        if cause is not None:
+            cause.__cause__ = remote
+            error.__cause__ = cause
+        else:
+            error.__cause__ = remote
+
+    return error
+
+
 def _custom_formatwarning(msg, *args, **kwargs) -> str:
     """
     Monkey patch the warning displayor to avoid printing the code longside the Warnings.
@@ -18,6 +18,9 @@ Retrieve the package level logger. Configure the handler
 import logging
 import os
 import sys
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Tuple
 
 #############################################################################
 #                                 helpers                                   #
@@ -26,6 +29,12 @@ import sys
 
 _LOGGERS = dict()
 
+# A log record buffered for a deferred emission : (logger name, level, message)
+LogRecord = Tuple[str, int, str]
+
+# When set, the records emitted through MixinLogable are buffered instead of being emitted
+_BUFFER: ContextVar[Optional[List[LogRecord]]] = ContextVar("powernugget_log_buffer", default=None)
+
 
 def get_module_logger(mod_name):
     """
@@ -47,20 +56,56 @@ def get_module_logger(mod_name):
     return logger
 
 
+@contextmanager
+def buffered_logs() -> Iterator[List[LogRecord]]:
+    """
+    Buffer the records emitted by the MixinLogable instances in the current context (thread, process or task).
+    Used to keep the logs of a dashboard grouped when several dashboards are rendered concurrently.
+    """
+
+    records: List[LogRecord] = []
+    token = _BUFFER.set(records)
+    try:
+        yield records
+    finally:
+        _BUFFER.reset(token)
+
+
+def flush_logs(records: List[LogRecord]):
+    """
+    Emit buffered records through their original loggers, or forward them to the enclosing buffer if the current context is buffered
+    """
+
+    buffer = _BUFFER.get()
+    if buffer is not None:
+        buffer.extend(records)
+        return
+
+    for name, level, msg in records:
+        get_module_logger(name).log(level, msg)
+
+
 class MixinLogable:
     def __init__(self, logger_name: str = "PowerNugget", *args, **kwargs):
         super().__init__(*args, **kwargs)
 
         self._logger = get_module_logger(logger_name)
 
+    def _log(self, level: int, msg):
+        buffer = _BUFFER.get()
+        if buffer is None:
+            self._logger.log(level, msg)
+        else:
+            buffer.append((self._logger.name, level, msg))
+
     def warn(self, msg):
-        self._logger.warn(msg)
+        self._log(logging.WARNING, msg)
 
     def info(self, msg):
-        self._logger.info(msg)
+        self._log(logging.INFO, msg)
 
     def debug(self, msg):
-        self._logger.debug(msg)
+        self._log(logging.DEBUG, msg)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,157 @@
+#! /usr/bin/python3
+
+# manifest.py
+#
+# Project name: power nugget
+# Author: Hugo Juhel
+#
+# description:
+"""
+The build manifest, written next to the rendered dashboards.
+For each dashboard, it records a hash of the inputs the dashboard was built from : the template, the tasks, the vars, the custom nuggets, the
+dashboard's inventory entry and every file read by the nuggets. A dashboard whose inputs did not change since the last build is up to date.
+A dashboard one task of which failed is not recorded, to be rebuilt by the next build.
+"""
+
+#############################################################################
+#                                 Packages                                  #
+#############################################################################
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from powernugget.__version__ import version
+from powernugget.cache import file_digest
+from powernugget.logger import get_module_logger
+
+#############################################################################
+#                                  Script                                   #
+#############################################################################
+
+MANIFEST_FILE_NAME = ".powernugget-manifest.json"
+_MANIFEST_VERSION = 1
+
+_LOGGER = get_module_logger("Manifest")
+
+
+def hash_payload(payload: Any) -> str:
+    """
+    Hash a json-able payload, independently of the keys order
+    """
+
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class BuildManifest:
+    """
+    Track the inputs of the rendered dashboards
+    """
+
+    def __init__(self, path: Path, seed: Optional[Path] = None):
+        """
+        Load the manifest located at `path`, or the `seed` one if there is none yet (ie : the merged manifest of a sharded run)
+        """
+
+        self.path = Path(path)
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._file_hashes: Dict[Tuple[str, int, int], str] = {}
+
+        source = self.path if seed is None or self.path.exists() else Path(seed)
+        try:
+            with open(source, "r", encoding="utf-8") as f:
+                content = json.load(f)
+            if content.get("version") == _MANIFEST_VERSION:
+                self._entries = content["dashboards"]
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError, AttributeError):
+            _LOGGER.warning(f"Ignoring the corrupted build manifest '{source}'")
+
+    def hash_file(self, path: Path) -> str:
+        """
+        Hash the content of a file. Hashes are memoized by path, size and modification time, as the same files are read by many dashboards.
+        A missing file hashes to an empty string.
+        """
+
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return ""
+
+        memo_key = (str(path), stat.st_size, stat.st_mtime_ns)
+        try:
+            return self._file_hashes[memo_key]
+        except KeyError:
+            pass
+
+        value = self._file_hashes[memo_key] = file_digest(path)
+        return value
+
+    def key(self, shared_inputs: Iterable[Path], dashboard_name: str, dashboard_data: Any) -> str:
+        """
+        Compute the key of a dashboard : a hash of the powernugget's version, of the files shared by every dashboard, and of the dashboard's entry.
+        """
+
+        return hash_payload(
+            {
+                "powernugget": version,
+                "shared": [self.hash_file(path) for path in shared_inputs],
+                "dashboard": [dashboard_name, dashboard_data],
+            }
+        )
+
+    def is_up_to_date(self, dashboard_name: str, key: str, output_path: Path) -> bool:
+        """
+        Check if a dashboard was built from the very same inputs, and if it's output still exists
+        """
+
+        entry: Optional[Dict[str, Any]] = self._entries.get(dashboard_name)
+        if entry is None or entry.get("key") != key or not output_path.exists():
+            return False
+
+        return all(self.hash_file(Path(path)) == digest for path, digest in entry.get("inputs", {}).items())
+
+    def record(self, dashboard_name: str, key: str, inputs: Iterable[Path]):
+        """
+        Record the inputs of a freshly built dashboard
+        """
+
+        self._entries[dashboard_name] = {
+            "key": key,
+            "inputs": {str(path): self.hash_file(Path(path)) for path in sorted(set(map(str, inputs)))},
+        }
+
+    def forget(self, dashboard_name: str):
+        """
+        Forget a dashboard, to have it rebuilt by the next incremental build
+        """
+
+        self._entries.pop(dashboard_name, None)
+
+    def update(self, other: "BuildManifest"):
+        """
+        Add the dashboards recorded by an other manifest, replacing the ones already recorded
+        """
+
+        self._entries.update(other._entries)
+
+    def retain(self, dashboard_names: Iterable[str]):
+        """
+        Forget the dashboards not among `dashboard_names`
+        """
+
+        names = set(dashboard_names)
+        self._entries = {name: entry for name, entry in self._entries.items() if name in names}
+
+    def save(self):
+        """
+        Write the manifest aside and move it in place once complete
+        """
+
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": _MANIFEST_VERSION, "dashboards": self._entries}, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
@@ -14,19 +14,36 @@ Entrypoint of the Power Nugget client
 #                                 Packages                                  #
 #############################################################################
 
-from collections import defaultdict
-from typing import Union, Optional, Dict, List, Any
+import asyncio
+import multiprocessing.util
+import threading
+from collections import defaultdict, deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from itertools import chain
+from typing import Union, Optional, Deque, Dict, Iterable, Iterator, List, Any, Set, Tuple, Callable, Generator
 from pathlib import Path
-from importlib import import_module
-from copy import deepcopy
 
-from powernugget.descriptions import _deserialize_yaml_as, _deserialize_yaml
-from powernugget.descriptions.models import Inventory, Tasks_list, Task
+from powernugget.descriptions import _deserialize_yaml_as, _deserialize_yaml, _default_inventory
+from powernugget.descriptions.models import Tasks_list
+from powernugget.descriptions.sources import InventorySource, inventory_source
 from powernugget.tasks_generator import TaskGenerator
-from powernugget.builtins.nugget import Nugget, NuggetExecutionStatus, NuggetResult
+from powernugget.tasks_plan import RenderedTask, TaskPlan, constant_nuggets
+from powernugget.builtins.nugget import Footprint, Nugget, NuggetExecutionStatus, NuggetResult
 from powernugget.dashboard import Dashboard, PowerBIOpener
+from powernugget.dashboard.pbit import DashboardFactory
+from powernugget.cache import DiskCache
 from powernugget.errors import Errors
-from powernugget.logger import MixinLogable
+from powernugget.manifest import MANIFEST_FILE_NAME, BuildManifest
+from powernugget.registry import NuggetRegistry
+from powernugget.scheduler import DependencyScheduler
+from powernugget.sharding import Shard, ShardedInventory, load_weights
+from powernugget.sinks import ResultSink, SummarySink
+from powernugget.logger import MixinLogable, LogRecord, buffered_logs, flush_logs
+from powernugget.timings import CONTEXT_BUILD, LOAD, NUGGET_RUN, RunReport, Timings, timed
+from powernugget import tracing
+from powernugget.tracing import span
 
 #############################################################################
 #                                  Script                                   #
@@ -34,6 +51,66 @@ from powernugget.logger import MixinLogable
 
 Pathable = Union[str, Path]
 
+_BACKENDS = ("process", "thread", "asyncio")
+
+# The number of plays submitted per worker : enough to keep the workers busy, while bounding the number of dashboards held in memory
+_IN_FLIGHT_PER_WORKER = 2
+
+# The results of a play, the files read by it's nuggets and the time spent in the dashboard's own phases
+PlayResult = Tuple[List[NuggetResult], List[Path], Timings]
+
+
+@dataclass
+class _TaskOutcome:
+    """
+    The outcome of a task executed by a worker thread : the result, the buffered logs and the error (if any)
+    """
+
+    result: Optional[NuggetResult]
+    records: List[LogRecord]
+    error: Optional[BaseException] = None
+
+
+def _task_failed(future: Future) -> bool:
+    """
+    Check if a completed task failed : it was cancelled, or it's error is to be raised
+    """
+
+    return future.cancelled() or future.exception() is not None or future.result().error is not None
+
+
+def _registered_output(result: Optional[NuggetResult]) -> Any:
+    """
+    The output registered for a task : the nugget's output if it succeeded, None otherwise
+    """
+
+    return result.result if result is not None and result.status == NuggetExecutionStatus.SUCCESS else None
+
+
+def _completed(value: Any) -> Future:
+    """
+    Wrap a value into a completed future
+    """
+
+    future: Future = Future()
+    future.set_result(value)
+    return future
+
+
+@dataclass
+class _PlayOutcome:
+    """
+    The outcome of a play executed by a worker : the results, the buffered logs, the error (if any), the files read by the nuggets, the
+    time spent in the dashboard's own phases and the spans recorded by a worker process
+    """
+
+    results: List[NuggetResult]
+    records: List[LogRecord]
+    error: Optional[BaseException] = None
+    inputs: List[Path] = field(default_factory=list)
+    timings: Timings = field(default_factory=dict)
+    events: List[tracing.Event] = field(default_factory=list)
+
 
 class Nuggetizer(MixinLogable):
     """
@@ -45,19 +122,26 @@ class Nuggetizer(MixinLogable):
         *,
         path: Pathable,
         inventory_file_name: Optional[Pathable] = None,
+        inventory: Optional[InventorySource] = None,
         tasks_file_name: Optional[Pathable] = None,
         vars_file_name: Optional[Pathable] = None,
         dashboard_template_file_name: Optional[Pathable] = None,
+        cache_dir: Optional[Pathable] = None,
     ):
         """
         Initialize the Nuggetizer
 
         Args:
             path (Pathable): The root path of the project where the inventory and tasks files are located.
-            inventory_file_name (Pathable, optional): An optional inventory file path. Defaults to "inventory.yaml".
+                The optional pyproject.toml of the project configures the `custom_nuggets_repo`, relative to this path.
+            inventory_file_name (Pathable, optional): An optional inventory path : a yaml, json, msgpack, JSON lines, CSV or SQLite file, or a
+                directory of per-dashboard files (see `powernugget.descriptions.sources`). Defaults to the first existing one among
+                "inventory.yaml", "inventory.json", "inventory.msgpack", "inventory.jsonl", "inventory.csv", "inventory.sqlite" and "inventory/".
+            inventory (InventorySource, optional): An optional source of dashboards, overriding the inventory file.
             tasks_file_name (Pathable, optional): An optional tasks file path. Defaults to "tasks.yaml".
             vars_file_name (Pathable, optional): An optional vars file path. All variables will be added to the rendering context. Defaults to "vars.yaml".
             dashboard_template_file_name (Pathable, optional): An optional dashboard template file. Defaults to "dashboard_template.pbit".
+            cache_dir (Pathable, optional): An optional folder where the parsed templates, inventory and tasks are cached accross runs. Defaults to no cache.
         """
 
         super().__init__(logger_name="Nuggetizer")
@@ -65,111 +149,813 @@ class Nuggetizer(MixinLogable):
         # Configure the paths to the artifacts
         base_path = Path(path)
         self._path = base_path
-        self._inventory_file_name: Path = Path(inventory_file_name or base_path / "inventory.yaml")
+        self._inventory_file_name: Path = Path(inventory_file_name or _default_inventory(base_path))
+        self._inventory = inventory
         self._tasks_file_name: Path = Path(tasks_file_name or base_path / "tasks.yaml")
         self._vars_file_name: Path = Path(vars_file_name or base_path / "vars.yaml")
         self._dashboard_template_file_name: Path = Path(dashboard_template_file_name or base_path / "dashboard_template.pbit")
+        self._cache: Optional[DiskCache] = DiskCache(cache_dir) if cache_dir else None
+
+        # The nuggets available to the tasks, including the custom ones configured in the PowerNugget's section of the pyproject (if any)
+        self._registry = NuggetRegistry.of_project(base_path)
 
-        # # Parse the Pyproject PowerNugget's section of the configuration
-        # self._root_folder: Path = _get_path_to_target("pyproject.toml")
-        # self._config: Pyproject = _get_pyproject(root_folder)
+        # The timings of the last run
+        self.report: Optional[RunReport] = None
+        self._tracing = False
 
     def _get_nugget_class(self, fqn: str) -> Nugget:
         """
-        Fetch the Nugget among the builtins modules to get the nugget class
+        Fetch the nugget class from the registry : builtins nuggets, custom nuggets and the nuggets exposed by the installed packages
 
-        TODO : add support for UDN (User Defined Nugget)
         Args:
-            fqn (str): The fully qualified nugget name
+            fqn (str): The short name, or the fully qualified name of the nugget
         """
 
-        try:
-            callable_, *modules = fqn.split(".")[::-1]
-            modules = modules[::-1]
-            nugget_class = getattr(
-                import_module(".".join(modules)),
-                callable_,
-            )
-        except BaseException:
-            raise Errors.E030(fqn=fqn)  # type: ignore
-
-        return nugget_class
+        return self._registry.resolve(fqn)  # type: ignore
 
-    def _task_to_nugget(self, task: Task, dashboard: Dashboard) -> Nugget:
+    def _task_to_nugget(self, task: RenderedTask, dashboard: Dashboard) -> Nugget:
         """
         Transform a task to a concrete nugget
         """
 
-        nugget_class = self._get_nugget_class(task.nugget)
+        nugget_class = task.nugget_class or self._get_nugget_class(task.nugget)
         return nugget_class(dashboard=dashboard, **task.params)  # type: ignore
 
-    def execute(self) -> Dict[str, List[NuggetResult]]:
+    def _magics(self, vars_: Dict[str, Any], dashboard_name: str, dashboard_data: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Render a dasboard template by executing the tasks against the inventory.
+        Create the templating magic variables.
+        The vars are shared by all the dashboards, and the dashboard data by all the tasks : both are exposed as is rather than copied,
+        so that they remain plain dicts for the templates' filters (ie: `tojson`).
+        """
+
+        return {
+            "vars": vars_,
+            "dashboard_name": dashboard_name,
+            "dashboard_data": dashboard_data,
+            "root_path": str(self._path),
+        }
+
+    def _task_result(
+        self, task: RenderedTask, nugget: Nugget, dashboard_name: str, output: Any = None, error: Optional[BaseException] = None
+    ) -> NuggetResult:
+        """
+        Map the outcome of a nugget to it's result. A failure is only raised if the task is mandatory.
+        """
+
+        if error is None:
+            self.info("\033[92m Ok\033[00m\n")
+            return NuggetResult(status=NuggetExecutionStatus.SUCCESS, result=output, name=task.name, timings=task.timings)
+
+        if task.on_error != "ignore":  # todo Replace with LiteralEnum
+            raise Errors.E031(nugget_name=nugget.nugget_name, dashboard=dashboard_name) from error  # type: ignore
+
+        self.info("\033[91m Failled\033[00m\n")
+        return NuggetResult(status=NuggetExecutionStatus.FAILED, result=None, name=task.name, timings=task.timings)
+
+    def _play_steps(
+        self, factory: DashboardFactory, plan: TaskPlan, vars_: Dict[str, Any], dashboard_name: str, dashboard_data: Dict[str, Any]
+    ) -> Generator[Union[Nugget, Callable], Any, Tuple[List[NuggetResult], List[Path], Timings]]:
+        """
+        Render a single dashboard by executing the tasks against it's inventory entry.
+        The play is a generator yielding the steps to execute : the nuggets to run, then the closer writing the dashboard.
+        The executor sends back the step's output, or throws the step's error, so that the same play can be driven synchronously or asynchronously.
+        Return the results of the tasks alongside the files read by the executed nuggets and the time spent in the dashboard's own phases.
+        """
+
+        self.info(f" *** PLAY [{dashboard_name}] *** \n")
+        results: List[NuggetResult] = []
+        inputs: List[Path] = []
+        timings: Timings = {}
+
+        with timed(timings, CONTEXT_BUILD):
+            # Create a dashboard representation to be updated by the tasks.
+            # The closer callable can be executed to save the dahsboard.
+            dashboard, closer = factory(dashboard_name)
+
+            # Generate the tasks to be executed : the tasks are contextualized from the dashboard context
+            generator = TaskGenerator(plan, **self._magics(vars_, dashboard_name, dashboard_data))
+
+        for task in generator:
+            self.info(f"TASK [{task.name}]")
+
+            # Check if the Task must be executed
+            if not task.when:
+                self.info("\033[33m Passed\033[00m\n")
+                results.append(NuggetResult(status=NuggetExecutionStatus.PASSED, result=None, name=task.name, timings=task.timings))
+                if task.register_out:
+                    generator.register(task.register_out, None)
+                continue
+
+            # If so, map the Task to a Nugget
+            with span("task", name=task.name, nugget=task.nugget):
+                nugget = self._task_to_nugget(task, dashboard)
+                inputs.extend(nugget.inputs())
+
+                # Try to execute the nugget
+                output, error = None, None
+                try:
+                    with timed(task.timings, NUGGET_RUN):
+                        output = yield nugget
+
+                # The play was abandoned by it's executor (ie : cancelled)
+                except GeneratorExit:
+                    raise
+
+                except BaseException as e:
+                    error = e
+
+                result = self._task_result(task, nugget, dashboard_name, output, error)
+                results.append(result)
+
+                # Feed the output to the following tasks
+                if task.register_out:
+                    generator.register(task.register_out, _registered_output(result))
+
+        # Serialize the dashboard to the target folder
+        yield closer
+        timings.update(dashboard.timings)
+
+        return results, inputs, timings
+
+    def _play(
+        self,
+        factory: DashboardFactory,
+        plan: TaskPlan,
+        vars_: Dict[str, Any],
+        task_workers: Optional[int],
+        dashboard_name: str,
+        dashboard_data: Dict[str, Any],
+    ) -> Tuple[List[NuggetResult], List[Path], Timings]:
+        """
+        Drive a play synchronously. If task_workers is set, the independent tasks are executed concurrently.
+        """
+
+        with span("play", dashboard=dashboard_name):
+            if task_workers is not None:
+                return self._play_concurrently(factory, plan, vars_, task_workers, dashboard_name, dashboard_data)
+
+            steps = self._play_steps(factory, plan, vars_, dashboard_name, dashboard_data)
+            output: Any = None
+            error: Optional[BaseException] = None
+            while True:
+                try:
+                    step = steps.send(output) if error is None else steps.throw(error)
+                except StopIteration as stop:
+                    return stop.value
+
+                output, error = None, None
+                try:
+                    output = step.run() if isinstance(step, Nugget) else step()
+                except BaseException as e:
+                    error = e
+
+    def _run_task(self, task: RenderedTask, nugget: Nugget, dashboard_name: str) -> _TaskOutcome:
         """
+        Execute a task in a worker thread, buffering it's logs
+        """
+
+        with span("task", name=task.name, nugget=task.nugget), buffered_logs() as records:
+            self.info(f"TASK [{task.name}]")
+
+            output, error = None, None
+            try:
+                with timed(task.timings, NUGGET_RUN):
+                    output = nugget.run()
+            except BaseException as e:
+                error = e
 
-        # Prepare the inventory and the task file to be templated
-        inventory: Inventory = _deserialize_yaml_as(self._inventory_file_name, Inventory)  # type: ignore
-        tasks_list: Tasks_list = _deserialize_yaml_as(self._tasks_file_name, Tasks_list)  # type: ignore
+            try:
+                return _TaskOutcome(result=self._task_result(task, nugget, dashboard_name, output, error), records=records)
+            except BaseException as e:
+                return _TaskOutcome(result=None, records=records, error=e)
+
+    def _play_concurrently(
+        self,
+        factory: DashboardFactory,
+        plan: TaskPlan,
+        vars_: Dict[str, Any],
+        task_workers: int,
+        dashboard_name: str,
+        dashboard_data: Dict[str, Any],
+    ) -> Tuple[List[NuggetResult], List[Path], Timings]:
+        """
+        Render a single dashboard, executing the independent tasks concurrently.
+        The tasks are rendered in order. A task is only rendered once the outputs it refers to are registered, and only waits for the previous tasks
+        whose footprint conflicts with it's own (see `Nugget.footprint`). The results and the logs are gathered in the tasks order.
+        """
+
+        self.info(f" *** PLAY [{dashboard_name}] *** \n")
+        inputs: List[Path] = []
+        timings: Timings = {}
+        with timed(timings, CONTEXT_BUILD):
+            dashboard, closer = factory(dashboard_name)
+            generator = TaskGenerator(plan, **self._magics(vars_, dashboard_name, dashboard_data))
+
+        jobs: List[Future] = []
+        pending: List[Tuple[Footprint, Future]] = []
+        producers: Dict[str, List[Future]] = defaultdict(list)
+
+        with ThreadPoolExecutor(max_workers=task_workers) as pool:
+            # The tasks conflicting with a failed task are cancelled, as the sequential play would never have run them
+            scheduler = DependencyScheduler(pool, failed=_task_failed)
+            try:
+                for compiled in plan:
+
+                    # The task can only be rendered once the outputs it refers to are registered.
+                    # A failed producer stops the rendering : it's error is raised below, in the tasks order.
+                    outputs = [(name, producer) for name in compiled.references & producers.keys() for producer in producers.pop(name)]
+                    if any(_task_failed(producer) for _, producer in outputs):
+                        break
+                    for name, producer in outputs:
+                        generator.register(name, _registered_output(producer.result().result))
+
+                    for task in generator.render(compiled):
+                        if not task.when:
+                            with buffered_logs() as records:
+                                self.info(f"TASK [{task.name}]")
+                                self.info("\033[33m Passed\033[00m\n")
+                            passed = NuggetResult(status=NuggetExecutionStatus.PASSED, result=None, name=task.name, timings=task.timings)
+                            skipped = _completed(_TaskOutcome(result=passed, records=records))
+                            jobs.append(skipped)
+                            if task.register_out:
+                                producers[task.register_out].append(skipped)
+                            continue
+
+                        nugget = self._task_to_nugget(task, dashboard)
+                        inputs.extend(nugget.inputs())
+
+                        # Only wait for the tasks still pending, or failed : the conflicting tasks are then cancelled
+                        footprint = nugget.footprint()
+                        pending = [(other, future) for other, future in pending if not future.done() or _task_failed(future)]
+                        after = [future for other, future in pending if footprint.conflicts(other)]
+
+                        future = scheduler.submit(partial(self._run_task, task, nugget, dashboard_name), after=after)
+                        pending.append((footprint, future))
+                        jobs.append(future)
+                        if task.register_out:
+                            producers[task.register_out].append(future)
+
+                results: List[NuggetResult] = []
+                for future in jobs:
+                    outcome: _TaskOutcome = future.result()
+                    flush_logs(outcome.records)
+                    if outcome.error is not None:
+                        raise outcome.error
+                    results.append(outcome.result)  # type: ignore
+
+            # Fail fast : the tasks not started yet are cancelled
+            except BaseException:
+                for future in jobs:
+                    future.cancel()
+                raise
+
+        # Serialize the dashboard to the target folder
+        closer()
+        timings.update(dashboard.timings)
+
+        return results, inputs, timings
+
+    async def _aplay(
+        self, factory: DashboardFactory, plan: TaskPlan, vars_: Dict[str, Any], dashboard_name: str, dashboard_data: Dict[str, Any]
+    ) -> Tuple[List[NuggetResult], List[Path], Timings]:
+        """
+        Drive a play asynchronously : the nuggets are awaited, and the dashboard is written by the event loop's executor
+        """
+
+        with span("play", dashboard=dashboard_name):
+            loop = asyncio.get_running_loop()
+            steps = self._play_steps(factory, plan, vars_, dashboard_name, dashboard_data)
+            output: Any = None
+            error: Optional[BaseException] = None
+            while True:
+                try:
+                    step = steps.send(output) if error is None else steps.throw(error)
+                except StopIteration as stop:
+                    return stop.value
+
+                output, error = None, None
+                try:
+                    output = await (step.arun() if isinstance(step, Nugget) else loop.run_in_executor(None, step))
+                except asyncio.CancelledError:
+                    raise
+                except BaseException as e:
+                    error = e
+
+    def _buffered_play(
+        self,
+        factory: DashboardFactory,
+        plan: TaskPlan,
+        vars_: Dict[str, Any],
+        task_workers: Optional[int],
+        dashboard_name: str,
+        dashboard_data: Dict[str, Any],
+    ) -> _PlayOutcome:
+        """
+        Execute a play while buffering it's logs, so that the logs can be flushed grouped by dashboard.
+        In a worker process, the spans are buffered as well, to be merged into the main process's trace.
+        Errors are returned alongside the logs rather than raised, to let the caller flush the logs before raising.
+        """
+
+        with buffered_logs() as records, tracing.buffered(self._tracing) as events:
+            try:
+                results, inputs, timings = self._play(
+                    factory=factory,
+                    plan=plan,
+                    vars_=vars_,
+                    task_workers=task_workers,
+                    dashboard_name=dashboard_name,
+                    dashboard_data=dashboard_data,
+                )
+                return _PlayOutcome(results=results, records=records, inputs=inputs, timings=timings, events=events)
+            except BaseException as error:
+                return _PlayOutcome(results=[], records=records, error=error, events=events)
+
+    async def _abuffered_play(
+        self,
+        semaphore: asyncio.Semaphore,
+        factory: DashboardFactory,
+        plan: TaskPlan,
+        vars_: Dict[str, Any],
+        dashboard_name: str,
+        dashboard_data: Dict[str, Any],
+    ) -> _PlayOutcome:
+        """
+        Execute a play asynchronously, while buffering it's logs. At most `workers` plays are in progress at the same time.
+        """
+
+        async with semaphore:
+            with buffered_logs() as records:
+                try:
+                    results, inputs, timings = await self._aplay(
+                        factory=factory, plan=plan, vars_=vars_, dashboard_name=dashboard_name, dashboard_data=dashboard_data
+                    )
+                    return _PlayOutcome(results=results, records=records, inputs=inputs, timings=timings)
+                except asyncio.CancelledError:
+                    raise
+                except BaseException as error:
+                    return _PlayOutcome(results=[], records=records, error=error)
+
+    async def _execute_asynchronously(
+        self,
+        factory: DashboardFactory,
+        plan: TaskPlan,
+        vars_: Dict[str, Any],
+        dashboards: Iterable[Tuple[str, Optional[Dict[str, Any]]]],
+        workers: int,
+        record: Callable[[str, Optional[PlayResult]], None],
+    ):
+        """
+        Execute the plays of several dashboards concurrently, in an event loop : the I/O of the asynchronous nuggets are overlapped.
+        The tasks of a play are executed in order. The synchronous nuggets, and the writing of the dashboards, are offloaded to a pool of `workers` threads.
+        The dashboards are consumed as the plays complete, and their outcomes handed to `record` in the inventory order (see `_execute_concurrently`).
+        """
+
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(workers)
+        window: Deque[Tuple[str, Optional[asyncio.Future]]] = deque()
+        failed = asyncio.Event()
+
+        # Fail fast : as soon as a play fails, the other plays are cancelled, and no other play is started
+        def _cancel_on_error(task: asyncio.Future):
+            if not task.cancelled() and task.result().error is not None:
+                failed.set()
+                for _, other in window:
+                    if other is not None:
+                        other.cancel()
+
+        async def _consume():
+            name, task = window.popleft()
+            if task is None:
+                record(name, None)
+                return
+
+            await asyncio.wait([task])
+            if task.cancelled():
+                return
+
+            outcome: _PlayOutcome = task.result()
+            flush_logs(outcome.records)
+            if outcome.error is not None:
+                raise outcome.error
+
+            record(name, (outcome.results, outcome.inputs, outcome.timings))
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            loop.set_default_executor(pool)
+            try:
+                for name, data in dashboards:
+                    if failed.is_set():
+                        break
+
+                    task = None
+                    if data is not None:
+                        play = self._abuffered_play(
+                            semaphore, factory=factory, plan=plan, vars_=vars_, dashboard_name=name, dashboard_data=data
+                        )
+                        task = asyncio.ensure_future(play)
+                        task.add_done_callback(_cancel_on_error)
+                    window.append((name, task))
+
+                    while len(window) >= _IN_FLIGHT_PER_WORKER * workers:
+                        await _consume()
+
+                while window:
+                    await _consume()
+            finally:
+                tasks = [task for _, task in window if task is not None]
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _execute_concurrently(
+        self,
+        factory: DashboardFactory,
+        plan: TaskPlan,
+        vars_: Dict[str, Any],
+        task_workers: Optional[int],
+        dashboards: Iterable[Tuple[str, Optional[Dict[str, Any]]]],
+        workers: int,
+        backend: str,
+        record: Callable[[str, Optional[PlayResult]], None],
+    ):
+        """
+        Execute the plays of several dashboards concurrently, in a pool of processes or threads.
+        The dashboards are consumed as the plays complete : at most `_IN_FLIGHT_PER_WORKER` plays per worker are submitted at once, to bound the
+        memory whatever the size of the inventory. The outcomes and the logs are handed to `record` in the inventory order, whatever the completion
+        order is. An up-to-date dashboard comes without data, and is recorded without an outcome.
+        """
+
+        if backend == "process":
+            pool: Executor = ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker, initargs=(self, factory, plan, vars_, task_workers)
+            )
+            submit = lambda name, data: pool.submit(_play_in_worker, name, data)  # noqa: E731
+        else:
+            pool = ThreadPoolExecutor(max_workers=workers)
+            submit = lambda name, data: pool.submit(  # noqa: E731
+                self._buffered_play,
+                factory=factory,
+                plan=plan,
+                vars_=vars_,
+                task_workers=task_workers,
+                dashboard_name=name,
+                dashboard_data=data,
+            )
+
+        window: Deque[Tuple[str, Future]] = deque()
+        failed = threading.Event()
+
+        # Fail fast : as soon as a play fails, the not-yet-started plays are cancelled, and no other play is submitted
+        def _cancel_on_error(future: Future):
+            if not future.cancelled() and (future.exception() is not None or future.result().error is not None):
+                failed.set()
+                for _, other in list(window):
+                    other.cancel()
+
+        def _consume():
+            name, future = window.popleft()
+            if future.cancelled():
+                return
+
+            outcome: Optional[_PlayOutcome] = future.result()
+            if outcome is None:
+                record(name, None)
+                return
+
+            flush_logs(outcome.records)
+            tracing.extend(outcome.events)
+            if outcome.error is not None:
+                raise outcome.error
+
+            record(name, (outcome.results, outcome.inputs, outcome.timings))
+
+        with pool:
+            try:
+                for name, data in dashboards:
+                    if failed.is_set():
+                        break
+
+                    if data is None:
+                        window.append((name, _completed(None)))
+                    else:
+                        future = submit(name, data)
+                        window.append((name, future))
+                        future.add_done_callback(_cancel_on_error)
+
+                    while len(window) >= _IN_FLIGHT_PER_WORKER * workers:
+                        _consume()
+
+                while window:
+                    _consume()
+            except BaseException:
+                for _, future in window:
+                    future.cancel()
+                raise
+
+    def _compile(self) -> Tuple[InventorySource, TaskPlan, Dict[str, Any]]:
+        """
+        Open the inventory, load the vars, and compile the tasks list into a plan
+        """
+
+        # Prepare the inventory and the task file to be templated. The inventory is only read when iterated over
+        inventory = self._inventory or inventory_source(self._inventory_file_name, self._cache)
+        tasks_list: Tasks_list = _deserialize_yaml_as(self._tasks_file_name, Tasks_list, self._cache)  # type: ignore
 
         # Extract the vars file (if any)
         vars_: Dict[str, Any] = {}
         if self._vars_file_name.exists():
             vars_ = _deserialize_yaml(self._vars_file_name)
 
-        # Keep a record of every nugget executed
-        summary: Dict[str, List[NuggetResult]] = defaultdict(lambda: [])  # type: ignore
+        # Compile the tasks once : all the nuggets are resolved before the first dashboard is rendered, the unknown ones being reported at once
+        self._registry.validate(constant_nuggets(tasks_list))
+        plan = TaskPlan(tasks_list, resolver=self._registry.resolve)
+
+        return inventory, plan, vars_
+
+    def _plan_tasks(
+        self, plan: TaskPlan, vars_: Dict[str, Any], dashboard_name: str, dashboard_data: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """
+        Render the tasks of a dashboard, without executing them.
+        A task refering to the outputs registered by the previous tasks can't be rendered before the execution : it's reported as deferred.
+        """
+
+        tasks: List[Dict[str, Any]] = []
+        registered: Set[str] = set()
+
+        generator = TaskGenerator(plan, **self._magics(vars_, dashboard_name, dashboard_data))
+        for compiled in plan:
+            deferred = compiled.references & registered
+            if compiled.register_out.constant and compiled.register_out.value:
+                registered.add(compiled.register_out.value)
+
+            if deferred:
+                tasks.append({"name": compiled.task.name, "nugget": compiled.task.nugget, "deferred": sorted(deferred)})
+                continue
+
+            for task in generator.render(compiled):
+                nugget_class = task.nugget_class
+                tasks.append(
+                    {
+                        "name": task.name,
+                        "nugget": task.nugget,
+                        "nugget_class": f"{nugget_class.__module__}.{nugget_class.__qualname__}" if nugget_class else None,
+                        "params": task.params,
+                        "when": task.when,
+                        "register": task.register_out,
+                        "on_error": task.on_error,
+                    }
+                )
+
+        return tasks
+
+    def plan(self, dashboards: Optional[Iterable[str]] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Render the tasks of every dashboard without executing them : the template is never opened, and no dashboard is written.
+        The nuggets are resolved, and the `when` conditions evaluated.
+
+        Args:
+            dashboards (Iterable[str], optional): The names of the dashboards to plan. Defaults to all the dashboards of the inventory.
+
+        Returns:
+            Dict[str, List[Dict[str, Any]]]: The rendered tasks of each dashboard
+        """
+
+        inventory, plan, vars_ = self._compile()
+
+        names = None if dashboards is None else list(dashboards)
+        planned = {name: self._plan_tasks(plan, vars_, name, data) for name, data in inventory if names is None or name in names}
+
+        if names is None:
+            return planned
+
+        unknown = [name for name in names if name not in planned]
+        if unknown:
+            raise Errors.E037(names=", ".join(unknown))  # type: ignore
+
+        return {name: planned[name] for name in names}
+
+    def execute(
+        self,
+        *,
+        workers: Optional[int] = None,
+        backend: str = "process",
+        incremental: bool = False,
+        task_workers: Optional[int] = None,
+        report: Optional[Pathable] = None,
+        trace: Optional[Pathable] = None,
+        sink: Optional[ResultSink] = None,
+        shard: Optional[Union[str, Shard]] = None,
+        shard_weights: Optional[Pathable] = None,
+    ) -> Optional[Dict[str, List[NuggetResult]]]:
+        """
+        Render a dasboard template by executing the tasks against the inventory.
+
+        Args:
+            workers (int, optional): If set, the dashboards are rendered concurrently by a pool of `workers` workers. Defaults to a sequential rendering.
+            backend (str, optional): The kind of pool used when `workers` is set : "process" for CPU-bound nuggets, "thread" for I/O-bound ones,
+                "asyncio" for the nuggets implementing an asynchronous `arun`. Defaults to "process".
+            incremental (bool, optional): If set, the dashboards whose inputs did not change since the last build are not rendered again. Defaults to False.
+            task_workers (int, optional): If set, the independent tasks of a dashboard are executed concurrently by a pool of `task_workers` threads.
+                Not supported by the "asyncio" backend. Defaults to a sequential execution of the tasks.
+            report (Pathable, optional): If set, the timings of the run are written to this file : as a Prometheus textfile if it's suffix is
+                ".prom", as json otherwise. The timings are also available as `Nuggetizer.report`, and each task's timings on it's result.
+            trace (Pathable, optional): If set, the spans of the run (plays, tasks, nuggets, serialization...) are written to this file, in the
+                Chrome trace-event format, to be loaded in Perfetto. The spans recorded by the worker processes are merged into it.
+            sink (ResultSink, optional): If set, the results of each dashboard are handed to the sink as soon as the dashboard is rendered,
+                rather than being kept in memory (see `powernugget.sinks`). The sink is closed once the run is over.
+            shard (str | Shard, optional): If set ("i/N"), only the dashboards of the i-th of N stable partitions of the inventory are rendered
+                (see `powernugget.sharding`). The shard writes it's own build manifest and json timings report, to be merged with the other
+                shards' ones by `powernugget.sharding.merge`. Defaults to the whole inventory.
+            shard_weights (Pathable, optional): The json timings report of a previous run : the shards are balanced according to the time spent
+                on each dashboard, rather than their number of dashboards. Only used with `shard`.
+
+        Returns:
+            Optional[Dict[str, List[NuggetResult]]]: The results of each dashboard, in the inventory order. None if the results were handed to a sink.
+        """
+
+        if backend not in _BACKENDS:
+            raise Errors.E032(backend=backend, expected=", ".join(_BACKENDS))  # type: ignore
+
+        for workers_ in (workers, task_workers):
+            if workers_ is not None and (not isinstance(workers_, int) or workers_ < 1):
+                raise Errors.E033(workers=workers_)  # type: ignore
+
+        if task_workers is not None and workers is not None and backend == "asyncio":
+            raise Errors.E034()  # type: ignore
+
+        if isinstance(shard, str):
+            shard = Shard.of(shard)
+        weights = load_weights(Path(shard_weights)) if shard is not None and shard_weights is not None else None
+
+        # Set before the pools are created, for the worker processes to buffer their spans
+        self._tracing = trace is not None
+        summary = SummarySink() if sink is None else None
+        results_sink: ResultSink = sink or summary  # type: ignore
+        try:
+            with tracing.tracing(Path(trace) if trace is not None else None), span("run"):
+                self._execute(workers, backend, incremental, task_workers, report, results_sink, shard, weights)
+        finally:
+            results_sink.close()
+
+        if trace is not None:
+            self.info(f"Trace written to {trace}")
+
+        return summary.summary if summary is not None else None
+
+    def _execute(
+        self,
+        workers: Optional[int],
+        backend: str,
+        incremental: bool,
+        task_workers: Optional[int],
+        report: Optional[Pathable],
+        sink: ResultSink,
+        shard: Optional[Shard] = None,
+        weights: Optional[Dict[str, float]] = None,
+    ):
+        """
+        Execute the tasks against the inventory, streaming the dashboards from the inventory and their results to the sink. See `execute`.
+        """
+
+        # Time each phase of the run
+        run_report = RunReport()
+        self.report = run_report
+        with timed(run_report.phases, LOAD):
+            inventory, plan, vars_ = self._compile()
+
+        # The build manifest records the inputs of every dashboard, it's written next to the rendered dashboards.
+        # A shard only renders it's own dashboards, and writes it's own manifest and report, starting from the merged manifest of the previous run
+        output = self._dashboard_template_file_name.parent
+        opener = PowerBIOpener(self._dashboard_template_file_name, cache=self._cache)
+        reports = [report]
+        if shard is None:
+            manifest = BuildManifest(output / MANIFEST_FILE_NAME)
+        else:
+            inventory = ShardedInventory(inventory, shard, weights)
+            manifest = BuildManifest(output / shard.manifest_file_name(), seed=output / MANIFEST_FILE_NAME)
+            reports.append(output / shard.report_file_name())
+        shared_inputs = (
+            self._dashboard_template_file_name,
+            self._tasks_file_name,
+            self._vars_file_name,
+            self._path / "pyproject.toml",
+            *self._registry.custom_sources(),
+        )
+
+        # The keys of the dashboards being rendered
+        keys: Dict[str, str] = {}
+        seen: Set[str] = set()
+
+        def _dashboards() -> Iterator[Tuple[str, Optional[Dict[str, Any]]]]:
+            """
+            Stream the dashboards of the inventory. Only the dashboards whose inputs changed come with their data
+            """
+
+            for name, data in inventory:
+                if name in seen:
+                    raise Errors.E038(name=name)  # type: ignore
+                seen.add(name)
+
+                key = manifest.key(shared_inputs, name, data)
+                if incremental and manifest.is_up_to_date(name, key, opener.target_path(name)):
+                    yield name, None
+                else:
+                    keys[name] = key
+                    yield name, data
+
+        def _record(name: str, outcome: Optional[PlayResult]):
+            """
+            Record the outcome of a play, or an up-to-date dashboard
+            """
+
+            if outcome is None:
+                self.info(f" *** PLAY [{name}] *** \033[33mUp to date\033[00m\n")
+                sink.write(name, [NuggetResult(status=NuggetExecutionStatus.UP_TO_DATE, result=None)])
+                return
+
+            # A dashboard with a failed task is rebuilt by the next run
+            results, inputs, timings = outcome
+            key = keys.pop(name)
+            if any(result.status == NuggetExecutionStatus.FAILED for result in results):
+                manifest.forget(name)
+            else:
+                manifest.record(name, key, inputs)
+            run_report.add_dashboard(name, timings, results)
+            sink.write(name, results)
+
+        # The up-to-date dashboards preceding the first one to render are recorded right away : the template is only opened if needed
+        dashboards = _dashboards()
+        first = None
+        for name, data in dashboards:
+            if data is not None:
+                first = name, data
+                break
+            _record(name, None)
+
+        if first is None:
+            self._close_report(run_report, reports)
+            return
 
         # Prepare the dashboard template by unzipping it.
-        # The context manager returns a callable to be called for generating an updatable copy of the Template
-        with PowerBIOpener(self._dashboard_template_file_name) as opener:
-
-            for dashboard_name, dashboard_data in inventory.dashboards.items():
-
-                self.info(f" *** PLAY [{dashboard_name}] *** \n")
-
-                # Create the templating magic variables
-                magics = {
-                    "vars": deepcopy(vars_),
-                    "dashboard_name": dashboard_name,
-                    "dashboard_data": dashboard_data,
-                    "root_path": str(self._path),
-                }
-
-                # Create a dashboard representation to be updated by the tasks.
-                # The closer callable can be executed to save the dahsboard.
-                dashboard, closer = opener(dashboard_name)
-
-                # Generate the tasks to be executed : the tasks are contextualized from the dashboard context
-                for task in TaskGenerator(tasks_list, **magics):
-                    self.info(f"TASK [{task.name}]")
-
-                    # Check if the Task must be executed
-                    if not task.when:
-                        self.info("\033[33m Passed\033[00m\n")
-                        result = NuggetResult(status=NuggetExecutionStatus.PASSED, result=None)
-                        summary[dashboard_name].append(result)
-                        continue
-
-                    # If so, map the Task to a Nugget
-                    nugget = self._task_to_nugget(task, dashboard)
-
-                    # Try to execute the nugget, and set the status as a success
-                    try:
-                        output = nugget.run()
-                        result = NuggetResult(status=NuggetExecutionStatus.SUCCESS, result=output)
-                        self.info("\033[92m Ok\033[00m\n")
-
-                    # In case of error, set the status as a failure but only raise the error if the task is mandatory
-                    except BaseException as error:
-                        if task.on_error != "ignore":  # todo Replace with LiteralEnum
-                            raise Errors.E031(nugget_name=nugget.nugget_name, dashboard=dashboard_name) from error  # type: ignore
-                        result = NuggetResult(status=NuggetExecutionStatus.FAILED, result=None)
-                        self.info("\033[91m Failled\033[00m\n")
-
-                    summary[dashboard_name].append(result)
-
-                # Serialize the dashboard to the target folder
-                closer()
-
-        return summary
+        # The context manager returns a factory to be called for generating an updatable copy of the Template
+        try:
+            with opener as factory:
+
+                run_report.phases.update(opener.timings)
+                remaining = chain([first], dashboards)
+
+                if workers is None:
+                    for name, data in remaining:
+                        _record(name, None if data is None else self._play(factory, plan, vars_, task_workers, name, data))
+                elif backend == "asyncio":
+                    asyncio.run(self._execute_asynchronously(factory, plan, vars_, remaining, workers, _record))
+                else:
+                    self._execute_concurrently(factory, plan, vars_, task_workers, remaining, workers, backend, _record)
+
+        # Even if a play failed, the dashboards rendered so far are recorded
+        finally:
+            if shard is not None:
+                manifest.retain(seen)
+            manifest.save()
+            self._close_report(run_report, reports)
+
+    def _close_report(self, run_report: RunReport, paths: Iterable[Optional[Pathable]]):
+        """
+        Stop the run's clock, and write the report to the requested paths
+        """
+
+        run_report.close()
+        for path in paths:
+            if path is not None:
+                run_report.write(Path(path))
+                self.info(f"Timings report written to {path}")
+
+
+# State shared by the plays executed in a worker process : set once, by the pool initializer
+_WORKER_STATE: Tuple = ()
+
+
+def _init_worker(*state):
+    """
+    Initialize a worker process with the Nuggetizer, the template factory, the task plan, the vars and the number of task workers.
+    Sending them once per worker avoids pickling the parsed template for every dashboard.
+    """
+
+    global _WORKER_STATE
+    _WORKER_STATE = state
+
+    # The template is released when the worker exits. The multiprocessing finalizers run at the workers' exit, unlike the atexit callbacks.
+    _, factory, *_ = state
+    multiprocessing.util.Finalize(None, factory.close, exitpriority=0)
+
+
+def _play_in_worker(dashboard_name: str, dashboard_data: Dict[str, Any]) -> _PlayOutcome:
+    """
+    Execute a play in a worker process
+    """
+
+    nuggetizer, factory, plan, vars_, task_workers = _WORKER_STATE
+    return nuggetizer._buffered_play(
+        factory=factory, plan=plan, vars_=vars_, task_workers=task_workers, dashboard_name=dashboard_name, dashboard_data=dashboard_data
+    )
@@ -0,0 +1,404 @@
+#! /usr/bin/python3
+
+# registry.py
+#
+# Project name: power nugget
+# Author: Hugo Juhel
+#
+# description:
+"""
+The nuggets registry : resolve the nugget names used in the tasks to nugget classes.
+
+Nuggets are discovered without being imported, from three sources :
+    * the builtins nuggets, from the `powernugget.builtins` package,
+    * the user's nuggets, from the python files of the `custom_nuggets_repo` folder (see the pyproject.toml's powernugget section),
+    * the nuggets exposed by installed packages, through the `powernugget.nuggets` entry points group.
+
+The sources are scanned statically (the modules are parsed, not executed) : a nugget's module is only imported when the nugget is first used.
+A nugget can be refered to by it's short name (the snake cased class name, ie : `replace_image`), by it's `nugget_name`, or by it's fully qualified name.
+"""
+
+#############################################################################
+#                                 Packages                                  #
+#############################################################################
+
+import ast
+import configparser
+import importlib.machinery
+import importlib.util
+import re
+import sys
+import threading
+from importlib import import_module
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Type
+
+import tomli
+
+from powernugget.errors import Errors
+
+#############################################################################
+#                                  Script                                   #
+#############################################################################
+
+ENTRY_POINTS_GROUP = "powernugget.nuggets"
+_BUILTINS_PACKAGE = "powernugget.builtins"
+_BUILTINS_PATH = Path(__file__).parent / "builtins"
+
+# The custom nuggets modules are imported under this namespace
+_CUSTOM_NAMESPACE = "powernugget_custom_nuggets"
+
+
+def _snake_case(name: str) -> str:
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", name).lower()
+
+
+def _scan_module(path: Path) -> Iterator[Tuple[str, Optional[str]]]:
+    """
+    Statically list the nuggets defined in a python file : the classes deriving from `Nugget`, with their `nugget_name` if it's a literal
+    """
+
+    try:
+        tree = ast.parse(path.read_bytes(), filename=str(path))
+    except (OSError, SyntaxError, ValueError):
+        return
+
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+
+        bases = {base.id if isinstance(base, ast.Name) else getattr(base, "attr", None) for base in node.bases}
+        if "Nugget" not in bases:
+            continue
+
+        nugget_name = None
+        for statement in node.body:
+            target = getattr(statement, "target", None) or next(iter(getattr(statement, "targets", ())), None)
+            value = getattr(statement, "value", None)
+            if isinstance(target, ast.Name) and target.id == "nugget_name" and isinstance(value, ast.Constant):
+                nugget_name = value.value
+
+        yield node.name, nugget_name
+
+
+def _find_spec(module_name: str) -> Optional[importlib.machinery.ModuleSpec]:
+    """
+    Locate a module without importing it : unlike `importlib.util.find_spec`, the parent packages are not imported either
+    """
+
+    spec = None
+    parts = module_name.split(".")
+    for depth in range(1, len(parts) + 1):
+        name = ".".join(parts[:depth])
+        module = sys.modules.get(name)
+        if module is not None:
+            spec = getattr(module, "__spec__", None)
+        elif depth == 1:
+            spec = importlib.util.find_spec(name)
+        elif spec is not None and spec.submodule_search_locations is not None:
+            spec = importlib.machinery.PathFinder.find_spec(name, list(spec.submodule_search_locations))
+        else:
+            spec = None
+
+        if spec is None:
+            return None
+
+    return spec
+
+
+def _module_statements(body: List[ast.stmt]) -> Iterator[ast.stmt]:
+    """
+    The statements run at a module's import : the top level ones, and the ones nested in the conditional and the try blocks
+    """
+
+    for node in body:
+        yield node
+        for block in ("body", "orelse", "handlers", "finalbody"):
+            if isinstance(node, (ast.If, ast.Try, ast.ExceptHandler)) and hasattr(node, block):
+                yield from _module_statements(getattr(node, block))
+
+
+def _defines_class(module_name: str, class_name: str, depth: int = 0, trusted: bool = True) -> bool:
+    """
+    Statically check that a module defines, or imports, a class. The imports are followed to the module defining the class.
+    The modules that can't be parsed (ie : compiled extensions) are trusted, unless their names are star-imported.
+    """
+
+    try:
+        spec = _find_spec(module_name)
+    except (ImportError, ValueError):
+        return False
+    if spec is None or depth > 8:
+        return False
+
+    loader_state: Any = spec.loader_state
+    source = spec.origin if spec.has_location else getattr(loader_state, "filename", None)
+    if not source or not source.endswith(".py"):
+        return trusted and spec.origin is not None
+
+    try:
+        tree = ast.parse(Path(source).read_bytes(), filename=source)
+    except (OSError, SyntaxError, ValueError):
+        return False
+
+    package = module_name if spec.submodule_search_locations is not None else module_name.rpartition(".")[0]
+    for node in _module_statements(tree.body):  # type: ignore
+        if isinstance(node, ast.ClassDef) and node.name == class_name:
+            return True
+
+        if isinstance(node, ast.ImportFrom):
+            base = package.rsplit(".", node.level - 1)[0] if node.level else ""
+            imported = ".".join(part for part in (base, node.module) if part)
+            for alias in node.names:
+                if alias.name == "*" and _defines_class(imported, class_name, depth + 1, trusted=False):
+                    return True
+                if (alias.asname or alias.name) == class_name:
+                    return _defines_class(imported, alias.name, depth + 1)
+
+    return False
+
+
+def _iter_entry_points() -> Iterator[Tuple[str, str]]:
+    """
+    List the (name, "module:attribute") of the nuggets exposed through the entry points.
+    The distributions' entry_points.txt files are read directly : importlib.metadata is much slower to import than the scan itself.
+    """
+
+    distributions = set()
+    for entry in sys.path:
+        try:
+            files = sorted(Path(entry or ".").glob("*.*-info/entry_points.txt"))
+        except OSError:
+            continue
+
+        for path in files:
+            # The first distribution found on the path shadows the others, as for the imports
+            distribution = path.parent.name.split("-")[0].lower()
+            if distribution in distributions:
+                continue
+            distributions.add(distribution)
+
+            parser = configparser.ConfigParser(delimiters=("=",), interpolation=None)
+            parser.optionxform = str  # type: ignore
+            try:
+                parser.read(path, encoding="utf-8")
+            except (configparser.Error, UnicodeDecodeError):
+                continue
+
+            if parser.has_section(ENTRY_POINTS_GROUP):
+                for name, value in parser.items(ENTRY_POINTS_GROUP):
+                    # Drop the extras : "module:attribute [extra]"
+                    yield name, value.split("[")[0].strip()
+
+
+def _has_powernugget_section(path: Path) -> bool:
+    """
+    Check if a pyproject.toml has a powernugget section. An unreadable file is reported when the section is actually parsed.
+    """
+
+    if not path.exists():
+        return False
+
+    try:
+        with open(path, "rb") as f:
+            return bool(tomli.load(f).get("tool", {}).get("powernugget"))
+    except BaseException:
+        return True
+
+
+class NuggetRegistry:
+    """
+    Resolve nugget names to nugget classes. The discovery is lazy, and the resolved classes are memoized.
+    """
+
+    def __init__(self, custom_nuggets_repo: Optional[Path] = None):
+        """
+        Args:
+            custom_nuggets_repo (Path, optional): A folder holding the user's nuggets modules. Defaults to None.
+        """
+
+        self._custom_nuggets_repo = Path(custom_nuggets_repo) if custom_nuggets_repo else None
+        self._lock = threading.RLock()
+        self._names: Optional[Dict[str, str]] = None
+        self._classes: Dict[str, Type] = {}
+
+    @classmethod
+    def of_project(cls, path: Path) -> "NuggetRegistry":
+        """
+        Create the registry of a project : the `custom_nuggets_repo` is read from the project's pyproject.toml (if any), relative to the project's root
+
+        Args:
+            path (Path): The root of the project
+        """
+
+        path = Path(path)
+        if not _has_powernugget_section(path / "pyproject.toml"):
+            return cls()
+
+        # The section is validated against the Pyproject model : pydantic is only imported by the projects actually configuring powernugget
+        from powernugget.descriptions import _get_pyproject
+
+        config = _get_pyproject(path)
+        return cls(path / config.custom_nuggets_repo if config.custom_nuggets_repo else None)
+
+    def __getstate__(self):
+        return {"_custom_nuggets_repo": self._custom_nuggets_repo}
+
+    def __setstate__(self, state):
+        self.__init__(state["_custom_nuggets_repo"])
+
+    def _discover(self) -> Dict[str, str]:
+        """
+        Map the short names of the nuggets to their locations : "package.module:Class" or "/path/to/module.py:Class"
+        """
+
+        if self._names is not None:
+            return self._names
+
+        with self._lock:
+            if self._names is not None:
+                return self._names
+
+            names: Dict[str, str] = {}
+
+            def _add(location: str, class_name: str, nugget_name: Optional[str]):
+                for name in (_snake_case(class_name), nugget_name):
+                    if name:
+                        names.setdefault(name, location)
+
+            for path in sorted(_BUILTINS_PATH.glob("*.py")):
+                for class_name, nugget_name in _scan_module(path):
+                    _add(f"{_BUILTINS_PACKAGE}.{path.stem}:{class_name}", class_name, nugget_name)
+
+            if self._custom_nuggets_repo is not None:
+                for path in sorted(self._custom_nuggets_repo.glob("*.py")):
+                    for class_name, nugget_name in _scan_module(path):
+                        _add(f"{path.resolve()}:{class_name}", class_name, nugget_name)
+
+            # The entry points are explicitly named
+            for name, location in _iter_entry_points():
+                names[name] = location
+
+            self._names = names
+
+        return self._names
+
+    def names(self) -> Dict[str, str]:
+        """
+        The short names of the discovered nuggets, mapped to their location
+        """
+
+        return dict(self._discover())
+
+    def custom_sources(self) -> List[Path]:
+        """
+        The python files of the custom nuggets repo, the nuggets are discovered from
+        """
+
+        if self._custom_nuggets_repo is None:
+            return []
+
+        return sorted(path.resolve() for path in self._custom_nuggets_repo.glob("*.py"))
+
+    def _import_custom_module(self, path: Path):
+        """
+        Import a module of the custom nuggets repo, once
+        """
+
+        module_name = f"{_CUSTOM_NAMESPACE}.{path.stem}"
+        module = sys.modules.get(module_name)
+        if module is not None:
+            return module
+
+        spec = importlib.util.spec_from_file_location(module_name, path)
+        module = importlib.util.module_from_spec(spec)  # type: ignore
+        sys.modules[module_name] = module
+        try:
+            spec.loader.exec_module(module)  # type: ignore
+        except BaseException:
+            del sys.modules[module_name]
+            raise
+
+        return module
+
+    def _load(self, location: str) -> Type:
+        """
+        Import a nugget from it's location
+        """
+
+        module_name, _, attribute = location.rpartition(":")
+        if module_name.endswith(".py"):
+            module = self._import_custom_module(Path(module_name))
+        else:
+            module = import_module(module_name)
+
+        return getattr(module, attribute)
+
+    def resolve(self, name: str) -> Type:
+        """
+        Resolve a nugget name (a short name, or a fully qualified name) to it's class
+
+        Args:
+            name (str): The name of the nugget, as written in the tasks list
+        """
+
+        try:
+            return self._classes[name]
+        except KeyError:
+            pass
+
+        from powernugget.builtins.nugget import Nugget
+
+        with self._lock:
+            try:
+                location = self._discover().get(name)
+                if location is not None:
+                    nugget_class = self._load(location)
+                else:
+                    module_name, _, attribute = name.rpartition(".")
+                    nugget_class = getattr(import_module(module_name), attribute)
+            except BaseException as error:
+                raise Errors.E030(fqn=name) from error  # type: ignore
+
+            if not (isinstance(nugget_class, type) and issubclass(nugget_class, Nugget)):
+                raise Errors.E035(fqn=name)  # type: ignore
+
+            self._classes[name] = nugget_class
+
+        return nugget_class
+
+    def _is_known(self, name: str) -> bool:
+        """
+        Check if a name refers to a discovered nugget, or to a class of an existing module, without importing anything
+        """
+
+        if name in self._discover():
+            return True
+
+        module_name, _, class_name = name.rpartition(".")
+        return bool(module_name) and _defines_class(module_name, class_name)
+
+    def validate(self, names: Iterable[str], load: bool = True):
+        """
+        Check all the names at once, reporting all the unknown ones
+
+        Args:
+            names (Iterable[str]): The nugget names to check
+            load (bool, optional): Resolve the nuggets, importing them. Otherwise, the names are only checked against the discovered nuggets and the
+                classes statically found in the existing modules. Defaults to True.
+        """
+
+        unknown: List[str] = []
+        for name in dict.fromkeys(names):
+            if not load:
+                if not self._is_known(name):
+                    unknown.append(name)
+                continue
+
+            try:
+                self.resolve(name)
+            except Errors.E030:  # type: ignore
+                unknown.append(name)
+
+        if unknown:
+            raise Errors.E036(names=", ".join(unknown))  # type: ignore
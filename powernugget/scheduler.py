@@ -0,0 +1,113 @@
+#! /usr/bin/python3
+
+# scheduler.py
+#
+# Project name: power nugget
+# Author: Hugo Juhel
+#
+# description:
+"""
+Execute a graph of jobs on an executor : a job is only submitted once the jobs it depends on are complete.
+Jobs must be submitted after their dependencies, so the graph is acyclic by construction. A job one dependency of which failed is cancelled.
+"""
+
+#############################################################################
+#                                 Packages                                  #
+#############################################################################
+
+import threading
+from concurrent.futures import CancelledError, Executor, Future
+from typing import Any, Callable, Iterable, Optional
+
+#############################################################################
+#                                  Script                                   #
+#############################################################################
+
+
+def _transfer(source: Future, target: Future):
+    """
+    Copy the outcome of a future into an other one
+    """
+
+    if source.cancelled():
+        target.set_exception(CancelledError())
+        return
+
+    error = source.exception()
+    if error is not None:
+        target.set_exception(error)
+    else:
+        target.set_result(source.result())
+
+
+class DependencyScheduler:
+    """
+    Submit jobs to an executor once their dependencies are complete.
+    Waiting jobs don't hold any worker : a job is only handed to the executor when it's ready to run.
+    """
+
+    def __init__(self, executor: Executor, failed: Optional[Callable[[Future], bool]] = None):
+        """
+        Args:
+            executor (Executor): The executor running the jobs
+            failed (Callable[[Future], bool], optional): Tell if a completed job failed, for the jobs reporting their failures in their results.
+                The jobs that raised, or were cancelled, always failed.
+        """
+
+        self._executor = executor
+        self._failed = failed
+        self._lock = threading.Lock()
+
+    def _has_failed(self, future: Future) -> bool:
+        """
+        Check if a completed job failed
+        """
+
+        if future.cancelled() or future.exception() is not None:
+            return True
+        return self._failed is not None and self._failed(future)
+
+    def submit(self, fn: Callable[[], Any], after: Iterable[Future] = ()) -> Future:
+        """
+        Schedule a job
+
+        Args:
+            fn (Callable[[], Any]): The job
+            after (Iterable[Future], optional): The futures of the jobs to wait for. If one of them failed, the job is cancelled rather than run, and so
+                are it's own dependents.
+
+        Returns:
+            Future: The future of the job. A job can be cancelled as long as it has not been handed to the executor.
+        """
+
+        future: Future = Future()
+        dependencies = list(after)
+        remaining = [len(dependencies)]
+
+        def _start():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                self._executor.submit(fn).add_done_callback(lambda done: _transfer(done, future))
+            except BaseException as error:
+                future.set_exception(error)
+
+        def _release(_: Future):
+            with self._lock:
+                remaining[0] -= 1
+                ready = remaining[0] == 0
+            if not ready:
+                return
+            if any(self._has_failed(dependency) for dependency in dependencies):
+                future.cancel()
+                future.set_running_or_notify_cancel()
+            else:
+                _start()
+
+        if not dependencies:
+            _start()
+
+        for dependency in dependencies:
+            dependency.add_done_callback(_release)
+
+        return future
@@ -0,0 +1,171 @@
+#! /usr/bin/python3
+
+# sharding.py
+#
+# Project name: power nugget
+# Author: Hugo Juhel
+#
+# description:
+"""
+Split a run across several machines : each shard renders a stable partition of the inventory, and writes it's own build manifest and timings
+report. Once every shard is done, the partial manifests and reports are merged into single ones, and removed.
+
+By default, a dashboard is assigned to a shard by hashing it's name : the partition only depends on the names and on the number of shards,
+and the shards get about as many dashboards. Given the timings report of a previous run, the dashboards are rather assigned so that the shards
+get about as much work : the longest dashboards first, each to the least loaded shard. The dashboards missing from the report weigh as much as the
+average one.
+"""
+
+#############################################################################
+#                                 Packages                                  #
+#############################################################################
+
+import hashlib
+import heapq
+import json
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from powernugget.descriptions.sources import Entry, InventorySource
+from powernugget.errors import Errors
+from powernugget.manifest import MANIFEST_FILE_NAME, BuildManifest
+from powernugget.timings import RunReport
+
+#############################################################################
+#                                  Script                                   #
+#############################################################################
+
+REPORT_FILE_NAME = "powernugget-report.json"
+
+_SPEC = re.compile(r"^\s*(\d+)\s*/\s*(\d+)\s*$")
+
+
+@dataclass(frozen=True, order=True)
+class Shard:
+    """
+    The `index`-th of `count` shards, starting from 1
+    """
+
+    index: int
+    count: int
+
+    @staticmethod
+    def of(spec: str) -> "Shard":
+        """
+        Parse a "i/N" shard specification
+        """
+
+        match = _SPEC.match(str(spec))
+        if match is None or not 1 <= int(match.group(1)) <= int(match.group(2)):
+            raise Errors.E050(shard=spec)  # type: ignore
+
+        return Shard(index=int(match.group(1)), count=int(match.group(2)))
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+    @property
+    def suffix(self) -> str:
+        return f"shard-{self.index}-of-{self.count}"
+
+    def manifest_file_name(self) -> str:
+        return MANIFEST_FILE_NAME.replace(".json", f".{self.suffix}.json")
+
+    def report_file_name(self) -> str:
+        return REPORT_FILE_NAME.replace(".json", f".{self.suffix}.json")
+
+
+def _hash(name: str) -> int:
+    return int.from_bytes(hashlib.sha256(name.encode("utf-8")).digest()[:8], "big")
+
+
+def shard_of(name: str, count: int) -> int:
+    """
+    The shard of a dashboard, from it's name only
+    """
+
+    return _hash(name) % count + 1
+
+
+def load_weights(path: Path) -> Dict[str, float]:
+    """
+    The wall time of each dashboard of a previous run, from it's json timings report
+    """
+
+    try:
+        report = json.loads(Path(path).read_text(encoding="utf-8"))
+        return {name: sum(phase["wall"] for phase in dashboard["phases"].values()) for name, dashboard in report["dashboards"].items()}
+    except (OSError, ValueError, KeyError, TypeError, AttributeError) as error:
+        raise Errors.E051(path=path) from error  # type: ignore
+
+
+def balance(names: List[str], weights: Dict[str, float], count: int) -> Dict[str, int]:
+    """
+    Assign the dashboards to the shards, the heaviest first, each to the least loaded shard. Ties are broken by the names' hashes and the shards'
+    indexes, for the assignment to be the same on every machine.
+    """
+
+    known = [weights[name] for name in names if name in weights]
+    default = sum(known) / len(known) if known else 1.0
+
+    loads = [(0.0, index) for index in range(1, count + 1)]
+    assignment: Dict[str, int] = {}
+    for name in sorted(names, key=lambda name: (-weights.get(name, default), _hash(name), name)):
+        load, index = heapq.heappop(loads)
+        assignment[name] = index
+        heapq.heappush(loads, (load + weights.get(name, default), index))
+
+    return assignment
+
+
+class ShardedInventory(InventorySource):
+    """
+    The dashboards of an inventory belonging to a shard.
+    Without weights, the inventory is streamed. With weights, the names of the whole inventory are read first, to balance the shards.
+    """
+
+    def __init__(self, source: InventorySource, shard: Shard, weights: Optional[Dict[str, float]] = None):
+        super().__init__(source.path)
+        self._source = source
+        self._shard = shard
+        self._weights = weights
+
+    def __iter__(self) -> Iterator[Entry]:
+        if self._weights is None:
+            return (entry for entry in self._source if shard_of(entry[0], self._shard.count) == self._shard.index)
+
+        assignment = balance([name for name, _ in self._source], self._weights, self._shard.count)
+        return (entry for entry in self._source if assignment.get(entry[0]) == self._shard.index)
+
+
+def merge(path: Path, count: int, report_file_name: Optional[Path] = None) -> RunReport:
+    """
+    Merge the manifests and the timings reports written by the `count` shards of a run into the folder located at `path`.
+    The merged manifest replaces the run's manifest, and the merged report is written to `report_file_name`, defaulting to "powernugget-report.json".
+    The files of the shards are removed once merged. The files of the shards of an other count are ignored.
+    """
+
+    path = Path(path)
+    shards = [Shard(index=index, count=count) for index in range(1, count + 1)]
+    missing = [shard for shard in shards if not (path / shard.report_file_name()).exists()]
+    if missing:
+        raise Errors.E052(path=path, missing=", ".join(map(str, missing)))  # type: ignore
+
+    manifest = BuildManifest(path / MANIFEST_FILE_NAME)
+    reports = []
+    for shard in shards:
+        manifest.update(BuildManifest(path / shard.manifest_file_name()))
+        reports.append(RunReport.of(json.loads((path / shard.report_file_name()).read_text(encoding="utf-8"))))
+    manifest.save()
+
+    report = RunReport.merge(reports)
+    report.write(Path(report_file_name) if report_file_name is not None else path / REPORT_FILE_NAME)
+
+    # The shards are merged : their files must not be merged again with the ones of a later run
+    for shard in shards:
+        for file_name in (shard.manifest_file_name(), shard.report_file_name()):
+            (path / file_name).unlink(missing_ok=True)
+
+    return report
@@ -0,0 +1,80 @@
+#! /usr/bin/python3
+
+# sinks.py
+#
+# Project name: power nugget
+# Author: Hugo Juhel
+#
+# description:
+"""
+Result sinks : the results of each dashboard are handed to a sink as soon as the dashboard is rendered, in the inventory order.
+Streaming the results to a file, rather than keeping them in memory, keeps the memory of a run bounded whatever the size of the inventory.
+"""
+
+#############################################################################
+#                                 Packages                                  #
+#############################################################################
+
+import json
+from abc import ABCMeta, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, List
+
+from powernugget.builtins.nugget import NuggetResult
+
+#############################################################################
+#                                  Script                                   #
+#############################################################################
+
+
+class ResultSink(metaclass=ABCMeta):
+    """
+    Receive the results of the dashboards
+    """
+
+    @abstractmethod
+    def write(self, dashboard_name: str, results: List[NuggetResult]):
+        """
+        Receive the results of a dashboard, as soon as it's rendered
+        """
+
+        raise NotImplementedError("Must be implemented by the derived ResultSink")
+
+    def close(self):
+        """
+        Called once the run is over, even if it failed
+        """
+
+
+class SummarySink(ResultSink):
+    """
+    Keep the results in memory
+    """
+
+    def __init__(self):
+        self.summary: Dict[str, List[NuggetResult]] = {}
+
+    def write(self, dashboard_name: str, results: List[NuggetResult]):
+        self.summary[dashboard_name] = results
+
+
+def _as_dict(result: NuggetResult) -> Dict[str, Any]:
+    return {"name": result.name, "status": result.status.name, "result": result.result}
+
+
+class JsonLinesSink(ResultSink):
+    """
+    Append the results of each dashboard to a JSON lines file, as one line. The results that are not JSON serializable are written as strings.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = open(self.path, "w", encoding="utf-8")
+
+    def write(self, dashboard_name: str, results: List[NuggetResult]):
+        line = json.dumps({"dashboard": dashboard_name, "results": [_as_dict(result) for result in results]}, default=str)
+        self._file.write(line + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
@@ -15,53 +15,26 @@ Implements the task rendering logic
 #############################################################################
 
 
-from ast import literal_eval
-from typing import Any, Generator, List, Union, Dict
-from copy import deepcopy
-from functools import singledispatch
-
-from jinja2 import Template
-
-from powernugget.descriptions.models import Tasks_list, Task
-from powernugget.errors import Errors
+from collections import ChainMap
+from typing import Any, Iterator, Optional, Union
 
+from powernugget.builtins.nugget.models import Deferred
+from powernugget.descriptions.models import Tasks_list
+from powernugget.tasks_plan import CompiledTask, RenderedTask, TaskPlan
 
 #############################################################################
 #                                  Script                                   #
 #############################################################################
 
 
-@singledispatch
-def _render(src: Union[str, Dict, List], ctx: Dict[str, Any]):
+class _Registered(dict):
     """
-    Jinja2-render any yaml structure with a provided context.
-
-    Args:
-        src (Union[str, Dict, List]): The yaml structure to be templated
-        ctx (Dict[str, Any]): The rendering vars context
+    The layer of the registered outputs. The deferred outputs are evaluated on access.
     """
 
-    raise ValueError(f"Unsupported type {type(src)}")
-
-
-@_render.register(type(None))
-def _(src: None, ctx: Dict[str, Any]):
-    return None
-
-
-@_render.register(str)
-def _(src, ctx) -> str:
-    return Template(src).render(**ctx) or ""
-
-
-@_render.register(list)
-def _(src, ctx) -> List[str]:
-    return [_render(item, ctx) for item in src]
-
-
-@_render.register(dict)
-def _(src, ctx) -> Dict[str, Any]:
-    return {key: _render(value, ctx) for key, value in src.items()}
+    def __getitem__(self, name: str) -> Any:
+        value = super().__getitem__(name)
+        return value.value if isinstance(value, Deferred) else value
 
 
 class TaskGenerator:
@@ -69,60 +42,63 @@ class TaskGenerator:
     Implements the task rendering logic
     """
 
-    def __init__(self, tasks_list: Tasks_list, **initial_context):
-        self._tasks_list = tasks_list
-        self._initial_context = deepcopy(initial_context)  # As we are iterating over the tasks, we need to update the context
-
-    def __iter__(self) -> Generator[Task, None, None]:
+    def __init__(self, tasks: Union[Tasks_list, TaskPlan], **initial_context):
         """
-        Implements the iterator protocol.
-        Render a tasks_list into a generator of tasks
+        Args:
+            tasks (Union[Tasks_list, TaskPlan]): The tasks to render. A raw tasks list is compiled on the fly : prefer compiling it once into a TaskPlan.
+            initial_context: The rendering context of the dashboard. It is never copied nor updated : pass read-only views of any shared data.
         """
 
-        def _():
-            for task in self._tasks_list.tasks:
-                if task.loop:
-                    rendered_tasks = self._render_task_loop(task)
-                else:
-                    rendered_tasks = (self._render_task(task, self._initial_context),)
+        self._plan = tasks if isinstance(tasks, TaskPlan) else TaskPlan(tasks)
+        self._current: Optional[CompiledTask] = None
 
-                for task in rendered_tasks:
-                    yield task
+        # The context is layered : the outputs registered by the tasks are overlaid on top of the initial context,
+        # and each loop iteration only overlays it's own loop_key binding.
+        self._registered = _Registered()
+        self._initial_context: ChainMap = ChainMap(self._registered, initial_context)
 
-        return _()
-
-    def _render_task_loop(self, task) -> Generator[Task, None, None]:
+    def __iter__(self) -> Iterator[RenderedTask]:
         """
-        Expand a loop condition to render multiples tasks
+        Implements the iterator protocol.
+        Render a task plan into a generator of tasks
         """
 
-        # First render and parse the looping condition
-        loop = _render(task.loop, self._initial_context)
-        loop = literal_eval(loop)
+        for task in self._plan:
+            yield from self.render(task)
 
-        # Return a generator looping over each local task
-        def _():
+    def render(self, task: CompiledTask) -> Iterator[RenderedTask]:
+        """
+        Render a single task of the plan. A looping task is expanded into multiples tasks.
+        Once the task is rendered, the registered outputs no later task refers to are released.
+        """
+
+        self._current = task
 
-            # Each iterations has it's own context, we need to update it with the loop item
-            for item in loop:
-                this_iteration_context = deepcopy(self._initial_context)
-                this_iteration_context[task.loop_key] = item
-                yield self._render_task(task, this_iteration_context)
+        if task.loop is None:
+            yield task.render(self._initial_context)
+        else:
+            # Each iterations has it's own layer, holding the loop item
+            for item in task.iterate(self._initial_context):
+                yield task.render(self._initial_context.new_child({task.loop_key: item}))
 
-        return _()
+        self._release()
 
-    def _render_task(self, task: Task, context) -> Task:
+    def register(self, name: str, output: Any):
         """
-        Render a task with a rendering context
+        Register the output of a task, to be refered to by the following tasks under `name`.
+        The output is only kept if a following task refers to it.
         """
 
-        name = _render(task.name, context)
-        nugget = _render(task.nugget, context)
-        when = _render(task.when, context)
-        params = _render(task.params, context)
-        register_out = _render(task.register_out, context)
+        if name in self._plan.references_after(self._current):
+            self._registered[name] = output
 
-        # Pseudo-safe eval context for the when rendering
-        when = eval(when, context) if when else True
+    def _release(self):
+        """
+        Release the registered outputs no following task refers to
+        """
 
-        return Task(name=name, nugget=nugget, params=params, when=when, register_out=register_out)  # type: ignore
+        references = self._plan.references_after(self._current)
+        for name in [name for name in self._registered if name not in references]:
+            output = dict.pop(self._registered, name)
+            if isinstance(output, Deferred):
+                output.release()
@@ -0,0 +1,422 @@
+#! /usr/bin/python3
+
+# tasks_plan.py
+#
+# Project name: power nugget
+# Author: Hugo Juhel
+#
+# description:
+"""
+Compile a tasks list into a task plan : an execution representation parsed once and evaluated against every dashboard's context.
+Constant fields are resolved at compilation time, dynamic ones are compiled into callables.
+"""
+
+#############################################################################
+#                                 Packages                                  #
+#############################################################################
+
+from ast import literal_eval
+from collections import ChainMap
+from dataclasses import dataclass, field
+from functools import lru_cache, singledispatch
+from typing import TYPE_CHECKING, Any, Callable, Dict, FrozenSet, Iterator, List, Mapping, Optional, Type, Union
+from types import CodeType
+
+from powernugget.descriptions.models import Tasks_list, Task
+from powernugget.timings import TASK_RENDER, WHEN_EVAL, Timings, timed
+
+if TYPE_CHECKING:
+    from jinja2 import Environment, Template
+
+#############################################################################
+#                                  Script                                   #
+#############################################################################
+
+_TEMPLATE_CACHE_SIZE = 1024
+_JINJA_MARKERS = ("{{", "{%", "{#")
+
+# Resolve a nugget name to a nugget class
+Resolver = Callable[[str], Type]
+
+
+@lru_cache(maxsize=None)
+def _environment() -> "Environment":
+    """
+    The environment shared by all the renderings, so that templates are only compiled once per source string.
+    Jinja is only imported when the first template is compiled.
+    """
+
+    from jinja2 import Environment
+
+    return Environment()
+
+
+@lru_cache(maxsize=_TEMPLATE_CACHE_SIZE)
+def _compile_template(src: str) -> "Template":
+    """
+    Compile a jinja template. The compiled templates are cached, keyed on their source.
+    """
+
+    return _environment().from_string(src)
+
+
+@lru_cache(maxsize=_TEMPLATE_CACHE_SIZE)
+def _compile_expression(src: str) -> CodeType:
+    """
+    Compile a python expression (a `when` condition). The code objects are cached, keyed on their source.
+    """
+
+    return compile(src, "<when>", "eval")
+
+
+@lru_cache(maxsize=_TEMPLATE_CACHE_SIZE)
+def _code_names(code: CodeType) -> FrozenSet[str]:
+    """
+    List the global names a code object refers to, the ones of it's nested code objects (comprehensions, lambdas) included
+    """
+
+    return frozenset(code.co_names).union(*(_code_names(const) for const in code.co_consts if isinstance(const, CodeType)))
+
+
+@lru_cache(maxsize=_TEMPLATE_CACHE_SIZE)
+def _template_names(src: str) -> FrozenSet[str]:
+    """
+    List the context variables a jinja template refers to
+    """
+
+    from jinja2 import meta
+
+    return frozenset(meta.find_undeclared_variables(_environment().parse(src)))
+
+
+def _is_template(src: str) -> bool:
+    """
+    Check if a string contains any jinja marker and must actually be rendered.
+    Strings with carriage returns are always rendered, to let jinja normalize the newlines.
+    """
+
+    return "\r" in src or any(marker in src for marker in _JINJA_MARKERS)
+
+
+def _as_rendered(src: str) -> str:
+    """
+    Return a plain string as jinja would have rendered it : minus the single trailing newline.
+    """
+
+    return src[:-1] if src.endswith("\n") else src
+
+
+class Field:
+    """
+    A compiled field : a callable evaluating the field against a rendering context
+    """
+
+    constant: bool = False
+
+    def __call__(self, ctx: Mapping[str, Any]) -> Any:
+        raise NotImplementedError("Must be implemented by the derived Field")
+
+    @property
+    def names(self) -> FrozenSet[str]:
+        """
+        The context variables the field refers to
+        """
+
+        return frozenset()
+
+
+class Constant(Field):
+    """
+    A field resolved at compilation time
+    """
+
+    constant = True
+
+    def __init__(self, value: Any):
+        self.value = value
+
+    def __call__(self, ctx: Mapping[str, Any]) -> Any:
+        return self.value
+
+
+class Templated(Field):
+    """
+    A jinja templated string
+    """
+
+    def __init__(self, src: str):
+        self.src = src
+        self._template = _compile_template(src)
+
+    def __call__(self, ctx: Mapping[str, Any]) -> str:
+        """
+        Render the template. Unlike `Template.render`, the context is not copied : only the variables the template actually uses are read.
+        """
+
+        template = self._template
+        context = template.new_context(ChainMap(ctx, template.globals), shared=True)  # type: ignore
+        try:
+            return template.environment.concat(template.root_render_func(context)) or ""  # type: ignore
+        except Exception:
+            return template.environment.handle_exception()
+
+    @property
+    def names(self) -> FrozenSet[str]:
+        return _template_names(self.src)
+
+
+class Container(Field):
+    """
+    A dict or a list with, at least, one templated leaf. A fresh container is built at every evaluation.
+    """
+
+    def __init__(self, fields: Union[Dict[Any, Field], List[Field]]):
+        self._fields = fields
+
+    def __call__(self, ctx: Mapping[str, Any]) -> Union[Dict[Any, Any], List[Any]]:
+        if isinstance(self._fields, dict):
+            return {key: field(ctx) for key, field in self._fields.items()}
+        return [field(ctx) for field in self._fields]
+
+    @property
+    def names(self) -> FrozenSet[str]:
+        fields = self._fields.values() if isinstance(self._fields, dict) else self._fields
+        return frozenset().union(*(field.names for field in fields))
+
+
+class _ConstantContainer(Container):
+    """
+    A container without any templated leaf. Still evaluated into a fresh container, as nuggets might mutate their params.
+    """
+
+    constant = True
+
+    def __init__(self, src: Union[Dict[Any, Any], List[Any]], fields: Union[Dict[Any, Field], List[Field]]):
+        super().__init__(fields)
+        self.value = src
+
+
+@singledispatch
+def compile_field(src: Any) -> Field:
+    """
+    Compile any yaml structure into a field.
+    Scalars (numbers, booleans, None) are constants.
+
+    Args:
+        src (Any): The yaml structure to be compiled
+    """
+
+    return Constant(src)
+
+
+@compile_field.register(str)
+def _(src: str) -> Field:
+    return Templated(src) if _is_template(src) else Constant(_as_rendered(src))
+
+
+@compile_field.register(list)
+def _(src: list) -> Field:
+    fields = [compile_field(item) for item in src]
+    if all(field.constant for field in fields):
+        return _ConstantContainer(src, fields)
+    return Container(fields)
+
+
+@compile_field.register(dict)
+def _(src: dict) -> Field:
+    fields = {key: compile_field(value) for key, value in src.items()}
+    if all(field.constant for field in fields.values()):
+        return _ConstantContainer(src, fields)
+    return Container(fields)
+
+
+class Condition:
+    """
+    A compiled `when` condition.
+    Constant conditions are resolved once, static expressions are compiled once into code objects.
+    Templated expressions are rendered first, and the resulting code objects are cached by source.
+    """
+
+    def __init__(self, src: Optional[Union[bool, str]]):
+        self._value: Optional[bool] = None
+        self._code: Optional[CodeType] = None
+        self._template: Optional[Templated] = None
+
+        if src is None or isinstance(src, bool):
+            self._value = True if src is None else src
+        elif _is_template(src):
+            self._template = Templated(src)
+        elif src.strip():
+            self._code = _compile_expression(src)
+        else:
+            self._value = True
+
+    def __call__(self, ctx: Mapping[str, Any]) -> bool:
+        if self._value is not None:
+            return self._value
+
+        code = self._code
+        if code is None:
+            rendered = self._template(ctx)  # type: ignore
+            if not rendered:
+                return True
+            code = _compile_expression(rendered)
+
+        # Pseudo-safe eval context for the when rendering : only the variables the expression refers to are read
+        return eval(code, {name: ctx[name] for name in _code_names(code) if name in ctx})
+
+    @property
+    def names(self) -> FrozenSet[str]:
+        """
+        The context variables the condition refers to. The variables of a templated expression are only known once rendered : only the template's ones are listed.
+        """
+
+        if self._template is not None:
+            return self._template.names
+        return _code_names(self._code) if self._code is not None else frozenset()
+
+
+@dataclass
+class RenderedTask:
+    """
+    A task rendered against a dashboard's context, ready to be mapped to a nugget
+    """
+
+    name: str
+    nugget: str
+    nugget_class: Optional[Type]
+    params: Dict[str, Any]
+    when: bool
+    register_out: Optional[str]
+    on_error: str
+    timings: Timings = field(default_factory=dict)
+
+
+class CompiledTask:
+    """
+    A single task of the plan.
+    """
+
+    def __init__(self, task: Task, resolver: Optional[Resolver] = None):
+        self.task = task
+        self.name = compile_field(task.name)
+        self.nugget = compile_field(task.nugget)
+        self.params = compile_field(task.params or {})
+        self.when = Condition(task.when)
+        self.register_out = compile_field(task.register_out)
+        self.loop_key = task.loop_key
+        self.on_error = task.on_error or "raise"
+
+        # The nugget class is resolved once if it does not depend on the context.
+        self._resolver = resolver
+        self.nugget_class: Optional[Type] = None
+        if resolver and self.nugget.constant:
+            self.nugget_class = resolver(self.nugget.value)  # type: ignore
+
+        # A static loop is parsed once
+        self.loop: Optional[Field] = None
+        if task.loop:
+            self.loop = compile_field(task.loop)
+            if self.loop.constant:
+                self.loop = Constant(literal_eval(self.loop.value))  # type: ignore
+
+    @property
+    def references(self) -> FrozenSet[str]:
+        """
+        The context variables the task refers to, the loop variable excepted
+        """
+
+        fields = (self.name, self.nugget, self.params, self.when, self.register_out, self.loop)
+        names = frozenset().union(*(field.names for field in fields if field is not None))
+        return names - {self.loop_key} if self.loop is not None else names
+
+    def iterate(self, ctx: Mapping[str, Any]) -> List[Any]:
+        """
+        Evaluate the looping condition
+        """
+
+        loop = self.loop(ctx)  # type: ignore
+        return literal_eval(loop) if isinstance(loop, str) else loop
+
+    def render(self, ctx: Mapping[str, Any]) -> RenderedTask:
+        """
+        Render the task against a dashboard's context
+        """
+
+        timings: Timings = {}
+        with timed(timings, WHEN_EVAL):
+            when = self.when(ctx)
+
+        with timed(timings, TASK_RENDER):
+            nugget = self.nugget(ctx)
+
+            # A templated nugget is only resolved if the task is to be executed
+            nugget_class = self.nugget_class
+            if nugget_class is None and self._resolver and when:
+                nugget_class = self._resolver(nugget)
+
+            return RenderedTask(
+                name=self.name(ctx),
+                nugget=nugget,
+                nugget_class=nugget_class,
+                params=self.params(ctx),
+                when=when,
+                register_out=self.register_out(ctx),
+                on_error=self.on_error,
+                timings=timings,
+            )
+
+
+def constant_nuggets(tasks_list: Tasks_list) -> List[str]:
+    """
+    The names of the nuggets that do not depend on the context, in order of appearance
+    """
+
+    return [_as_rendered(task.nugget) for task in tasks_list.tasks if not _is_template(task.nugget)]
+
+
+class TaskPlan:
+    """
+    A tasks list compiled once, to be evaluated against every dashboard's context
+    """
+
+    def __init__(self, tasks_list: Tasks_list, resolver: Optional[Resolver] = None):
+        """
+        Compile a tasks list
+
+        Args:
+            tasks_list (Tasks_list): The tasks list to compile
+            resolver (Resolver, optional): A callable resolving a nugget name to a nugget class. If omitted, the nuggets are not resolved.
+        """
+
+        self._tasks_list = tasks_list
+        self._resolver = resolver
+        self.tasks = [CompiledTask(task, resolver) for task in tasks_list.tasks]
+
+        # The variables refered to by the tasks following each task
+        self._references_after: Dict[int, FrozenSet[str]] = {}
+        names: FrozenSet[str] = frozenset()
+        for task in reversed(self.tasks):
+            self._references_after[id(task)] = names
+            names = names | task.references
+        self._references = names
+
+    def references_after(self, task: Optional[CompiledTask]) -> FrozenSet[str]:
+        """
+        The variables refered to by the tasks following a task, or by all the tasks if the task is None
+        """
+
+        return self._references if task is None else self._references_after[id(task)]
+
+    def __iter__(self) -> Iterator[CompiledTask]:
+        return iter(self.tasks)
+
+    def __len__(self) -> int:
+        return len(self.tasks)
+
+    def __reduce__(self):
+        """
+        Compiled templates can't be pickled : the plan is recompiled from the tasks list when shipped to a worker process
+        """
+
+        return TaskPlan, (self._tasks_list, self._resolver)
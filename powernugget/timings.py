@@ -0,0 +1,200 @@
+#! /usr/bin/python3
+
+# timings.py
+#
+# Project name: power nugget
+# Author: Hugo Juhel
+#
+# description:
+"""
+Instrumentation of a run : the wall and CPU time spent in each phase, for the whole run, for each dashboard and for each task.
+
+The CPU time is the CPU time of the thread executing the phase. With the asyncio backend, the nuggets are awaited from the event loop : the CPU time of
+their `run`, offloaded to the loop's executor, is not accounted for.
+"""
+
+#############################################################################
+#                                 Packages                                  #
+#############################################################################
+
+import json
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from powernugget.tracing import span
+
+#############################################################################
+#                                  Script                                   #
+#############################################################################
+
+# The phases of a run
+LOAD = "load"  # Parse the inventory, the tasks and the vars, and compile the plan
+TEMPLATE_OPEN = "template_open"  # Index the template and parse it's data model and layout
+CONTEXT_BUILD = "context_build"  # Create the dashboard's copy-on-write views and rendering context
+TASK_RENDER = "task_render"  # Render the task's fields and resolve the nugget
+WHEN_EVAL = "when_eval"  # Evaluate the task's condition
+NUGGET_RUN = "nugget_run"  # Execute the nugget
+SERIALIZE = "serialize"  # Encode the modified data model and layout, the encoded members being compressed as they are streamed
+ARCHIVE = "archive"  # Write the dashboard's archive, the serialization excepted
+
+# The phases of a dashboard, in execution order
+DASHBOARD_PHASES = (CONTEXT_BUILD, TASK_RENDER, WHEN_EVAL, NUGGET_RUN, SERIALIZE, ARCHIVE)
+
+Timings = Dict[str, "Timing"]
+
+
+@dataclass
+class Timing:
+    """
+    The time spent in a phase, in seconds
+    """
+
+    wall: float = 0.0
+    cpu: float = 0.0
+
+    def __add__(self, other: "Timing") -> "Timing":
+        return Timing(wall=self.wall + other.wall, cpu=self.cpu + other.cpu)
+
+    def __sub__(self, other: "Timing") -> "Timing":
+        return Timing(wall=max(self.wall - other.wall, 0.0), cpu=max(self.cpu - other.cpu, 0.0))
+
+
+@contextmanager
+def timed(timings: Timings, phase: str) -> Iterator[None]:
+    """
+    Add the time spent in the block to the phase's timing. The block is timed even if it raises.
+    The phase is also recorded as a span, if a tracer is installed (see `powernugget.tracing`).
+    """
+
+    wall, cpu = time.perf_counter(), time.thread_time()
+    try:
+        with span(phase):
+            yield
+    finally:
+        elapsed = Timing(wall=time.perf_counter() - wall, cpu=time.thread_time() - cpu)
+        timings[phase] = timings.get(phase, Timing()) + elapsed
+
+
+def merge(timings: Iterable[Timings]) -> Timings:
+    """
+    Sum the timings phase by phase
+    """
+
+    merged: Timings = {}
+    for timing in timings:
+        for phase, value in timing.items():
+            merged[phase] = merged.get(phase, Timing()) + value
+
+    return merged
+
+
+def _as_dict(timings: Timings) -> Dict[str, Dict[str, float]]:
+    return {phase: asdict(timing) for phase, timing in timings.items()}
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class RunReport:
+    """
+    The timings of a run : the run's own phases, and the phases of each dashboard and of each of it's tasks.
+    The report can be written as json, or as a Prometheus textfile (without the tasks, to keep the metrics' cardinality bounded).
+    """
+
+    def __init__(self):
+        self.phases: Timings = {}
+        self.dashboards: Dict[str, Dict[str, Any]] = {}
+        self._start = time.perf_counter()
+        self.wall: Optional[float] = None
+
+    def add_dashboard(self, name: str, phases: Timings, results: List[Any]):
+        """
+        Record a dashboard's own phases (context build, serialization, archive) and the results of it's tasks
+        """
+
+        tasks = [
+            {"name": result.name, "status": result.status.name, "phases": _as_dict(result.timings)} for result in results if result.timings
+        ]
+        merged = merge([phases, *(result.timings for result in results)])
+        self.dashboards[name] = {"phases": {phase: merged[phase] for phase in DASHBOARD_PHASES if phase in merged}, "tasks": tasks}
+
+    def close(self):
+        self.wall = time.perf_counter() - self._start
+
+    @staticmethod
+    def of(raw: Dict[str, Any]) -> "RunReport":
+        """
+        Load a report from it's json form
+        """
+
+        report = RunReport()
+        report.wall = raw.get("wall")
+        report.phases = {phase: Timing(**timing) for phase, timing in raw.get("phases", {}).items()}
+        report.dashboards = {
+            name: {"phases": {phase: Timing(**timing) for phase, timing in dashboard["phases"].items()}, "tasks": dashboard["tasks"]}
+            for name, dashboard in raw.get("dashboards", {}).items()
+        }
+        return report
+
+    @staticmethod
+    def merge(reports: Iterable["RunReport"]) -> "RunReport":
+        """
+        Merge the reports of runs executed side by side (ie : the shards of a run) : the phases are summed, and the wall time is the longest one
+        """
+
+        reports = list(reports)
+        merged = RunReport()
+        merged.phases = merge(report.phases for report in reports)
+        for report in reports:
+            merged.dashboards.update(report.dashboards)
+        merged.wall = max((report.wall or 0.0 for report in reports), default=0.0)
+        return merged
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "wall": self.wall,
+            "phases": _as_dict(self.phases),
+            "dashboards": {
+                name: {"phases": _as_dict(dashboard["phases"]), "tasks": dashboard["tasks"]} for name, dashboard in self.dashboards.items()
+            },
+        }
+
+    def to_prometheus(self) -> str:
+        lines = [
+            "# HELP powernugget_run_seconds The wall time of the last run.",
+            "# TYPE powernugget_run_seconds gauge",
+            f"powernugget_run_seconds {self.wall or 0.0}",
+            "# HELP powernugget_phase_seconds The time spent in each phase of the last run.",
+            "# TYPE powernugget_phase_seconds gauge",
+        ]
+        for phase, timing in self.phases.items():
+            for clock, value in asdict(timing).items():
+                lines.append(f'powernugget_phase_seconds{{phase="{phase}",clock="{clock}"}} {value}')
+
+        lines.append("# HELP powernugget_dashboard_phase_seconds The time spent in each phase of each dashboard of the last run.")
+        lines.append("# TYPE powernugget_dashboard_phase_seconds gauge")
+        for name, dashboard in self.dashboards.items():
+            for phase, timing in dashboard["phases"].items():
+                for clock, value in asdict(timing).items():
+                    lines.append(
+                        f'powernugget_dashboard_phase_seconds{{dashboard="{_escape(name)}",phase="{phase}",clock="{clock}"}} {value}'
+                    )
+
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: Path):
+        """
+        Write the report : as a Prometheus textfile if the file's suffix is ".prom", as json otherwise.
+        The file is replaced atomically, as the Prometheus node exporter may read it at any time.
+        """
+
+        path = Path(path)
+        content = self.to_prometheus() if path.suffix == ".prom" else json.dumps(self.to_dict(), indent=2)
+
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(content)
+        tmp.replace(path)
@@ -0,0 +1,149 @@
+#! /usr/bin/python3
+
+# tracing.py
+#
+# Project name: power nugget
+# Author: Hugo Juhel
+#
+# description:
+"""
+An opt-in tracer, exporting the spans of a run to a Chrome trace-event file (to be loaded in Perfetto or chrome://tracing).
+
+    run
+     └─ play <dashboard>
+         ├─ context_build
+         ├─ task <task>
+         │   ├─ when_eval / task_render
+         │   └─ nugget_run
+         └─ serialize / archive
+
+The spans are complete ("X") events : they are nested by their start time and duration, per thread. The timestamps are taken from the wall clock,
+so that the spans recorded by the worker processes can be merged into the main process's trace.
+When no tracer is installed, a span is a no-op.
+"""
+
+#############################################################################
+#                                 Packages                                  #
+#############################################################################
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+#############################################################################
+#                                  Script                                   #
+#############################################################################
+
+Event = Dict[str, Any]
+
+# The tracer of the process, if any
+_TRACER: Optional["Tracer"] = None
+
+
+class Tracer:
+    """
+    Collect the spans of the process's threads
+    """
+
+    def __init__(self, process_name: str = "powernugget"):
+        self._lock = threading.Lock()
+        self.pid = os.getpid()
+        self.events: List[Event] = [{"name": "process_name", "ph": "M", "pid": self.pid, "tid": 0, "args": {"name": process_name}}]
+
+    def add(self, event: Event):
+        with self._lock:
+            self.events.append(event)
+
+    def extend(self, events: List[Event]):
+        """
+        Merge the events recorded by an other tracer (ie : a worker process's)
+        """
+
+        with self._lock:
+            self.events.extend(events)
+
+    def write(self, path: Path):
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f)
+
+
+@contextmanager
+def span(name: str, /, **args: Any) -> Iterator[None]:
+    """
+    Record the block as a span of the current thread, if a tracer is installed
+    """
+
+    tracer = _TRACER
+    if tracer is None:
+        yield
+        return
+
+    ts, start = time.time_ns() // 1000, time.perf_counter()
+    try:
+        yield
+    finally:
+        event = {
+            "name": name,
+            "ph": "X",
+            "ts": ts,
+            "dur": (time.perf_counter() - start) * 1e6,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+        }
+        if args:
+            event["args"] = args
+        tracer.add(event)
+
+
+def extend(events: List[Event]):
+    """
+    Merge the events recorded by a worker process into the process's tracer, if any
+    """
+
+    if _TRACER is not None and events:
+        _TRACER.extend(events)
+
+
+@contextmanager
+def tracing(path: Optional[Path]) -> Iterator[Optional[Tracer]]:
+    """
+    Install a tracer for the duration of the block, and write it's events to `path`. A no-op if the path is None.
+    """
+
+    global _TRACER
+
+    if path is None:
+        yield None
+        return
+
+    _TRACER = tracer = Tracer()
+    try:
+        yield tracer
+    finally:
+        _TRACER = None
+        tracer.write(Path(path))
+
+
+@contextmanager
+def buffered(enabled: bool) -> Iterator[List[Event]]:
+    """
+    Record the spans of a worker process, to be shipped back to the main process.
+    Yield the recorded events. If tracing is disabled, or if the process already has it's own tracer (ie : a worker thread), nothing is buffered.
+    A tracer inherited from a forked parent is shadowed : the events it would record would never reach the parent.
+    """
+
+    global _TRACER
+
+    if not enabled or (_TRACER is not None and _TRACER.pid == os.getpid()):
+        yield []
+        return
+
+    inherited, _TRACER = _TRACER, Tracer(process_name=f"powernugget worker {os.getpid()}")
+    try:
+        yield _TRACER.events
+    finally:
+        _TRACER = inherited
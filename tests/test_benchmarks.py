@@ -0,0 +1,59 @@
+#! /usr/bin/python3
+
+# test_benchmarks.py
+#
+# Project name: Power Nugget
+# Author: Hugo Juhel
+#
+# description:
+"""
+    Test the synthetic projects and the regression check of the benchmark suite
+"""
+
+#############################################################################
+#                                 Packages                                  #
+#############################################################################
+
+from benchmarks.bench_suite import compare, run_case
+from benchmarks.synthetic import TemplateSpec, synthetic_project
+from powernugget.builtins.nugget import NuggetExecutionStatus
+from powernugget.dashboard.pbit import PowerBIOpener
+
+#############################################################################
+#                                   Script                                  #
+#############################################################################
+
+
+def test_synthetic_project(tmp_path):
+
+    spec = TemplateSpec(pages=3, visuals=4, tables=2, measures=3, images=2, data_model_mb=0.1)
+    synthetic_project(tmp_path, spec, dashboards=2, loop_items=3)
+
+    with PowerBIOpener(tmp_path / "dashboard_template.pbit") as factory:
+        dashboard, _ = factory("dashboard_0")
+        assert len(dashboard.select("page:*")) == 3
+        assert len(dashboard.select("page:Page 1/visual:*")) == 4
+        assert len(dashboard.select("table:table_1/measure:*")) == 3
+
+    from powernugget import Nuggetizer
+
+    summary = Nuggetizer(path=tmp_path).execute()
+    assert list(summary) == ["dashboard_0", "dashboard_1"]
+    for results in summary.values():
+        # The color remapping loop, the images loop and the last task
+        assert [result.status for result in results] == [NuggetExecutionStatus.SUCCESS] * (3 + 2 + 1)
+
+    result = run_case("open", tmp_path)
+    assert result["seconds"] > 0 and result["peak_rss_mb"] > 0
+
+
+def test_compare_to_baselines():
+
+    baselines = {"open[small]": {"seconds": 1.0, "peak_rss_mb": 100.0}}
+    thresholds = {"seconds": 0.25, "peak_rss_mb": 0.1}
+
+    assert compare({"open[small]": {"seconds": 1.2, "peak_rss_mb": 109.0}}, baselines, thresholds) == []
+    assert compare({"execute[small]": {"seconds": 9.0, "peak_rss_mb": 900.0}}, baselines, thresholds) == []
+
+    regressions = compare({"open[small]": {"seconds": 1.3, "peak_rss_mb": 111.0}}, baselines, thresholds)
+    assert [regression.split(" : ")[0] for regression in regressions] == ["open[small] seconds", "open[small] peak_rss_mb"]
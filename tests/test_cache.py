@@ -0,0 +1,96 @@
+#! /usr/bin/python3
+
+# test_cache.py
+#
+# Project name: Power Nugget
+# Author: Hugo Juhel
+#
+# description:
+"""
+    Test the on-disk cache, and the caching of the parsed templates
+"""
+
+#############################################################################
+#                                 Packages                                  #
+#############################################################################
+
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from powernugget.cache import DiskCache
+from powernugget.dashboard import PowerBIOpener
+from powernugget.dashboard import codec
+
+#############################################################################
+#                                   Script                                  #
+#############################################################################
+
+
+def test_cache_roundtrip(tmp_path):
+
+    cache = DiskCache(tmp_path)
+    assert cache.get("key") is None
+
+    cache.put("key", {"a": [1, 2, "3"]})
+    assert cache.get("key") == {"a": [1, 2, "3"]}
+
+    cache.invalidate("key")
+    assert cache.get("key") is None
+
+
+def test_cache_ignores_corrupted_entries(tmp_path):
+
+    cache = DiskCache(tmp_path)
+    cache.put("key", "value")
+    cache._path("key").write_bytes(b"not a pickle")
+
+    assert cache.get("key") is None
+    assert not cache._path("key").exists()
+
+
+def test_cache_evicts_least_recently_used_entries(tmp_path):
+
+    cache = DiskCache(tmp_path, max_size=10_000)
+    for i, key in enumerate(("a", "b")):
+        cache.put(key, b"x" * 4_000)
+        os.utime(cache._path(key), (i, i))
+
+    # Reading "a" makes "b" the least recently used entry
+    assert cache.get("a") is not None
+    cache.put("c", b"x" * 4_000)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.size() <= 10_000
+
+    cache.clear()
+    assert cache.size() == 0
+
+
+def test_opener_reuses_the_cached_template(tmp_path, monkeypatch):
+    """
+    Once cached, the template must not be parsed again
+    """
+
+    template_path = tmp_path / "dashboard_template.pbit"
+    shutil.copy(Path("tests/test_repo/dashboard_template.pbit"), template_path)
+    cache = DiskCache(tmp_path / "cache")
+
+    with PowerBIOpener(template_path, cache=cache) as factory:
+        expected = factory._data, factory._layout
+
+    def _fail(raw):
+        raise AssertionError("The template should not be parsed")
+
+    monkeypatch.setattr(codec, "loads", _fail)
+    with PowerBIOpener(template_path, cache=cache) as factory:
+        assert (factory._data, factory._layout) == expected
+
+    # Once cleared, the template is parsed again
+    cache.clear()
+    with pytest.raises(Exception):
+        with PowerBIOpener(template_path, cache=cache):
+            pass
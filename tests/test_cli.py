@@ -0,0 +1,120 @@
+#! /usr/bin/python3
+
+# test_cli.py
+#
+# Project name: Power Nugget
+# Author: Hugo Juhel
+#
+# description:
+"""
+    Test the command line interface
+"""
+
+#############################################################################
+#                                 Packages                                  #
+#############################################################################
+
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from benchmarks.bench_startup import HEAVY_MODULES, imported_modules
+from powernugget.cli import cli
+
+#############################################################################
+#                                   Script                                  #
+#############################################################################
+
+
+@pytest.mark.parametrize(
+    "args, heavy_modules",
+    [
+        (["--help"], HEAVY_MODULES + ("pydantic", "yaml")),
+        (["list-nuggets", "tests/test_repo"], HEAVY_MODULES + ("pydantic", "yaml")),
+        (["validate", "tests/test_repo"], HEAVY_MODULES),
+    ],
+)
+def test_cli_startup_is_lazy(args, heavy_modules):
+    """
+    Check that the fast commands don't import the heavy dependencies
+    """
+
+    modules = set(imported_modules(["-m", "powernugget", *args]))
+    assert not modules & set(heavy_modules)
+
+
+def test_cli_list_and_validate():
+
+    runner = CliRunner()
+
+    result = runner.invoke(cli, ["list-nuggets", "tests/test_repo"])
+    assert result.exit_code == 0
+    assert "replace_image " in result.output and "debug " in result.output
+
+    result = runner.invoke(cli, ["validate", "tests/test_repo"])
+    assert result.exit_code == 0, result.output
+    assert "2 dashboards, 2 tasks" in result.output
+
+
+def test_cli_validate_reports_unknown_nuggets(tmp_path):
+
+    shutil.copy(Path("tests/test_repo/inventory.yaml"), tmp_path / "inventory.yaml")
+    (tmp_path / "tasks.yaml").write_text("- name: Missing\n  nugget: missing\n- name: Debug\n  nugget: powernugget.builtins.Debug\n")
+
+    result = CliRunner().invoke(cli, ["validate", str(tmp_path)])
+    assert result.exit_code == 1
+    assert "E036" in result.output and "missing" in result.output
+
+
+def test_cli_validate_reports_misspelled_fully_qualified_nuggets(tmp_path):
+    """
+    A fully qualified name is checked against the classes of it's module, without importing it
+    """
+
+    shutil.copy(Path("tests/test_repo/inventory.yaml"), tmp_path / "inventory.yaml")
+    (tmp_path / "tasks.yaml").write_text(
+        "- name: Typo\n  nugget: powernugget.builtins.Typo\n- name: Module\n  nugget: os.path\n"
+        "- name: Debug\n  nugget: powernugget.builtins.Debug\n- name: Image\n  nugget: powernugget.builtins.replace_image.ReplaceImage\n"
+    )
+
+    result = CliRunner().invoke(cli, ["validate", str(tmp_path)])
+    assert result.exit_code == 1
+    assert "powernugget.builtins.Typo, os.path." in result.output
+
+    (tmp_path / "tasks.yaml").write_text(
+        "- name: Debug\n  nugget: powernugget.builtins.Debug\n- name: Image\n  nugget: powernugget.builtins.replace_image.ReplaceImage\n"
+    )
+    modules = set(imported_modules(["-m", "powernugget", "validate", str(tmp_path)]))
+    assert "powernugget.builtins" not in modules and "powernugget.builtins.replace_image" not in modules
+
+
+def test_cli_plan(tmp_path):
+
+    shutil.copy(Path("tests/test_repo/inventory.yaml"), tmp_path / "inventory.yaml")
+    shutil.copy(Path("tests/test_repo/tasks.yaml"), tmp_path / "tasks.yaml")
+
+    result = CliRunner().invoke(cli, ["plan", str(tmp_path), "--dashboard", "cssvdc", "--output", str(tmp_path / "plan.json")])
+    assert result.exit_code == 0, result.output
+
+    plan = json.loads((tmp_path / "plan.json").read_text())
+    assert list(plan) == ["cssvdc"]
+    assert plan["cssvdc"][-1]["name"] == "Print an other debug message : cssvdc"
+
+
+def test_cli_run_and_inspect_template(tmp_path):
+
+    for name in ("dashboard_template.pbit", "inventory.yaml", "tasks.yaml"):
+        shutil.copy(Path("tests/test_repo") / name, tmp_path / name)
+
+    runner = CliRunner()
+
+    result = runner.invoke(cli, ["run", str(tmp_path)])
+    assert result.exit_code == 0, result.output
+    assert "cssdc: success=1, passed=2" in result.output
+
+    result = runner.invoke(cli, ["inspect-template", str(tmp_path / "dashboard_template.pbit")])
+    assert result.exit_code == 0, result.output
+    assert "Report/Layout" in result.output and "Pages :" in result.output
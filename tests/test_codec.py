@@ -0,0 +1,44 @@
+#! /usr/bin/python3
+
+# test_codec.py
+#
+# Project name: Power Nugget
+# Author: Hugo Juhel
+#
+# description:
+"""
+    Test the UTF-16 json codec of the PBIT members
+"""
+
+#############################################################################
+#                                 Packages                                  #
+#############################################################################
+
+import json
+from io import BytesIO
+
+from powernugget.dashboard import codec
+
+#############################################################################
+#                                   Script                                  #
+#############################################################################
+
+
+def test_streamed_encoding_matches_the_standard_library():
+    """
+    The streamed encoding must produce the very same bytes as json.dumps
+    """
+
+    payload = {"model": {"tables": [{"name": "Ventes", "measures": [{"name": "Revenu é", "value": 1.5}]}], "empty": {}}, 1: None, "list": [[], [1, [2]]]}
+
+    buffer = BytesIO()
+    codec.dump(payload, buffer)
+
+    assert buffer.getvalue() == json.dumps(payload).encode("utf-16-le")
+
+
+def test_decoding_handles_the_bom():
+
+    raw = ("\ufeff" + json.dumps({"a": [1, 2]})).encode("utf-16-le")
+
+    assert codec.loads(raw) == {"a": [1, 2]}
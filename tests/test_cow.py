@@ -0,0 +1,106 @@
+#! /usr/bin/python3
+
+# test_cow.py
+#
+# Project name: Power Nugget
+# Author: Hugo Juhel
+#
+# description:
+"""
+    Test the copy-on-write views over the dashboard template
+"""
+
+#############################################################################
+#                                 Packages                                  #
+#############################################################################
+
+import copy
+import json
+import pickle
+
+from powernugget.dashboard.cow import CowDict, CowList, unwrap
+
+#############################################################################
+#                                   Script                                  #
+#############################################################################
+
+
+def _template():
+    return {"model": {"tables": [{"name": "Sales", "measures": [{"name": "Revenue"}]}, {"name": "Dates", "columns": []}]}, "version": 1}
+
+
+def test_untouched_view_shares_the_template():
+    """
+    An untouched view must be unwrapped into the template itself
+    """
+
+    template = _template()
+    view = CowDict(template)
+
+    assert view["model"]["tables"][0]["name"] == "Sales"
+    assert view == template
+    assert not view.dirty
+    assert unwrap(view) is template
+
+
+def test_mutations_are_isolated_and_only_materialize_their_path():
+    """
+    A mutation must not leak into the template nor into other views, and untouched subtrees must be reused
+    """
+
+    template = _template()
+    view, other = CowDict(template), CowDict(template)
+
+    view["model"]["tables"][0]["measures"].append({"name": "Margin"})
+    view["version"] = 2
+
+    out = unwrap(view)
+
+    assert view.dirty and not other.dirty
+    assert template == _template()
+    assert out["version"] == 2
+    assert [m["name"] for m in out["model"]["tables"][0]["measures"]] == ["Revenue", "Margin"]
+    assert out["model"]["tables"][1] is template["model"]["tables"][1]
+    assert unwrap(other) is template
+
+
+def test_views_behave_as_plain_containers():
+    """
+    The views must be usable wherever a dict or a list is expected, without leaking the template's containers
+    """
+
+    template = _template()
+    view = CowDict(template)
+    tables = view["model"]["tables"]
+
+    assert isinstance(view, dict) and isinstance(tables, list) and isinstance(tables, CowList)
+    assert json.loads(json.dumps(view)) == template
+    assert {**view} == view.copy() == template
+    assert tables + [{"name": "Budget"}] == template["model"]["tables"] + [{"name": "Budget"}]
+    assert [{"name": "Budget"}] + tables == [{"name": "Budget"}] + template["model"]["tables"]
+
+    # The nested containers returned by the copies are views : mutating them leaves the template untouched
+    tables.copy()[0]["name"] = "Orders"
+    {**view}["model"]["tables"].sort(key=lambda table: table["name"])
+    view.copy()["version"] = 2
+
+    assert template == _template()
+    assert [table["name"] for table in unwrap(view)["model"]["tables"]] == ["Dates", "Orders"]
+    assert unwrap(view)["version"] == 1
+    assert pickle.loads(pickle.dumps(view)) == copy.deepcopy(view) == unwrap(view)
+
+
+def test_reading_a_view_does_not_mark_it_mutated():
+    """
+    A view whose nested containers were read, or replaced by themselves, must be unwrapped into the template
+    """
+
+    template = _template()
+    view = CowDict(template)
+
+    json.dumps(view)
+    measures = view["model"]["tables"][0]["measures"]
+    measures.append(measures.pop())
+
+    assert not view.dirty
+    assert unwrap(view) is template
@@ -62,3 +62,46 @@ def test_simple_tasks_list_loading():
     task = tasks_list.tasks[0]
 
     assert task.nugget == "powernugget.builtins.debug"
+
+
+def test_json_inventory_loading(tmp_path):
+    """
+    Check that a json inventory is loaded as the yaml one
+    """
+
+    import json
+    import yaml
+
+    from powernugget.descriptions import _default_inventory
+
+    raw = yaml.safe_load(Path("tests/test_repo/inventory.yaml").read_text())
+    (tmp_path / "inventory.json").write_text(json.dumps(raw))
+
+    assert _default_inventory(tmp_path) == tmp_path / "inventory.json"
+    inventory: Inventory = _deserialize_yaml_as(tmp_path / "inventory.json", Inventory)  # type: ignore
+    assert inventory == _deserialize_yaml_as(Path("tests/test_repo/inventory.yaml"), Inventory)
+
+
+def test_validated_models_are_cached(tmp_path, monkeypatch):
+    """
+    Check that the validated models are served from the cache as long as the file's content does not change
+    """
+
+    from powernugget.cache import DiskCache
+    from powernugget.descriptions import yaml as loader
+
+    path = tmp_path / "tasks.yaml"
+    path.write_text("- name: Debug\n  nugget: debug\n  params:\n    msg: Hello\n")
+    cache = DiskCache(tmp_path / "cache")
+
+    tasks_list = _deserialize_yaml_as(path, Tasks_list, cache)  # type: ignore
+
+    # A cache hit does not parse the file
+    parse = loader._parse
+    monkeypatch.setattr(loader, "_parse", lambda *args: pytest.fail("The file should not be parsed"))
+    assert _deserialize_yaml_as(path, Tasks_list, cache) == tasks_list  # type: ignore
+
+    # A changed file is parsed again
+    monkeypatch.setattr(loader, "_parse", parse)
+    path.write_text("- name: Debug\n  nugget: debug\n  params:\n    msg: Bye\n")
+    assert _deserialize_yaml_as(path, Tasks_list, cache).tasks[0].params == {"msg": "Bye"}  # type: ignore
@@ -0,0 +1,82 @@
+#! /usr/bin/python3
+
+# test_index.py
+#
+# Project name: Power Nugget
+# Author: Hugo Juhel
+#
+# description:
+"""
+    Test the index and the selectors over the dashboard layout and data model
+"""
+
+#############################################################################
+#                                 Packages                                  #
+#############################################################################
+
+import json
+import pytest
+from pathlib import Path
+
+from powernugget.dashboard import Dashboard
+
+#############################################################################
+#                                   Script                                  #
+#############################################################################
+
+
+@pytest.fixture
+def dashboard():
+    """
+    A standalone dashboard, indexing itself
+    """
+
+    data_model = {
+        "model": {
+            "tables": [
+                {"name": "Sales", "measures": [{"name": "Total Revenue"}, {"name": "Margin"}], "columns": [{"name": "Date"}]},
+                {"name": "Dates", "columns": [{"name": "Date"}, {"name": "Year"}]},
+            ]
+        }
+    }
+    title = {"title": [{"properties": {"text": {"expr": {"Literal": {"Value": "'Revenue by year'"}}}}}]}
+    layout = {
+        "sections": [
+            {
+                "name": "ReportSection1",
+                "displayName": "Overview",
+                "visualContainers": [
+                    {"config": json.dumps({"name": "v1", "singleVisual": {"visualType": "card", "vcObjects": title}})},
+                    {"config": json.dumps({"name": "v2", "singleVisual": {"visualType": "slicer"}})},
+                ],
+            }
+        ]
+    }
+
+    return Dashboard(path=Path("."), data_model=data_model, layout=layout)
+
+
+def test_lookups(dashboard):
+
+    assert [page.name for page in dashboard.lookup("page", "Overview")] == ["ReportSection1"]
+    assert [visual.name for visual in dashboard.lookup("visual", "Revenue by year")] == ["v1"]
+    assert [visual.visual_type for visual in dashboard.lookup("visual", "v2")] == ["slicer"]
+    assert len(dashboard.lookup("column", "Date")) == 2
+
+
+def test_selectors(dashboard):
+
+    assert [m["name"] for m in dashboard.select("table:Sales/measure:*Revenue*")] == ["Total Revenue"]
+    assert [c["name"] for c in dashboard.select("table:Dates/column:*")] == ["Date", "Year"]
+    assert [v.name for v in dashboard.select("page:Overview/visual:*")] == ["v1", "v2"]
+    assert dashboard.select("table:Missing/measure:*") == []
+
+    with pytest.raises(ValueError):
+        dashboard.select("page:Overview/measure:*")
+
+
+def test_selected_objects_are_editable(dashboard):
+
+    dashboard.select("table:Sales/measure:Margin")[0]["name"] = "Gross Margin"
+
+    assert dashboard.data_model["model"]["tables"][0]["measures"][1]["name"] == "Gross Margin"
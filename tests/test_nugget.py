@@ -32,3 +32,85 @@ def test_debug_nugget(caplog):
     nugget = Debug(dashboard=dashboard, msg="Hello world")
     result = nugget.run()
     # assert "" in caplog.text  # TO DO fix the test as the log is not currently not captured
+
+
+def test_blob_store_is_bounded(tmp_path):
+    """
+    The least recently used contents are evicted once the store exceeds it's budget
+    """
+
+    from powernugget.builtins.images import BlobStore
+
+    paths = []
+    for i in range(3):
+        paths.append(tmp_path / f"image_{i}.png")
+        paths[-1].write_bytes(bytes([i]) * 100)
+
+    store = BlobStore(max_bytes=250)
+    assert [store.get(path)[1] for path in paths[:2]] == [False, False]
+    assert store.get(paths[0])[1] is True
+
+    # The third image evicts the least recently used one : the second
+    assert store.get(paths[2])[1] is False
+    assert store.size == 200
+    assert [store.get(path)[1] for path in (paths[0], paths[2], paths[1])] == [True, True, False]
+
+    # A content larger than the budget is served, but not kept
+    large = tmp_path / "large.png"
+    large.write_bytes(b"\x00" * 300)
+    assert store.get(large)[0].content == large.read_bytes()
+    assert store.get(large)[1] is False and store.size <= 250
+
+
+def test_replace_images_nugget(tmp_path):
+
+    import pytest
+    from powernugget.builtins import ReplaceImages
+    from powernugget.builtins.images import STORE
+    from powernugget.dashboard import PowerBIOpener
+
+    STORE.clear()
+    png = tmp_path / "logo.png"
+    png.write_bytes(b"\x89PNG\r\n\x1a\n" + b"\x00" * 100)
+    jpeg = tmp_path / "logo.jpeg"
+    jpeg.write_bytes(b"\xff\xd8\xff" + b"\x00" * 100)
+
+    images = {"EducationQuebec8704543159446443.png": str(png), "warning_(1)24312744375340234.png": str(png)}
+    with PowerBIOpener(Path("tests/test_repo/dashboard_template.pbit")) as factory:
+
+        # The shared image is read once, for the first dashboard
+        reports = []
+        for name in ("first", "second"):
+            dashboard, _ = factory(name)
+            reports.append(ReplaceImages(dashboard=dashboard, images=images).run())
+            assert dashboard.read_member("Report/StaticResources/RegisteredResources/warning_(1)24312744375340234.png") == png.read_bytes()
+
+        assert reports[0] == {"replaced": 2, "bytes_read": 108, "bytes_saved": 108}
+        assert reports[1] == {"replaced": 2, "bytes_read": 0, "bytes_saved": 216}
+
+        # The images formats must match, unless explicitly allowed
+        dashboard, _ = factory("third")
+        with pytest.raises(ValueError):
+            ReplaceImages(dashboard=dashboard, images={"EducationQuebec8704543159446443.png": str(jpeg)}).run()
+        assert not dashboard.replaced_members
+
+        ReplaceImages(dashboard=dashboard, images={"EducationQuebec8704543159446443.png": str(jpeg)}, allow_format_change=True).run()
+        assert dashboard.replaced_members
+
+
+def test_synchronous_nugget_can_be_awaited():
+
+    import asyncio
+    from powernugget.builtins import Debug
+    from powernugget.dashboard import Dashboard
+    from powernugget.logger import buffered_logs
+
+    dashboard = Dashboard(path=Path("."), data_model={}, layout={})
+
+    # The offloaded run must log into the caller's context
+    async def _run():
+        with buffered_logs() as records:
+            await Debug(dashboard=dashboard, msg="Hello world").arun()
+        return records
+
+    assert [msg for _, _, msg in asyncio.run(_run())] == ["Hello world"]
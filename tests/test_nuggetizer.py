@@ -16,6 +16,7 @@
 
 from typing import List, Dict
 from pathlib import Path
+import shutil
 import pytest
 from powernugget.builtins.nugget import NuggetResult, NuggetExecutionStatus
 
@@ -45,3 +46,319 @@ def test_nuggetizer_execute(ngtz):
     results = [item for v in summary.values() for item in v]
 
     assert results[0].status == NuggetExecutionStatus.SUCCESS
+
+
+@pytest.mark.parametrize("backend", ["process", "thread", "asyncio"])
+def test_nuggetizer_execute_concurrently(ngtz, backend):
+    """
+    Check that a concurrent execution returns the same summary, in the same order, as a sequential one
+    """
+
+    sequential = ngtz.execute()
+    concurrent = ngtz.execute(workers=2, backend=backend)
+
+    assert list(concurrent) == list(sequential)
+    assert [[r.status for r in v] for v in concurrent.values()] == [[r.status for r in v] for v in sequential.values()]
+
+
+@pytest.mark.parametrize("backend", ["process", "thread", "asyncio"])
+def test_nuggetizer_execute_concurrently_fails_fast(tmp_path, backend):
+    """
+    Check that a failling mandatory task is raised from the workers, along with it's cause
+    """
+
+    from powernugget import Nuggetizer
+    from powernugget.errors import Errors
+
+    shutil.copy(Path("tests/test_repo/dashboard_template.pbit"), tmp_path / "dashboard_template.pbit")
+    shutil.copy(Path("tests/test_repo/inventory.yaml"), tmp_path / "inventory.yaml")
+    (tmp_path / "tasks.yaml").write_text(
+        "- name: Replace a missing image\n"
+        "  nugget: powernugget.builtins.ReplaceImage\n"
+        "  params:\n"
+        "    source_name: missing.png\n"
+        "    target_path: does/not/exist.png\n"
+    )
+
+    with pytest.raises(Errors.E031) as error:  # type: ignore
+        Nuggetizer(path=tmp_path).execute(workers=2, backend=backend)
+
+    # The cause, and it's traceback, are kept across the workers boundary
+    cause = error.value.__cause__
+    assert isinstance(cause, ValueError) and "missing.png" in str(cause)
+    assert cause.__traceback__ is not None or "Traceback" in str(cause.__cause__)
+
+
+_MARKER_NUGGET = """
+from pathlib import Path
+from powernugget.builtins.nugget import Nugget
+
+
+class Marker(Nugget):
+
+    nugget_name: str = "marker"
+
+    def __init__(self, *, dashboard, marker=""):
+        super().__init__(dashboard=dashboard)
+        self._marker = marker
+
+    def run(self):
+        if not self._marker:
+            raise RuntimeError("No marker")
+        Path(self._marker).touch()
+"""
+
+
+def test_nuggetizer_execute_tasks_concurrently_stops_after_a_failure(tmp_path):
+    """
+    Check that a task conflicting with a failed mandatory task is never executed
+    """
+
+    from powernugget import Nuggetizer
+    from powernugget.errors import Errors
+
+    shutil.copy(Path("tests/test_repo/dashboard_template.pbit"), tmp_path / "dashboard_template.pbit")
+    shutil.copy(Path("tests/test_repo/inventory.yaml"), tmp_path / "inventory.yaml")
+    (tmp_path / "nuggets").mkdir()
+    (tmp_path / "nuggets" / "marker.py").write_text(_MARKER_NUGGET)
+    (tmp_path / "pyproject.toml").write_text('[tool.powernugget]\ncustom_nuggets_repo = "nuggets"\n')
+    (tmp_path / "tasks.yaml").write_text(
+        "- name: Fail\n"
+        "  nugget: marker\n"
+        "- name: Mark\n"
+        "  nugget: marker\n"
+        "  params:\n"
+        f"    marker: {tmp_path / 'marked'}\n"
+    )
+
+    with pytest.raises(Errors.E031):  # type: ignore
+        Nuggetizer(path=tmp_path).execute(task_workers=2)
+
+    assert not (tmp_path / "marked").exists()
+
+
+def test_nuggetizer_execute_unsupported_backend(ngtz):
+
+    from powernugget.errors import Errors
+
+    with pytest.raises(Errors.E032):  # type: ignore
+        ngtz.execute(workers=2, backend="gpu")
+
+
+def test_nuggetizer_execute_incrementally(tmp_path):
+    """
+    Check that only the dashboards whose inputs changed are rendered again
+    """
+
+    from powernugget import Nuggetizer
+
+    shutil.copy(Path("tests/test_repo/dashboard_template.pbit"), tmp_path / "dashboard_template.pbit")
+    shutil.copy(Path("tests/test_repo/inventory.yaml"), tmp_path / "inventory.yaml")
+    (tmp_path / "logo.png").write_bytes(b"\x89PNG\r\n\x1a\nfirst")
+    (tmp_path / "tasks.yaml").write_text(
+        "- name: Replace the logo\n"
+        "  nugget: powernugget.builtins.ReplaceImage\n"
+        "  params:\n"
+        "    source_name: EducationQuebec8704543159446443.png\n"
+        "    target_path: " + str(tmp_path / "logo.png") + "\n"
+        "  when: dashboard_name == 'cssdc'\n"
+    )
+
+    def _statuses(summary):
+        return {name: [r.status for r in results] for name, results in summary.items()}
+
+    first = Nuggetizer(path=tmp_path).execute(incremental=True)
+    assert _statuses(first) == {"cssvdc": [NuggetExecutionStatus.PASSED], "cssdc": [NuggetExecutionStatus.SUCCESS]}
+
+    second = Nuggetizer(path=tmp_path).execute(incremental=True)
+    assert all(statuses == [NuggetExecutionStatus.UP_TO_DATE] for statuses in _statuses(second).values())
+
+    # Only the dashboard reading the image must be rendered again
+    (tmp_path / "logo.png").write_bytes(b"\x89PNG\r\n\x1a\nsecond")
+    third = Nuggetizer(path=tmp_path).execute(incremental=True)
+    assert _statuses(third) == {"cssvdc": [NuggetExecutionStatus.UP_TO_DATE], "cssdc": [NuggetExecutionStatus.SUCCESS]}
+
+    # A missing output is rendered again
+    (tmp_path / "cssvdc.pbit").unlink()
+    fourth = Nuggetizer(path=tmp_path).execute(incremental=True)
+    assert _statuses(fourth)["cssvdc"] == [NuggetExecutionStatus.PASSED]
+
+
+_FLAKY_NUGGET = """
+from powernugget.builtins.nugget import Nugget
+from powernugget.logger import MixinLogable
+
+
+class Flaky(Nugget, MixinLogable):
+
+    nugget_name: str = "flaky"
+
+    def __init__(self, *, dashboard, who=""):
+        super().__init__(logger_name="flaky", dashboard=dashboard)
+        self._fail = who == "cssdc"
+
+    def run(self):
+        if self._fail:
+            raise RuntimeError("Flaky")
+        return "{result}"
+"""
+
+
+def test_nuggetizer_execute_incrementally_rebuilds_failures_and_custom_nuggets(tmp_path):
+    """
+    Check that a dashboard with an ignored failure, or built by an edited custom nugget, is rendered again
+    """
+
+    from powernugget import Nuggetizer
+
+    shutil.copy(Path("tests/test_repo/dashboard_template.pbit"), tmp_path / "dashboard_template.pbit")
+    shutil.copy(Path("tests/test_repo/inventory.yaml"), tmp_path / "inventory.yaml")
+    (tmp_path / "nuggets").mkdir()
+    (tmp_path / "nuggets" / "flaky.py").write_text(_FLAKY_NUGGET.format(result="first"))
+    (tmp_path / "pyproject.toml").write_text('[tool.powernugget]\ncustom_nuggets_repo = "nuggets"\n')
+    (tmp_path / "tasks.yaml").write_text(
+        "- name: Flaky\n"
+        "  nugget: flaky\n"
+        "  params:\n"
+        "    who: '{{ dashboard_name }}'\n"
+        "  on_error: ignore\n"
+    )
+
+    def _statuses(summary):
+        return {name: [r.status for r in results] for name, results in summary.items()}
+
+    first = Nuggetizer(path=tmp_path).execute(incremental=True)
+    assert _statuses(first) == {"cssvdc": [NuggetExecutionStatus.SUCCESS], "cssdc": [NuggetExecutionStatus.FAILED]}
+
+    # The failed dashboard is not up to date
+    second = Nuggetizer(path=tmp_path).execute(incremental=True)
+    assert _statuses(second) == {"cssvdc": [NuggetExecutionStatus.UP_TO_DATE], "cssdc": [NuggetExecutionStatus.FAILED]}
+
+    # Editing a custom nugget invalidates every dashboard
+    (tmp_path / "nuggets" / "flaky.py").write_text(_FLAKY_NUGGET.format(result="second"))
+    third = Nuggetizer(path=tmp_path).execute(incremental=True)
+    assert _statuses(third)["cssvdc"] == [NuggetExecutionStatus.SUCCESS]
+
+
+def test_nuggetizer_execute_independent_tasks_concurrently():
+    """
+    Check that executing the tasks concurrently returns the same summary as a sequential execution
+    """
+
+    from powernugget import Nuggetizer
+
+    ngtz = Nuggetizer(path=Path("tests/test_repo_integration/").absolute())
+    sequential = ngtz.execute()
+    concurrent = ngtz.execute(task_workers=4)
+    both = ngtz.execute(workers=2, backend="thread", task_workers=2)
+
+    for summary in (concurrent, both):
+        assert list(summary) == list(sequential)
+        assert [[r.status for r in v] for v in summary.values()] == [[r.status for r in v] for v in sequential.values()]
+
+
+def test_nuggetizer_execute_tasks_concurrently_unsupported_by_asyncio(ngtz):
+
+    from powernugget.errors import Errors
+
+    with pytest.raises(Errors.E034):  # type: ignore
+        ngtz.execute(workers=2, backend="asyncio", task_workers=2)
+
+
+@pytest.mark.parametrize("task_workers", [None, 2])
+def test_nuggetizer_registered_outputs_feed_the_following_tasks(tmp_path, task_workers):
+
+    from powernugget import Nuggetizer
+
+    shutil.copy(Path("tests/test_repo/dashboard_template.pbit"), tmp_path / "dashboard_template.pbit")
+    shutil.copy(Path("tests/test_repo/inventory.yaml"), tmp_path / "inventory.yaml")
+    (tmp_path / "logo.png").write_bytes(b"\x89PNG\r\n\x1a\nlogo")
+    (tmp_path / "tasks.yaml").write_text(
+        "- name: Replace the logo\n"
+        "  nugget: powernugget.builtins.ReplaceImages\n"
+        "  params:\n"
+        "    images:\n"
+        "      EducationQuebec8704543159446443.png: " + str(tmp_path / "logo.png") + "\n"
+        "  register: report\n"
+        "- name: Report\n"
+        "  nugget: powernugget.builtins.Debug\n"
+        "  params:\n"
+        "    msg: Replaced {{ report['replaced'] }} images\n"
+        "  when: report['replaced'] == 1\n"
+        "- name: Not reached\n"
+        "  nugget: powernugget.builtins.Debug\n"
+        "  params:\n"
+        "    msg: Nothing\n"
+        "  when: report['replaced'] == 2\n"
+    )
+
+    summary = Nuggetizer(path=tmp_path).execute(task_workers=task_workers)
+    for results in summary.values():
+        assert [r.status for r in results] == [NuggetExecutionStatus.SUCCESS, NuggetExecutionStatus.SUCCESS, NuggetExecutionStatus.PASSED]
+        assert results[0].result["replaced"] == 1
+
+
+def test_nuggetizer_plan(tmp_path):
+    """
+    Check that the tasks are rendered without executing them, nor opening the template
+    """
+
+    from powernugget import Nuggetizer
+    from powernugget.errors import Errors
+
+    # No template : the plan must not need it
+    shutil.copy(Path("tests/test_repo/inventory.yaml"), tmp_path / "inventory.yaml")
+    (tmp_path / "tasks.yaml").write_text(
+        "- name: Replace the logo of {{ dashboard_name }}\n"
+        "  nugget: replace_images\n"
+        "  params:\n"
+        "    images:\n"
+        "      logo.png: '{{ dashboard_name }}.png'\n"
+        "  register: report\n"
+        "- name: Report\n"
+        "  nugget: debug\n"
+        "  params:\n"
+        "    msg: Replaced {{ report['replaced'] }} images\n"
+        "  when: report['replaced'] == 1\n"
+        "- name: Excluded\n"
+        "  nugget: debug\n"
+        "  params:\n"
+        "    msg: Nothing\n"
+        "  when: dashboard_name != 'cssdc'\n"
+    )
+
+    plan = Nuggetizer(path=tmp_path).plan(["cssdc"])
+    assert list(plan) == ["cssdc"]
+
+    replace, report, excluded = plan["cssdc"]
+    assert replace["name"] == "Replace the logo of cssdc"
+    assert replace["nugget_class"] == "powernugget.builtins.replace_images.ReplaceImages"
+    assert replace["params"] == {"images": {"logo.png": "cssdc.png"}}
+    assert replace["when"] is True and replace["register"] == "report"
+    assert report["deferred"] == ["report"]
+    assert excluded["when"] is False
+
+    assert not list(tmp_path.glob("*.pbit"))
+
+    with pytest.raises(Errors.E037):  # type: ignore
+        Nuggetizer(path=tmp_path).plan(["unknown"])
+
+
+def test_nuggetizer_magics_are_serializable(tmp_path):
+    """
+    Check that the vars and the dashboard data are exposed as plain dicts to the templates' filters
+    """
+
+    from powernugget import Nuggetizer
+
+    shutil.copy(Path("tests/test_repo/inventory.yaml"), tmp_path / "inventory.yaml")
+    (tmp_path / "vars.yaml").write_text("owner: finance\n")
+    (tmp_path / "tasks.yaml").write_text(
+        "- name: Dump\n"
+        "  nugget: debug\n"
+        "  params:\n"
+        "    msg: '{{ vars | tojson }} {{ dashboard_data.color_remapping.outer | tojson }}'\n"
+    )
+
+    (dump,) = Nuggetizer(path=tmp_path).plan(["cssdc"])["cssdc"]
+    assert dump["params"]["msg"] == '{"owner": "finance"} {"from": "red", "to": "bleu"}'
@@ -0,0 +1,169 @@
+#! /usr/bin/python3
+
+# test_pbit.py
+#
+# Project name: Power Nugget
+# Author: Hugo Juhel
+#
+# description:
+"""
+    Test the opening and the writing of the PowerBI templates
+"""
+
+#############################################################################
+#                                 Packages                                  #
+#############################################################################
+
+import json
+import shutil
+import zipfile
+from pathlib import Path
+
+from powernugget.dashboard import PowerBIOpener
+from powernugget.dashboard.archive import TemplateArchive
+from powernugget.dashboard.cow import unwrap
+
+#############################################################################
+#                                   Script                                  #
+#############################################################################
+
+_LOGO = "Report/StaticResources/RegisteredResources/EducationQuebec8704543159446443.png"
+
+
+def test_dashboard_is_written_from_the_template(tmp_path):
+    """
+    Unchanged members must be copied as is, modified ones must be rewritten, and the security bindings dropped
+    """
+
+    template_path = tmp_path / "dashboard_template.pbit"
+    shutil.copy(Path("tests/test_repo/dashboard_template.pbit"), template_path)
+
+    with PowerBIOpener(template_path) as factory:
+        dashboard, close = factory("out")
+        dashboard.layout["sections"][0]["displayName"] = "Renamed"
+        dashboard.replace_member(_LOGO, b"not really a png")
+        close()
+
+    with zipfile.ZipFile(template_path) as template, zipfile.ZipFile(tmp_path / "out.pbit") as out:
+        assert out.testzip() is None
+        assert "SecurityBindings" not in out.namelist()
+        assert out.read(_LOGO) == b"not really a png"
+        assert out.getinfo("DataModelSchema").compress_size == template.getinfo("DataModelSchema").compress_size
+        assert out.read("DataModelSchema") == template.read("DataModelSchema")
+
+        layout = json.loads(out.read("Report/Layout").decode("utf-16-le"))
+        assert layout["sections"][0]["displayName"] == "Renamed"
+
+
+def test_dashboard_path_is_unpacked_on_access(tmp_path):
+    """
+    The members are only unpacked if a nugget accesses the dashboard's folder, and the files modified there are written back
+    """
+
+    template_path = tmp_path / "dashboard_template.pbit"
+    shutil.copy(Path("tests/test_repo/dashboard_template.pbit"), template_path)
+
+    with PowerBIOpener(template_path) as factory:
+        dashboard, close = factory("out")
+        assert dashboard.target_path == tmp_path / "out.pbit"
+        assert "path" not in vars(dashboard)
+
+        folder = dashboard.path
+        (folder / _LOGO).write_bytes(b"written by a legacy nugget")
+        (folder / "Report" / "extra.json").write_bytes(b"{}")
+        (folder / "Settings").unlink()
+        dashboard.replace_member("Metadata", b"replaced through the API")
+        close()
+
+    assert not folder.exists()
+    with zipfile.ZipFile(template_path) as template, zipfile.ZipFile(tmp_path / "out.pbit") as out:
+        assert out.read(_LOGO) == b"written by a legacy nugget"
+        assert out.read("Report/extra.json") == b"{}"
+        assert out.read("Metadata") == b"replaced through the API"
+        assert "Settings" not in out.namelist()
+        assert out.read("DataModelSchema") == template.read("DataModelSchema")
+        assert "SecurityBindings" not in out.namelist()
+
+
+def test_only_modified_visuals_are_reencoded(tmp_path):
+    """
+    The visuals' embedded documents are decoded lazily, and only the modified ones are re-encoded
+    """
+
+    template_path = tmp_path / "dashboard_template.pbit"
+    shutil.copy(Path("tests/test_repo/dashboard_template.pbit"), template_path)
+
+    with PowerBIOpener(template_path) as factory:
+        dashboard, close = factory("out")
+        first, second = list(dashboard.visuals())[:2]
+
+        assert first.name and second.visual_type
+        first.config["singleVisual"]["visualType"] = "card"
+        close()
+
+    with zipfile.ZipFile(template_path) as template, zipfile.ZipFile(tmp_path / "out.pbit") as out:
+        original = json.loads(template.read("Report/Layout").decode("utf-16-le"))["sections"][0]["visualContainers"]
+        written = json.loads(out.read("Report/Layout").decode("utf-16-le"))["sections"][0]["visualContainers"]
+
+    assert json.loads(written[0]["config"])["singleVisual"]["visualType"] == "card"
+    assert written[1]["config"] == original[1]["config"]
+    assert unwrap(dashboard.layout)["sections"][1] is factory._layout["sections"][1]
+
+
+def test_members_are_read_lazily_from_the_template(tmp_path):
+    """
+    Members must be served from the archive, without being extracted
+    """
+
+    template_path = Path("tests/test_repo/dashboard_template.pbit")
+    with zipfile.ZipFile(template_path) as archive:
+        expected = {name: archive.read(name) for name in archive.namelist()}
+
+    with PowerBIOpener(template_path) as factory:
+        dashboard, _ = factory("dashboard")
+        template = dashboard.template
+
+        for name, content in expected.items():
+            assert dashboard.read_member(name) == content
+            assert bytes(template.view(name)) == content
+            with template.open(name) as handle:
+                assert handle.read(16) == content[:16]
+
+        # A replaced member is read from it's replacement
+        dashboard.replace_member(_LOGO, b"new logo")
+        with dashboard.open_member(_LOGO) as handle:
+            assert handle.read() == b"new logo"
+
+    # Stored members are served from the memory-mapped archive
+    stored_path = tmp_path / "stored.pbit"
+    with zipfile.ZipFile(stored_path, "w", compression=zipfile.ZIP_STORED) as archive:
+        archive.writestr("a.png", b"first image")
+        archive.writestr("b.png", b"second image")
+
+    stored = TemplateArchive(stored_path)
+    assert bytes(stored.view("b.png")) == b"second image"
+    assert bytes(stored.view("a.png")) == b"first image"
+
+
+def test_template_is_unmapped_on_close(tmp_path):
+    """
+    The memory map of the template is released when the opener exits, even if views over it are still alive
+    """
+
+    # The template's members stored without compression, to be memory-mapped
+    template_path = tmp_path / "dashboard_template.pbit"
+    with zipfile.ZipFile("tests/test_repo/dashboard_template.pbit") as src, zipfile.ZipFile(template_path, "w") as dst:
+        for name in src.namelist():
+            dst.writestr(name, src.read(name))
+        logo = src.read(_LOGO)
+
+    with PowerBIOpener(template_path) as factory:
+        template = factory._template
+        assert bytes(template.view(_LOGO)) == logo
+        assert template._mmap is not None
+    assert template._mmap is None
+
+    # A view still alive defers the unmapping until it's released
+    view = template.view(_LOGO)
+    template.close()
+    assert bytes(view) == logo and template._mmap is None
@@ -0,0 +1,130 @@
+#! /usr/bin/python3
+
+# test_registry.py
+#
+# Project name: Power Nugget
+# Author: Hugo Juhel
+#
+# description:
+"""
+    Test the nuggets registry
+"""
+
+#############################################################################
+#                                 Packages                                  #
+#############################################################################
+
+import pickle
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+from powernugget.errors import Errors
+from powernugget.registry import NuggetRegistry
+
+#############################################################################
+#                                   Script                                  #
+#############################################################################
+
+_CUSTOM_NUGGET = """
+from powernugget.builtins.nugget import Nugget
+from powernugget.logger import MixinLogable
+
+
+class Greet(Nugget, MixinLogable):
+
+    nugget_name: str = "say_hello"
+
+    def __init__(self, *, dashboard, who="world"):
+        super().__init__(logger_name=Greet.nugget_name, dashboard=dashboard)
+        self._who = who
+
+    def run(self):
+        return f"Hello {self._who}"
+
+
+class NotANugget:
+    pass
+"""
+
+
+def test_registry_resolves_short_names():
+
+    from powernugget.builtins import Debug, ReplaceImage, ReplaceImages
+
+    registry = NuggetRegistry()
+    assert registry.resolve("debug") is Debug
+    assert registry.resolve("debug_nugget") is Debug
+    assert registry.resolve("replace_image") is ReplaceImage
+    assert registry.resolve("replace_images") is ReplaceImages
+    assert registry.resolve("powernugget.builtins.Debug") is Debug
+
+    # The resolved classes are memoized
+    assert registry._classes["replace_image"] is ReplaceImage
+
+    with pytest.raises(Errors.E030):  # type: ignore
+        registry.resolve("does_not_exist")
+
+    with pytest.raises(Errors.E035):  # type: ignore
+        registry.resolve("pathlib.Path")
+
+
+def test_registry_discovers_custom_nuggets_lazily(tmp_path):
+
+    (tmp_path / "greetings.py").write_text(_CUSTOM_NUGGET)
+    registry = NuggetRegistry(tmp_path)
+
+    # The custom modules are scanned, not imported
+    assert "greet" in registry.names() and "say_hello" in registry.names()
+    assert "not_a_nugget" not in registry.names()
+    assert "powernugget_custom_nuggets.greetings" not in sys.modules
+
+    greet = registry.resolve("say_hello")
+    assert greet.__name__ == "Greet"
+    assert registry.resolve("greet") is greet
+
+    # The registry is shipped to the worker processes
+    assert pickle.loads(pickle.dumps(registry)).resolve("greet") is greet
+
+
+def test_registry_reports_all_unknown_nuggets():
+
+    with pytest.raises(Errors.E036, match="unknown_a, unknown_b"):  # type: ignore
+        NuggetRegistry().validate(["debug", "unknown_a", "unknown_b", "unknown_a"])
+
+
+def test_nuggetizer_uses_the_custom_nuggets_repo(tmp_path):
+    """
+    Check that the nuggets of the custom_nuggets_repo defined in the pyproject.toml can be used by their short names
+    """
+
+    from powernugget import Nuggetizer
+    from powernugget.builtins.nugget import NuggetExecutionStatus
+
+    shutil.copy(Path("tests/test_repo/dashboard_template.pbit"), tmp_path / "dashboard_template.pbit")
+    shutil.copy(Path("tests/test_repo/inventory.yaml"), tmp_path / "inventory.yaml")
+    (tmp_path / "nuggets").mkdir()
+    (tmp_path / "nuggets" / "hello.py").write_text(_CUSTOM_NUGGET)
+    (tmp_path / "pyproject.toml").write_text('[tool.powernugget]\ncustom_nuggets_repo = "nuggets"\n')
+    (tmp_path / "tasks.yaml").write_text(
+        "- name: Greet\n"
+        "  nugget: say_hello\n"
+        "  params:\n"
+        "    who: '{{ dashboard_name }}'\n"
+        "- name: Debug\n"
+        "  nugget: debug\n"
+        "  params:\n"
+        "    msg: Greeted\n",
+    )
+
+    summary = Nuggetizer(path=tmp_path).execute()
+    for name, results in summary.items():
+        assert [r.status for r in results] == [NuggetExecutionStatus.SUCCESS] * 2
+        assert results[0].result == f"Hello {name}"
+
+    # All the unknown nuggets are reported before the first dashboard is rendered
+    (tmp_path / "tasks.yaml").write_text("- name: Missing\n  nugget: missing\n- name: Greet\n  nugget: greet\n")
+    with pytest.raises(Errors.E036, match="missing"):  # type: ignore
+        Nuggetizer(path=tmp_path).execute()
@@ -0,0 +1,98 @@
+#! /usr/bin/python3
+
+# test_scheduler.py
+#
+# Project name: Power Nugget
+# Author: Hugo Juhel
+#
+# description:
+"""
+    Test the dependency scheduler and the nuggets footprints
+"""
+
+#############################################################################
+#                                 Packages                                  #
+#############################################################################
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from powernugget.builtins.nugget import Footprint
+from powernugget.builtins.nugget.footprint import WHOLE_DASHBOARD
+from powernugget.scheduler import DependencyScheduler
+
+#############################################################################
+#                                   Script                                  #
+#############################################################################
+
+
+def test_footprints_conflicts():
+
+    logo = Footprint(writes=frozenset({"members/Report/StaticResources/RegisteredResources/logo.png"}))
+    resources = Footprint(reads=frozenset({"members/Report/StaticResources"}))
+    page = Footprint(writes=frozenset({"layout/pages/Overview"}))
+
+    assert logo.conflicts(resources) and resources.conflicts(logo)
+    assert not logo.conflicts(page)
+    assert not resources.conflicts(resources)
+    assert not Footprint().conflicts(WHOLE_DASHBOARD)
+    assert WHOLE_DASHBOARD.conflicts(page)
+
+
+def test_jobs_wait_for_their_dependencies():
+
+    events = []
+    lock = threading.Lock()
+
+    def _job(name, duration=0.0):
+        def _run():
+            time.sleep(duration)
+            with lock:
+                events.append(name)
+            return name
+
+        return _run
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        scheduler = DependencyScheduler(pool)
+        slow = scheduler.submit(_job("slow", 0.1))
+        fast = scheduler.submit(_job("fast"))
+        after_slow = scheduler.submit(_job("after_slow"), after=[slow])
+        last = scheduler.submit(_job("last"), after=[after_slow, fast])
+
+        assert last.result() == "last"
+
+    assert events.index("fast") < events.index("slow") < events.index("after_slow") < events.index("last")
+
+
+def test_failed_dependencies_cancel_their_dependents():
+
+    def _fail():
+        raise ValueError("failed")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        scheduler = DependencyScheduler(pool)
+        failed = scheduler.submit(_fail)
+        dependent = scheduler.submit(lambda: "ran", after=[failed])
+        transitive = scheduler.submit(lambda: "ran", after=[dependent])
+        independent = scheduler.submit(lambda: "ran")
+
+        assert isinstance(failed.exception(), ValueError)
+        assert independent.result() == "ran"
+        wait([dependent, transitive])
+        assert dependent.cancelled() and transitive.cancelled()
+
+
+def test_failures_reported_by_the_results_cancel_the_dependents():
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        scheduler = DependencyScheduler(pool, failed=lambda future: future.result() == "error")
+        failed = scheduler.submit(lambda: "error")
+        dependent = scheduler.submit(lambda: "ran", after=[failed])
+        succeeded = scheduler.submit(lambda: "ok")
+        released = scheduler.submit(lambda: "ran", after=[succeeded])
+
+        assert released.result() == "ran"
+        wait([dependent])
+        assert dependent.cancelled()
@@ -0,0 +1,137 @@
+#! /usr/bin/python3
+
+# test_sharding.py
+#
+# Project name: Power Nugget
+# Author: Hugo Juhel
+#
+# description:
+"""
+    Test the sharding of a run, and the merge of the shards
+"""
+
+#############################################################################
+#                                 Packages                                  #
+#############################################################################
+
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+import yaml
+from click.testing import CliRunner
+
+from powernugget.builtins.nugget import NuggetExecutionStatus
+from powernugget.cli import cli
+from powernugget.errors import ErrorPrototype
+from powernugget.manifest import MANIFEST_FILE_NAME
+from powernugget.sharding import Shard, balance, shard_of
+
+#############################################################################
+#                                   Script                                  #
+#############################################################################
+
+
+def test_shard_spec():
+
+    assert Shard.of("2/4") == Shard(index=2, count=4)
+    assert Shard.of(" 1 / 1 ").report_file_name() == "powernugget-report.shard-1-of-1.json"
+
+    for spec in ("0/4", "5/4", "1", "a/b"):
+        with pytest.raises(ErrorPrototype, match="E050"):
+            Shard.of(spec)
+
+
+def test_partitions_are_stable_and_balanced():
+
+    names = [f"dashboard_{i}" for i in range(4000)]
+    shards = [shard_of(name, 4) for name in names]
+
+    assert shards == [shard_of(name, 4) for name in names]
+    assert all(800 < shards.count(index) < 1200 for index in range(1, 5))
+
+    # A few heavy dashboards are spread accross the shards, the light ones filling the gaps
+    weights = {name: 100.0 if i < 4 else 1.0 for i, name in enumerate(names[:400])}
+    assignment = balance(list(weights), weights, 4)
+    assert assignment == balance(list(reversed(weights)), weights, 4)
+    assert sorted(assignment[name] for name in names[:4]) == [1, 2, 3, 4]
+    loads = [sum(weights[name] for name, index in assignment.items() if index == shard) for shard in range(1, 5)]
+    assert max(loads) - min(loads) <= 1.0
+
+
+def test_sharded_run_and_merge(tmp_path):
+
+    from powernugget import Nuggetizer
+
+    for name in ("dashboard_template.pbit", "tasks.yaml"):
+        shutil.copy(Path("tests/test_repo") / name, tmp_path / name)
+    dashboards = {f"dashboard_{i}": {"color_remapping": {}} for i in range(8)}
+    (tmp_path / "inventory.yaml").write_text(yaml.safe_dump({"dashboards": dashboards}))
+
+    rendered = []
+    for spec in ("1/2", "2/2"):
+        summary = Nuggetizer(path=tmp_path).execute(shard=spec)
+        rendered.append(list(summary))
+        assert (tmp_path / Shard.of(spec).report_file_name()).exists()
+        assert (tmp_path / Shard.of(spec).manifest_file_name()).exists()
+
+    # The shards are disjoint, and cover the whole inventory
+    assert sorted(rendered[0] + rendered[1]) == sorted(dashboards)
+    assert not set(rendered[0]) & set(rendered[1])
+
+    result = CliRunner().invoke(cli, ["merge", str(tmp_path), "--shards", "2"])
+    assert result.exit_code == 0, result.output
+    assert "8 dashboards" in result.output
+
+    # The files of the merged shards are removed
+    assert not [path for path in tmp_path.iterdir() if ".shard-" in path.name]
+
+    report = json.loads((tmp_path / "powernugget-report.json").read_text())
+    assert sorted(report["dashboards"]) == sorted(dashboards)
+    assert sorted(json.loads((tmp_path / MANIFEST_FILE_NAME).read_text())["dashboards"]) == sorted(dashboards)
+
+    # The merged manifest is the starting point of the next shards, and of the unsharded runs
+    summary = Nuggetizer(path=tmp_path).execute(incremental=True)
+    assert all(results[0].status == NuggetExecutionStatus.UP_TO_DATE for results in summary.values())
+
+    # The shards can be balanced with the timings of the previous run
+    weighted = [
+        list(Nuggetizer(path=tmp_path).execute(shard=spec, shard_weights=tmp_path / "powernugget-report.json")) for spec in ("1/2", "2/2")
+    ]
+    assert sorted(weighted[0] + weighted[1]) == sorted(dashboards)
+
+
+def test_merge_reports_missing_shards(tmp_path):
+
+    from powernugget import Nuggetizer
+
+    for name in ("dashboard_template.pbit", "inventory.yaml", "tasks.yaml"):
+        shutil.copy(Path("tests/test_repo") / name, tmp_path / name)
+    Nuggetizer(path=tmp_path).execute(shard="2/3")
+
+    result = CliRunner().invoke(cli, ["merge", str(tmp_path), "--shards", "3"])
+    assert result.exit_code == 1
+    assert "E052" in result.output and "1/3, 3/3" in result.output
+    assert (tmp_path / Shard.of("2/3").report_file_name()).exists()
+
+
+def test_merge_ignores_the_shards_of_other_counts(tmp_path):
+
+    from powernugget import Nuggetizer
+
+    for name in ("dashboard_template.pbit", "inventory.yaml", "tasks.yaml"):
+        shutil.copy(Path("tests/test_repo") / name, tmp_path / name)
+
+    # The leftovers of a run split in 4 shards don't prevent merging the runs split in 2 shards
+    Nuggetizer(path=tmp_path).execute(shard="1/4")
+    for _ in range(2):
+        for spec in ("1/2", "2/2"):
+            Nuggetizer(path=tmp_path).execute(shard=spec)
+
+        result = CliRunner().invoke(cli, ["merge", str(tmp_path), "--shards", "2"])
+        assert result.exit_code == 0, result.output
+        assert "2 dashboards" in result.output
+
+    leftovers = [path.name for path in tmp_path.iterdir() if ".shard-" in path.name]
+    assert leftovers and all(name.endswith(".shard-1-of-4.json") for name in leftovers)
@@ -0,0 +1,206 @@
+#! /usr/bin/python3
+
+# test_sources.py
+#
+# Project name: Power Nugget
+# Author: Hugo Juhel
+#
+# description:
+"""
+    Test the inventory sources and the streaming of the dashboards and their results
+"""
+
+#############################################################################
+#                                 Packages                                  #
+#############################################################################
+
+import csv
+import json
+import shutil
+import sqlite3
+from pathlib import Path
+
+import pytest
+import yaml
+
+from powernugget.descriptions import inventory_source
+from powernugget.descriptions.sources import (
+    CsvInventory,
+    DirectoryInventory,
+    FileInventory,
+    InventorySource,
+    JsonLinesInventory,
+    SqliteInventory,
+)
+from powernugget.errors import ErrorPrototype
+from powernugget.sinks import JsonLinesSink, ResultSink
+
+#############################################################################
+#                                   Script                                  #
+#############################################################################
+
+_DASHBOARDS = {
+    "cssvdc": {"school": "Vallée", "color_remapping": {"outer": {"from": "red", "to": "bleu"}}},
+    "cssdc": {"school": "Découvreurs", "color_remapping": {"outer": {"from": "red", "to": "bleu"}}},
+}
+
+
+def _write_sources(root: Path):
+    """
+    Write the same inventory as every supported source
+    """
+
+    (root / "inventory.yaml").write_text(
+        yaml.safe_dump({"dashboards": _DASHBOARDS}, allow_unicode=True, sort_keys=False), encoding="utf-8"
+    )
+    (root / "inventory.jsonl").write_text("".join(json.dumps({"name": name, **data}) + "\n" for name, data in _DASHBOARDS.items()))
+
+    with open(root / "inventory.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "school", "data"])
+        for name, data in _DASHBOARDS.items():
+            writer.writerow([name, data["school"], json.dumps({"color_remapping": data["color_remapping"]})])
+
+    with sqlite3.connect(root / "inventory.sqlite") as connection:
+        connection.execute("CREATE TABLE dashboards (name TEXT, school TEXT, data TEXT)")
+        for name, data in _DASHBOARDS.items():
+            connection.execute(
+                "INSERT INTO dashboards VALUES (?, ?, ?)", (name, data["school"], json.dumps({"color_remapping": data["color_remapping"]}))
+            )
+    connection.close()
+
+    (root / "inventory").mkdir()
+    for name, data in _DASHBOARDS.items():
+        (root / "inventory" / f"{name}.yaml").write_text(yaml.safe_dump(data, allow_unicode=True), encoding="utf-8")
+
+
+@pytest.mark.parametrize(
+    "name, kind",
+    [
+        ("inventory.yaml", FileInventory),
+        ("inventory.jsonl", JsonLinesInventory),
+        ("inventory.csv", CsvInventory),
+        ("inventory.sqlite", SqliteInventory),
+        ("inventory", DirectoryInventory),
+    ],
+)
+def test_inventory_sources(tmp_path, name, kind):
+
+    _write_sources(tmp_path)
+    source = inventory_source(tmp_path / name)
+    assert isinstance(source, kind)
+
+    # The directory is read in the files' names order
+    expected = sorted(_DASHBOARDS.items()) if kind is DirectoryInventory else list(_DASHBOARDS.items())
+    assert list(source) == expected
+    assert list(source) == expected
+
+
+def test_inventory_sources_report_invalid_entries(tmp_path):
+
+    (tmp_path / "inventory.jsonl").write_text('{"name": "cssdc"}\n{"school": "no name"}\n')
+    with pytest.raises(ErrorPrototype, match="line 2"):
+        list(inventory_source(tmp_path / "inventory.jsonl"))
+
+    (tmp_path / "inventory.jsonl").write_text('{"name": "cssdc"}\nnot json\n')
+    with pytest.raises(ErrorPrototype, match="line 2"):
+        list(inventory_source(tmp_path / "inventory.jsonl"))
+
+    # The data column must hold a JSON object
+    for data in ("[1]", "5", '"x"'):
+        with open(tmp_path / "inventory.csv", "w", newline="") as f:
+            csv.writer(f).writerows([["name", "data"], ["cssdc", "{}"], ["cssvdc", data]])
+        with pytest.raises(ErrorPrototype, match="line 3"):
+            list(inventory_source(tmp_path / "inventory.csv"))
+
+
+def test_sources_and_sinks_must_be_implemented():
+
+    class _Source(InventorySource):
+        pass
+
+    class _Sink(ResultSink):
+        pass
+
+    for incomplete in (lambda: _Source(Path("source")), _Sink):
+        with pytest.raises(TypeError, match="abstract"):
+            incomplete()
+
+
+class _Counting(InventorySource):
+    """
+    A source counting the dashboards yielded so far
+    """
+
+    def __init__(self, dashboards):
+        super().__init__(Path("counting"))
+        self.dashboards = dashboards
+        self.yielded = 0
+
+    def __iter__(self):
+        for name, data in self.dashboards.items():
+            self.yielded += 1
+            yield name, data
+
+
+class _Recording(ResultSink):
+    """
+    A sink recording how many dashboards were pulled from the source when each result was written
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.pulled = []
+        self.closed = False
+
+    def write(self, dashboard_name, results):
+        self.pulled.append((dashboard_name, self.source.yielded))
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.mark.parametrize("workers, backend", [(None, "process"), (2, "thread"), (2, "process"), (2, "asyncio")])
+def test_nuggetizer_streams_the_inventory(tmp_path, workers, backend):
+
+    from powernugget import Nuggetizer
+
+    for name in ("dashboard_template.pbit", "tasks.yaml"):
+        shutil.copy(Path("tests/test_repo") / name, tmp_path / name)
+
+    dashboards = {f"dashboard_{i}": {"color_remapping": {}} for i in range(12)}
+    source = _Counting(dashboards)
+    sink = _Recording(source)
+
+    assert Nuggetizer(path=tmp_path, inventory=source).execute(workers=workers, backend=backend, sink=sink) is None
+    assert sink.closed
+
+    # The results are written in the inventory order, while the inventory is consumed : only a few dashboards are in flight
+    assert [name for name, _ in sink.pulled] == list(dashboards)
+    in_flight = 1 if workers is None else 2 * workers
+    assert all(pulled <= i + in_flight for i, (_, pulled) in enumerate(sink.pulled, start=1))
+
+
+def test_nuggetizer_runs_a_streamed_inventory(tmp_path):
+
+    from powernugget import Nuggetizer
+
+    for name in ("dashboard_template.pbit", "inventory.yaml", "tasks.yaml"):
+        shutil.copy(Path("tests/test_repo") / name, tmp_path / name)
+
+    expected = Nuggetizer(path=tmp_path).execute()
+
+    inventory = yaml.safe_load((tmp_path / "inventory.yaml").read_text())["dashboards"]
+    (tmp_path / "inventory.yaml").unlink()
+    (tmp_path / "inventory.jsonl").write_text("".join(json.dumps({"name": name, **data}) + "\n" for name, data in inventory.items()))
+
+    summary = Nuggetizer(path=tmp_path).execute(incremental=True, sink=JsonLinesSink(tmp_path / "results.jsonl"))
+    assert summary is None
+
+    lines = [json.loads(line) for line in (tmp_path / "results.jsonl").read_text().splitlines()]
+    assert [line["dashboard"] for line in lines] == list(expected)
+    assert all(result["status"] == "UP_TO_DATE" for line in lines for result in line["results"])
+
+    (tmp_path / "inventory.jsonl").write_text((tmp_path / "inventory.jsonl").read_text() * 2)
+    with pytest.raises(ErrorPrototype, match="E038"):
+        Nuggetizer(path=tmp_path).execute()
@@ -59,3 +59,85 @@ def test_looping_task_generator():
     assert tasks[1].when is True
     assert tasks[2].params["msg"] == "Doing non parametric stuff on cssvdc"  # type: ignore
     assert tasks[2].when is False  # type: ignore
+
+
+def test_templates_are_compiled_once():
+    """
+    Check that the templates are compiled once per source and that plain strings skip jinja
+    """
+
+    from powernugget.tasks_plan import Constant, _compile_template, compile_field
+
+    _compile_template.cache_clear()
+
+    field = compile_field({"a": "Hello {{ name }}", "b": "Hello {{ name }}"})
+    assert field({"name": "world"}) == {"a": "Hello world", "b": "Hello world"}
+
+    plain = compile_field("No markers here\n")
+    assert isinstance(plain, Constant)
+    assert plain({}) == "No markers here"
+
+    assert _compile_template.cache_info().misses == 1
+    assert _compile_template.cache_info().hits == 1
+
+
+def test_loop_iterations_are_layered():
+    """
+    Check that the loop iterations do not leak their binding into the shared context, and that the context is not copied
+    """
+
+    from powernugget.tasks_plan import TaskPlan
+
+    tasks_list = Tasks_list.of(
+        [{"name": "{{ item }}", "nugget": "powernugget.builtins.Debug", "params": {"msg": "{{ vars['prefix'] }} {{ item }}"}, "loop": "['a', 'b']"}]
+    )
+
+    vars_ = {"prefix": "hello"}
+    G = TaskGenerator(TaskPlan(tasks_list), vars=vars_)
+
+    assert [task.params["msg"] for task in G] == ["hello a", "hello b"]  # type: ignore
+    assert "item" not in G._initial_context
+    assert G._initial_context["vars"]["prefix"] is vars_["prefix"]
+
+
+def test_registered_outputs_feed_the_following_tasks():
+    """
+    Check that a registered output is exposed to the following tasks, and only evaluated and kept as long as a task refers to it
+    """
+
+    from powernugget.builtins.nugget import Deferred
+    from powernugget.tasks_plan import TaskPlan
+
+    tasks_list = Tasks_list.of(
+        [
+            {"name": "produce", "nugget": "powernugget.builtins.Debug", "params": {"msg": "a"}, "register": "produced"},
+            {"name": "unused", "nugget": "powernugget.builtins.Debug", "params": {"msg": "b"}, "register": "unused"},
+            {"name": "consume", "nugget": "powernugget.builtins.Debug", "params": {"msg": "{{ produced['count'] }}"}, "when": "produced is not None"},
+            {"name": "last", "nugget": "powernugget.builtins.Debug", "params": {"msg": "done"}},
+        ]
+    )
+
+    calls = []
+
+    def _expensive():
+        calls.append(1)
+        return {"count": 42}
+
+    produced, unused = Deferred(_expensive), Deferred(lambda: calls.append("unused"))
+
+    G = TaskGenerator(TaskPlan(tasks_list))
+    rendered = []
+    for task in G:
+        rendered.append(task)
+        if task.name == "produce":
+            G.register(task.register_out, produced)  # type: ignore
+        elif task.name == "unused":
+            G.register(task.register_out, unused)  # type: ignore
+
+    consume = rendered[2]
+    assert consume.when and consume.params["msg"] == "42"
+    assert calls == [1]
+
+    # The outputs are released once the last task refering to them has been rendered, the unused ones are not even kept
+    assert not G._registered
+    assert not produced.evaluated and not unused.evaluated
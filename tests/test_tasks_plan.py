@@ -0,0 +1,150 @@
+#! /usr/bin/python3
+
+# test_tasks_plan.py
+#
+# Project name: Power Nugget
+# Author: Hugo Juhel
+#
+# description:
+"""
+    Test the compilation of the tasks list into a task plan
+"""
+
+#############################################################################
+#                                 Packages                                  #
+#############################################################################
+
+from pathlib import Path
+import pickle
+
+from powernugget.builtins import Debug
+from powernugget.descriptions import _deserialize_yaml_as
+from powernugget.descriptions.models import Tasks_list
+from powernugget.tasks_plan import TaskPlan
+
+#############################################################################
+#                                   Script                                  #
+#############################################################################
+
+
+def _resolver(fqn: str):
+    assert fqn == "powernugget.builtins.Debug"
+    return Debug
+
+
+def test_plan_resolves_constant_fields():
+    """
+    Check that constant fields and nuggets are resolved at compilation time
+    """
+
+    p = Path("tests/test_repo/").absolute() / "tasks.yaml"
+    tasks_list: Tasks_list = _deserialize_yaml_as(p, Tasks_list)  # type: ignore
+
+    plan = TaskPlan(tasks_list, resolver=_resolver)
+    looping, simple = plan.tasks
+
+    assert looping.nugget.constant and looping.nugget_class is Debug
+    assert not looping.name.constant
+    assert looping.loop is not None and not looping.loop.constant
+    assert simple.loop is None
+
+
+def test_plan_renders_against_context():
+    """
+    Check that a compiled task renders the same way the raw task would
+    """
+
+    tasks_list = Tasks_list.of(
+        [
+            {"name": "constant", "nugget": "powernugget.builtins.Debug", "params": {"msg": ["a", "b"]}, "when": True},
+            {"name": "{{ name }}", "nugget": "powernugget.builtins.Debug", "params": {"msg": "{{ name }}"}, "when": "{{ flag }} and name == 'x'"},
+        ]
+    )
+
+    plan = TaskPlan(tasks_list, resolver=_resolver)
+    constant, templated = [task.render({"name": "x", "flag": "True"}) for task in plan]
+
+    assert constant.params == {"msg": ["a", "b"]} and constant.when is True and constant.on_error == "raise"
+    assert templated.name == "x" and templated.params == {"msg": "x"} and templated.when is True
+    assert constant.params is not plan.tasks[0].render({}).params
+
+
+def test_templated_nugget_is_resolved_when_executed_only():
+    """
+    A templated nugget of a skipped task is not resolved : it might not be rendered into a valid name
+    """
+
+    tasks_list = Tasks_list.of(
+        [
+            {
+                "name": "optional",
+                "nugget": "{{ dashboard_data.get('nugget', '') }}",
+                "params": {"msg": "optional"},
+                "when": "'nugget' in dashboard_data",
+            }
+        ]
+    )
+
+    task = TaskPlan(tasks_list, resolver=_resolver).tasks[0]
+
+    assert task.render({"dashboard_data": {}}).nugget_class is None
+    assert task.render({"dashboard_data": {"nugget": "powernugget.builtins.Debug"}}).nugget_class is Debug
+
+
+def test_plan_is_picklable():
+    """
+    The plan is shipped to the worker processes : it must survive a pickling round trip
+    """
+
+    p = Path("tests/test_repo/").absolute() / "tasks.yaml"
+    tasks_list: Tasks_list = _deserialize_yaml_as(p, Tasks_list)  # type: ignore
+
+    plan = pickle.loads(pickle.dumps(TaskPlan(tasks_list)))
+
+    assert len(plan) == 2
+
+
+def test_tasks_references():
+    """
+    The variables a task refers to are listed, the loop variable excepted
+    """
+
+    plan = TaskPlan(
+        Tasks_list(
+            tasks=[
+                {
+                    "name": "{{ dashboard_name }}",
+                    "nugget": "powernugget.builtins.Debug",
+                    "params": {"msg": "{{ item }} {{ previous.value }}"},
+                    "loop": "{{ vars['items'] }}",
+                    "when": "flag and other",
+                }
+            ]
+        )
+    )
+
+    assert plan.tasks[0].references == {"dashboard_name", "previous", "vars", "flag", "other"}
+
+
+def test_condition_names_include_generator_expressions():
+    """
+    The names used inside a comprehension or a generator expression of a `when` condition are listed and readable
+    """
+
+    plan = TaskPlan(
+        Tasks_list(
+            tasks=[
+                {
+                    "name": "Check",
+                    "nugget": "powernugget.builtins.Debug",
+                    "params": {"msg": "Checked"},
+                    "when": "any(x == dashboard_name for x in vars['l'])",
+                }
+            ]
+        )
+    )
+
+    task = plan.tasks[0]
+    assert {"dashboard_name", "vars"} <= task.references
+    assert task.render({"dashboard_name": "a", "vars": {"l": ["a", "b"]}}).when is True
+    assert task.render({"dashboard_name": "c", "vars": {"l": ["a", "b"]}}).when is False
@@ -0,0 +1,98 @@
+#! /usr/bin/python3
+
+# test_timings.py
+#
+# Project name: Power Nugget
+# Author: Hugo Juhel
+#
+# description:
+"""
+    Test the run's instrumentation
+"""
+
+#############################################################################
+#                                 Packages                                  #
+#############################################################################
+
+import json
+import shutil
+import time
+from pathlib import Path
+
+import pytest
+
+from powernugget.builtins.nugget import NuggetExecutionStatus
+from powernugget.timings import ARCHIVE, CONTEXT_BUILD, NUGGET_RUN, TASK_RENDER, WHEN_EVAL, Timing, timed
+
+#############################################################################
+#                                   Script                                  #
+#############################################################################
+
+
+def test_timed_accumulates():
+
+    timings = {}
+    for _ in range(2):
+        with timed(timings, "sleep"):
+            time.sleep(0.01)
+
+    with pytest.raises(ValueError):
+        with timed(timings, "failure"):
+            raise ValueError()
+
+    assert timings["sleep"].wall >= 0.02
+    assert timings["sleep"].cpu < timings["sleep"].wall
+    assert "failure" in timings
+    assert Timing(1.0, 1.0) - Timing(2.0, 0.5) == Timing(0.0, 0.5)
+
+
+@pytest.mark.parametrize("task_workers", [None, 2])
+def test_nuggetizer_reports_timings(tmp_path, task_workers):
+
+    from powernugget import Nuggetizer
+
+    for name in ("dashboard_template.pbit", "inventory.yaml", "tasks.yaml"):
+        shutil.copy(Path("tests/test_repo") / name, tmp_path / name)
+
+    nuggetizer = Nuggetizer(path=tmp_path)
+    summary = nuggetizer.execute(task_workers=task_workers, report=tmp_path / "report.json")
+
+    # The timings are attached to the results
+    for results in summary.values():
+        for result in results:
+            assert {TASK_RENDER, WHEN_EVAL} <= result.timings.keys()
+            assert (NUGGET_RUN in result.timings) == (result.status == NuggetExecutionStatus.SUCCESS)
+
+    report = json.loads((tmp_path / "report.json").read_text())
+    assert {"load", "template_open"} <= report["phases"].keys()
+    assert report["wall"] >= sum(phase["wall"] for phase in report["phases"].values())
+    for name, dashboard in report["dashboards"].items():
+        assert {CONTEXT_BUILD, TASK_RENDER, ARCHIVE} <= dashboard["phases"].keys()
+        assert [task["name"] for task in dashboard["tasks"]] == [result.name for result in summary[name]]
+
+    nuggetizer.report.write(tmp_path / "report.prom")
+    metrics = (tmp_path / "report.prom").read_text()
+    assert 'powernugget_dashboard_phase_seconds{dashboard="cssdc",phase="archive",clock="wall"}' in metrics
+
+
+@pytest.mark.parametrize("workers, backend", [(None, "process"), (2, "process"), (2, "thread"), (2, "asyncio")])
+def test_nuggetizer_writes_trace(tmp_path, workers, backend):
+
+    from powernugget import Nuggetizer
+
+    for name in ("dashboard_template.pbit", "inventory.yaml", "tasks.yaml"):
+        shutil.copy(Path("tests/test_repo") / name, tmp_path / name)
+
+    Nuggetizer(path=tmp_path).execute(workers=workers, backend=backend, trace=tmp_path / "trace.json")
+
+    events = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+    spans = [event for event in events if event["ph"] == "X"]
+    names = {event["name"] for event in spans}
+    assert {"run", "load", "template_open", "play", "task", "nugget_run", "serialize", "archive"} <= names
+    assert {event["args"]["dashboard"] for event in spans if event["name"] == "play"} == {"cssdc", "cssvdc"}
+
+    # The spans of a worker process are merged into the main process's trace
+    run = next(event for event in spans if event["name"] == "run")
+    plays = [event for event in spans if event["name"] == "play"]
+    assert all((event["pid"] != run["pid"]) == (workers is not None and backend == "process") for event in plays)
+    assert all(run["ts"] <= event["ts"] and event["ts"] + event["dur"] <= run["ts"] + run["dur"] + 1000 for event in plays)